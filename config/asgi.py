@@ -9,3 +9,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.ANALYSIS_RESUME_ON_STARTUP:
+    # Workers live in the web process: pick up the jobs a restart interrupted
+    from edutrack.jobs import resume_jobs  # noqa: E402
+    resume_jobs()
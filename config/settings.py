@@ -69,8 +69,18 @@ ASGI_APPLICATION = 'config.asgi.application'
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # Django's SQLite backend plus transaction_mode (built in from Django 5.1)
+        'ENGINE': 'edutrack.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Analysis workers and fetch threads write concurrently: transactions take
+            # the write lock when they begin, so they wait up to timeout seconds for it
+            # instead of failing on the lock upgrade of a read-then-write
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # A file rather than in-memory, so threaded tests get the same locking as production
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -114,6 +124,66 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # API Keys (from environment variables)
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+GEMINI_STRUCTURED_OUTPUT = os.getenv('GEMINI_STRUCTURED_OUTPUT', 'True') == 'True'  # JSON schema answers
+
+# Gemini prompt size: tokens of repository context (README, commits, languages) per prompt
+GEMINI_CONTEXT_TOKEN_BUDGET = int(os.getenv('GEMINI_CONTEXT_TOKEN_BUDGET', '1500'))
+GEMINI_BATCH_CONTEXT_TOKEN_BUDGET = int(os.getenv('GEMINI_BATCH_CONTEXT_TOKEN_BUDGET', '600'))  # per batched repo
+
+# Gemini model routing: the fast model first, the pro model when a rule escalates
+GEMINI_ROUTING_ENABLED = os.getenv('GEMINI_ROUTING_ENABLED', 'True') == 'True'
+GEMINI_FAST_MODEL = os.getenv('GEMINI_FAST_MODEL', 'gemini-2.5-flash')
+GEMINI_PRO_MODEL = os.getenv('GEMINI_PRO_MODEL', 'gemini-2.5-pro')
+GEMINI_BORDERLINE_SCORE_MIN = int(os.getenv('GEMINI_BORDERLINE_SCORE_MIN', '55'))  # fast scores in this
+GEMINI_BORDERLINE_SCORE_MAX = int(os.getenv('GEMINI_BORDERLINE_SCORE_MAX', '65'))  # range get a pro review
+GEMINI_LARGE_REPO_COMMITS = int(os.getenv('GEMINI_LARGE_REPO_COMMITS', '200'))  # go straight to pro
+GEMINI_LARGE_REPO_BYTES = int(os.getenv('GEMINI_LARGE_REPO_BYTES', '1000000'))  # of code, ditto
+
+# Gemini backoff: AIMD concurrency limit (up to ANALYSIS_GEMINI_CONCURRENCY) and circuit breaker
+GEMINI_LATENCY_TARGET_MS = int(os.getenv('GEMINI_LATENCY_TARGET_MS', '30000'))  # slower answers shrink the limit
+GEMINI_BACKOFF_FACTOR = float(os.getenv('GEMINI_BACKOFF_FACTOR', '0.5'))  # limit multiplier on 429/503/timeout
+GEMINI_CIRCUIT_FAILURES = int(os.getenv('GEMINI_CIRCUIT_FAILURES', '5'))  # overloads in a row that open it
+GEMINI_CIRCUIT_COOLDOWN = int(os.getenv('GEMINI_CIRCUIT_COOLDOWN', '30'))  # seconds, doubling per trip
+GEMINI_LIMITER_MAX_WAIT = int(os.getenv('GEMINI_LIMITER_MAX_WAIT', '120'))  # seconds before deferring
+
+# Gemini analysis cache: identical prompts reuse the stored analysis
+GEMINI_CACHE_ENABLED = os.getenv('GEMINI_CACHE_ENABLED', 'True') == 'True'
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '5000'))  # least recently used go first
+GEMINI_CACHE_MAX_AGE_DAYS = int(os.getenv('GEMINI_CACHE_MAX_AGE_DAYS', '30'))
+
+# Gemini batch prompts: several small repos analyzed in one call
+GEMINI_BATCH_TOKEN_BUDGET = int(os.getenv('GEMINI_BATCH_TOKEN_BUDGET', '8000'))  # estimated prompt tokens
+GEMINI_BATCH_MAX_REPOS = int(os.getenv('GEMINI_BATCH_MAX_REPOS', '10'))  # repos per prompt
+
+# Repository ingestion: 'github_api' (REST/GraphQL) or 'git_mirror' (local bare mirrors)
+INGESTION_BACKEND = os.getenv('INGESTION_BACKEND', 'github_api')
+GIT_MIRROR_ROOT = Path(os.getenv('GIT_MIRROR_ROOT', BASE_DIR / 'mirrors'))
+GIT_MIRROR_TIMEOUT = float(os.getenv('GIT_MIRROR_TIMEOUT', '300'))  # seconds per git command
+
+# GitHub fetching
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+GITHUB_GRAPHQL_BATCH_SIZE = int(os.getenv('GITHUB_GRAPHQL_BATCH_SIZE', '50'))  # repos per GraphQL query
+GITHUB_CONCURRENT_FETCH = os.getenv('GITHUB_CONCURRENT_FETCH', 'True') == 'True'
+GITHUB_MAX_CONCURRENCY = int(os.getenv('GITHUB_MAX_CONCURRENCY', '10'))  # in-flight requests per process
+GITHUB_REQUEST_TIMEOUT = float(os.getenv('GITHUB_REQUEST_TIMEOUT', '10'))  # seconds per request
+GITHUB_FETCH_TIMEOUT = float(os.getenv('GITHUB_FETCH_TIMEOUT', '30'))  # seconds per endpoint call of a repo fetch, once running
+GITHUB_POOL_CONNECTIONS = int(os.getenv('GITHUB_POOL_CONNECTIONS', '4'))  # hosts kept in the pool
+GITHUB_POOL_MAXSIZE = int(os.getenv('GITHUB_POOL_MAXSIZE', '20'))  # keep-alive connections per host
+GITHUB_MAX_RETRIES = int(os.getenv('GITHUB_MAX_RETRIES', '3'))
+GITHUB_RETRY_BACKOFF = float(os.getenv('GITHUB_RETRY_BACKOFF', '0.5'))  # seconds, doubled per retry
+GITHUB_CONDITIONAL_REQUESTS = os.getenv('GITHUB_CONDITIONAL_REQUESTS', 'True') == 'True'  # ETag cache
+GITHUB_RATE_LIMIT_ENABLED = os.getenv('GITHUB_RATE_LIMIT_ENABLED', 'True') == 'True'
+GITHUB_RATE_LIMIT_BURST = int(os.getenv('GITHUB_RATE_LIMIT_BURST', '100'))  # requests sent unpaced
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv('GITHUB_RATE_LIMIT_MAX_WAIT', '30'))  # seconds before deferring
+
+# Background analysis jobs
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '8'))  # in-process worker threads
+ANALYSIS_GITHUB_CONCURRENCY = int(os.getenv('ANALYSIS_GITHUB_CONCURRENCY', '8'))  # repos fetching at once
+ANALYSIS_GEMINI_CONCURRENCY = int(os.getenv('ANALYSIS_GEMINI_CONCURRENCY', '4'))  # Gemini calls at once
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_MAX_ATTEMPTS', '5'))  # runs before a deferred job fails
+ANALYSIS_STREAM_GRACE = int(os.getenv('ANALYSIS_STREAM_GRACE', '30'))  # seconds a streamed job is left to its page
+ANALYSIS_RESUME_ON_STARTUP = os.getenv('ANALYSIS_RESUME_ON_STARTUP', 'True') == 'True'  # run leftover jobs
+ANALYSIS_STALE_AFTER = int(os.getenv('ANALYSIS_STALE_AFTER', '900'))  # seconds before a running job counts as lost
 
 # Login settings
 LOGIN_REDIRECT_URL = 'dashboard'
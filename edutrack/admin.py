@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Assignment, StudentRepo, AnalysisLog
+from .models import (
+    Assignment, AssignmentStats, StudentRepo, RepoLanguage, AnalysisLog, AnalysisJob,
+    GeminiAnalysisCache, GitHubRateLimit
+)
 
 
 @admin.register(Assignment)
@@ -9,15 +12,48 @@ class AssignmentAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description']
 
 
+class RepoLanguageInline(admin.TabularInline):
+    model = RepoLanguage
+    extra = 0
+    readonly_fields = ['language', 'bytes']
+    can_delete = False
+
+
 @admin.register(StudentRepo)
 class StudentRepoAdmin(admin.ModelAdmin):
     list_display = ['student_name', 'assignment', 'commit_count', 'is_analyzed', 'last_updated']
     list_filter = ['is_analyzed', 'assignment', 'created_at']
     search_fields = ['student_name', 'repo_url']
+    inlines = [RepoLanguageInline]
 
 
 @admin.register(AnalysisLog)
 class AnalysisLogAdmin(admin.ModelAdmin):
-    list_display = ['repo', 'status', 'analysis_date']
-    list_filter = ['status', 'analysis_date']
+    list_display = ['repo', 'status', 'model_tier', 'model_name', 'prompt_tokens',
+                    'response_tokens', 'latency_ms', 'analysis_date']
+    list_filter = ['status', 'model_tier', 'analysis_date']
+    search_fields = ['repo__student_name']
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ['repo', 'status', 'stage', 'progress', 'attempts', 'created_at']
+    list_filter = ['status', 'created_at']
     search_fields = ['repo__student_name']
+
+
+@admin.register(GitHubRateLimit)
+class GitHubRateLimitAdmin(admin.ModelAdmin):
+    list_display = ['resource', 'remaining', 'limit', 'reset_at', 'updated_at']
+
+
+@admin.register(GeminiAnalysisCache)
+class GeminiAnalysisCacheAdmin(admin.ModelAdmin):
+    list_display = ['key', 'model_name', 'hits', 'created_at', 'last_used_at']
+    list_filter = ['model_name']
+
+
+@admin.register(AssignmentStats)
+class AssignmentStatsAdmin(admin.ModelAdmin):
+    list_display = ['assignment', 'total_repos', 'analyzed_repos', 'total_commits', 'updated_at']
+    readonly_fields = ['updated_at']
@@ -0,0 +1,382 @@
+"""
+Repository analysis pipeline: GitHub fetch, Gemini analysis, persistence
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import AnalysisLog
+from .api.async_github_handler import AsyncGitHubHandler
+from .api.github_handler import GitHubHandler
+from .api.gemini_handler import GeminiHandler
+from .api.gemini_router import TieredGeminiRouter
+from .api.git_mirror_handler import GitMirrorHandler
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_github_date(value):
+    """Parse a GitHub ISO-8601 timestamp such as 2025-01-02T00:00:00Z"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+_stage_limits = {}
+_stage_limits_lock = threading.Lock()
+
+
+def stage_slot(stage):
+    """
+    Process-wide semaphore bounding how many analyses are in one stage at once
+    'github' covers the probe and fetch, 'gemini' the model call; each has
+    its own limit so slow LLM calls never hold back GitHub fetching.
+    """
+    limit = {
+        'github': settings.ANALYSIS_GITHUB_CONCURRENCY,
+        'gemini': settings.ANALYSIS_GEMINI_CONCURRENCY,
+    }[stage]
+    with _stage_limits_lock:
+        key = (stage, limit)
+        if key not in _stage_limits:
+            _stage_limits[key] = threading.BoundedSemaphore(limit)
+        return _stage_limits[key]
+
+
+def get_repo_handler():
+    """The ingestion backend selected by settings.INGESTION_BACKEND"""
+    if settings.INGESTION_BACKEND == 'git_mirror':
+        return GitMirrorHandler()
+    return GitHubHandler()
+
+
+def get_analyzer():
+    """The Gemini analyzer: tiered routing unless settings.GEMINI_ROUTING_ENABLED is off"""
+    if settings.GEMINI_ROUTING_ENABLED:
+        return TieredGeminiRouter()
+    return GeminiHandler(settings.GEMINI_PRO_MODEL)
+
+
+def is_unchanged(repo, probe):
+    """
+    True when the freshness probe shows nothing was pushed since the last
+    successful analysis, so the full fetch and the Gemini call can be skipped
+    
+    Probes report either the head commit SHA (git mirrors) or pushed_at (API)
+    """
+    if not probe.get('success') or not repo.is_analyzed:
+        return False
+    last_success = repo.analysis_logs.filter(status='success').first()
+    if last_success is None:
+        return False
+    
+    if probe.get('head_sha'):
+        return probe['head_sha'] == repo.head_sha
+    if repo.pushed_at is None or parse_github_date(probe.get('pushed_at')) != repo.pushed_at:
+        return False
+    return last_success.analysis_date >= repo.pushed_at
+
+
+def apply_github_data(repo, github_data):
+    """Copy a fetch_repo_data result onto the StudentRepo fields (not saved)"""
+    repo.commit_count = github_data.get('commit_count', 0)
+    repo.languages = github_data.get('languages', {})
+    repo.readme_content = github_data.get('readme_content', '')
+
+    last_commit = github_data.get('last_commit')
+    if last_commit:
+        repo.last_commit_message = last_commit.get('message')
+        repo.head_sha = last_commit.get('sha') or ''
+        commit_date = parse_github_date(last_commit.get('date'))
+        if commit_date:
+            repo.last_commit_date = commit_date
+
+    repo.pushed_at = parse_github_date(github_data.get('repo_info', {}).get('pushed_at'))
+    repo.contributors = github_data.get('contributors', [])
+
+
+def apply_analysis(repo, analysis):
+    """Copy a parsed Gemini analysis onto the StudentRepo fields (not saved)"""
+    repo.ai_summary = analysis.get('full_text', '')
+
+    # Extract and validate score
+    extracted_score = analysis.get('score')
+    if extracted_score is not None:
+        # Ensure it's an integer or float
+        try:
+            repo.performance_score = float(extracted_score)
+        except (ValueError, TypeError) as e:
+            logger.warning("Could not convert score %r of %s to a number: %s",
+                           extracted_score, repo.repo_url, e)
+            repo.performance_score = None
+    else:
+        logger.warning("No score in the analysis of %s", repo.repo_url)
+        repo.performance_score = None
+    logger.debug("Score of %s: %s", repo.repo_url, repo.performance_score)
+
+    # Combine improvements and recommendations as suggestions
+    suggestions = analysis.get('improvements', []) + analysis.get('recommendations', [])
+    repo.suggestions = '\n'.join(suggestions) if suggestions else ''
+
+    repo.is_analyzed = True
+
+
+def analyze_student_repo(repo, force=False, progress=None, log=None):
+    """
+    Fetch a repository from GitHub, analyze it with Gemini and save the result
+
+    Unless force is set, a freshness probe runs first and repos with nothing
+    pushed since their last successful analysis are skipped.
+    progress, if given, is called as progress(stage, percent) between steps.
+    log, if given, is the pending AnalysisLog of an earlier deferred run,
+    which this run completes instead of writing another.
+    Returns a dict with success, plus skipped/deferred/retry_at/score/error
+    and the id of the AnalysisLog written.
+    """
+    progress = progress or (lambda stage, percent: None)
+    github_handler = get_repo_handler()
+
+    if not force:
+        progress('checking', 5)
+        skipped = _skip_if_unchanged(github_handler, repo)
+        if skipped:
+            return skipped
+
+    # Create analysis log, unless a deferred run left one to complete
+    log = log or AnalysisLog.objects.create(repo=repo, status='pending')
+
+    # Fetch GitHub data
+    progress('fetching', 10)
+    with stage_slot('github'):
+        github_data = github_handler.fetch_repo_data(repo.repo_url)
+
+    failure = _github_failure(log, github_data)
+    if failure:
+        return failure
+
+    apply_github_data(repo, github_data)
+
+    # Analyze with Gemini
+    progress('analyzing', 40)
+    with stage_slot('gemini'):
+        analysis_result = get_analyzer().analyze_repository(github_data)
+
+    progress('saving', 90)
+    return _save_analysis(repo, log, analysis_result)
+
+
+def analyze_student_repos(repos, force=False):
+    """
+    Batch version of analyze_student_repo for many repos at once
+
+    GitHub data is fetched repo by repo as usual, then every repo that needs
+    the model goes through GeminiHandler.analyze_repositories, which packs
+    several repos into each prompt. Returns {repo.id: result} with the same
+    result shape as analyze_student_repo.
+    """
+    github_handler = get_repo_handler()
+    results = {}
+    fetched = {}
+
+    for repo in repos:
+        if not force:
+            skipped = _skip_if_unchanged(github_handler, repo)
+            if skipped:
+                results[repo.id] = skipped
+                continue
+
+        log = AnalysisLog.objects.create(repo=repo, status='pending')
+        with stage_slot('github'):
+            github_data = github_handler.fetch_repo_data(repo.repo_url)
+
+        failure = _github_failure(log, github_data)
+        if failure:
+            results[repo.id] = failure
+            continue
+
+        apply_github_data(repo, github_data)
+        fetched[repo.id] = (repo, log, github_data)
+
+    if fetched:
+        with stage_slot('gemini'):
+            analyses = get_analyzer().analyze_repositories({
+                repo_id: github_data for repo_id, (_, _, github_data) in fetched.items()
+            })
+        for repo_id, (repo, log, _) in fetched.items():
+            results[repo_id] = _save_analysis(repo, log, analyses[repo_id])
+
+    return results
+
+
+async def stream_student_repo_analysis(repo, log=None):
+    """
+    Async version of analyze_student_repo (always forced) that reports as it goes
+
+    Yields ("status", stage) events, ("chunk", text) events while Gemini
+    streams its answer, and finally ("done", result) once the parsed
+    analysis has been saved, with the result shape of analyze_student_repo.
+    """
+    if log is None:
+        log = await sync_to_async(AnalysisLog.objects.create)(repo=repo, status='pending')
+    try:
+        yield 'status', 'fetching'
+        if settings.INGESTION_BACKEND == 'github_api':
+            github_data = await AsyncGitHubHandler().fetch_repo_data(repo.repo_url)
+        else:
+            github_data = await sync_to_async(
+                get_repo_handler().fetch_repo_data, thread_sensitive=False
+            )(repo.repo_url)
+
+        failure = await sync_to_async(_github_failure)(log, github_data)
+        if failure:
+            yield 'done', failure
+            return
+        apply_github_data(repo, github_data)
+
+        yield 'status', 'analyzing'
+        analysis_result = {'success': False, 'error': 'Analysis stream ended without a result'}
+        async for event in _iterate_in_thread(lambda: _stream_gemini(github_data)):
+            if event['type'] == 'chunk':
+                yield 'chunk', event['text']
+            else:
+                analysis_result = event
+
+        yield 'done', await sync_to_async(_save_analysis)(repo, log, analysis_result)
+
+    except (asyncio.CancelledError, GeneratorExit):
+        # The browser went away mid-stream
+        log.status = 'failed'
+        log.error_message = 'Analysis stream was interrupted'
+        await asyncio.shield(sync_to_async(log.save)())
+        raise
+
+
+def _stream_gemini(github_data):
+    """stream_repository inside the shared Gemini concurrency limit"""
+    with stage_slot('gemini'):
+        yield from get_analyzer().stream_repository(github_data)
+
+
+async def _iterate_in_thread(make_iterator):
+    """
+    Consume a blocking iterator on a worker thread and yield its items here
+    The Gemini streaming call blocks between chunks, so it cannot run on the
+    event loop itself.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+
+    def produce():
+        try:
+            for item in make_iterator():
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+            close_old_connections()
+
+    producer = loop.run_in_executor(None, produce)
+    while True:
+        item = await queue.get()
+        if item is finished:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await producer
+
+
+def _skip_if_unchanged(github_handler, repo):
+    """The skipped result when the freshness probe finds nothing new, else None"""
+    # Only a repo with a successful analysis can be skipped: probing any
+    # other would spend a rate-limited request on an unusable answer
+    if not repo.is_analyzed or not repo.analysis_logs.filter(status='success').exists():
+        return None
+    with stage_slot('github'):
+        probe = github_handler.probe_freshness(repo.repo_url)
+    if not is_unchanged(repo, probe):
+        return None
+    return {
+        'success': True,
+        'skipped': True,
+        'message': 'Repository unchanged since last analysis',
+        'score': repo.performance_score
+    }
+
+
+def _github_failure(log, github_data):
+    """Record a failed or deferred fetch on log and return its result, else None"""
+    if github_data.get('deferred'):
+        # Out of GitHub budget: leave the log pending for the rerun to complete
+        log.error_message = github_data.get('error')
+        log.save()
+        return {
+            'success': False,
+            'deferred': True,
+            'retry_at': github_data.get('retry_at'),
+            'error': github_data.get('error'),
+            'log_id': log.id
+        }
+
+    if not github_data.get('success'):
+        log.status = 'failed'
+        log.error_message = github_data.get('error', 'Unknown error')
+        log.save()
+        return {'success': False, 'error': github_data.get('error'), 'log_id': log.id}
+
+    return None
+
+
+def _save_analysis(repo, log, analysis_result):
+    """Save the repo and its log after the Gemini step and return the result"""
+    log.model_tier = analysis_result.get('tier', '')
+    log.model_name = analysis_result.get('model_name', '')
+    log.escalation_reason = analysis_result.get('escalation_reason', '')
+    log.prompt_tokens = analysis_result.get('prompt_tokens')
+    log.response_tokens = analysis_result.get('response_tokens')
+    log.latency_ms = analysis_result.get('latency_ms')
+    if analysis_result.get('deferred'):
+        # Gemini is backing off: keep the fresh GitHub data, leave the log pending
+        # for the rerun to complete
+        repo.save()
+        log.error_message = analysis_result.get('error')
+        log.save()
+        return {
+            'success': False,
+            'deferred': True,
+            'retry_at': analysis_result.get('retry_at'),
+            'error': analysis_result.get('error'),
+            'log_id': log.id
+        }
+    if analysis_result.get('success'):
+        apply_analysis(repo, analysis_result.get('analysis', {}))
+        log.status = 'success'
+        log.error_message = None  # from a deferred attempt
+    else:
+        log.status = 'failed'
+        log.error_message = analysis_result.get('error', 'Analysis failed')
+
+    repo.save()
+    log.save()
+
+    logger.debug("Saved analysis of %s, log %s: %s", repo.repo_url, log.id, log.status)
+
+    if log.status == 'failed':
+        # GitHub data was still refreshed and saved above
+        return {'success': False, 'error': log.error_message, 'log_id': log.id}
+
+    return {
+        'success': True,
+        'message': 'Repository analyzed successfully!',
+        'score': repo.performance_score,
+        'tier': log.model_tier,
+        'log_id': log.id
+    }
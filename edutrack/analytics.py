@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from .models import Assignment, StudentRepo
-from collections import Counter
+from .stats import assignment_stats
 import json
 
 
@@ -15,69 +15,16 @@ def assignment_analytics(request, assignment_id):
     assignment = get_object_or_404(Assignment, id=assignment_id, teacher=request.user)
     repos = StudentRepo.objects.filter(assignment=assignment)
     
-    # Calculate analytics
+    # Totals, averages, score distribution and languages, kept up to date
+    stats = assignment_stats(assignment)
+    language_stats = stats.pop('languages')[:10]
     analytics = {
         'assignment': assignment,
-        'total_students': repos.count(),
-        'analyzed_repos': repos.filter(is_analyzed=True).count(),
-        'pending_repos': repos.filter(is_analyzed=False).count(),
+        'total_students': stats['total_repos'],
+        'language_stats': language_stats,
+        **stats,
     }
     
-    # Total commits
-    total_commits = sum(repo.commit_count for repo in repos)
-    analytics['total_commits'] = total_commits
-    
-    # Average commits per student
-    if repos.count() > 0:
-        analytics['avg_commits'] = round(total_commits / repos.count(), 1)
-    else:
-        analytics['avg_commits'] = 0
-    
-    # Language statistics (aggregate all languages used)
-    all_languages = Counter()
-    for repo in repos:
-        if repo.languages:
-            # Add language bytes counts
-            for lang, bytes_count in repo.languages.items():
-                all_languages[lang] += bytes_count
-    
-    # Convert to percentages
-    total_bytes = sum(all_languages.values())
-    language_stats = []
-    if total_bytes > 0:
-        for lang, bytes_count in all_languages.most_common(10):
-            percentage = (bytes_count / total_bytes) * 100
-            language_stats.append({
-                'language': lang,
-                'percentage': round(percentage, 1),
-                'bytes': bytes_count
-            })
-    
-    analytics['language_stats'] = language_stats
-    analytics['total_languages'] = len(all_languages)
-    
-    # Performance score statistics
-    analyzed_repos = repos.filter(is_analyzed=True, performance_score__isnull=False)
-    if analyzed_repos.exists():
-        scores = [repo.performance_score for repo in analyzed_repos]
-        analytics['avg_score'] = round(sum(scores) / len(scores), 1)
-        analytics['max_score'] = max(scores)
-        analytics['min_score'] = min(scores)
-        
-        # Score distribution
-        analytics['excellent'] = len([s for s in scores if s >= 90])
-        analytics['good'] = len([s for s in scores if 75 <= s < 90])
-        analytics['average'] = len([s for s in scores if 60 <= s < 75])
-        analytics['needs_improvement'] = len([s for s in scores if s < 60])
-    else:
-        analytics['avg_score'] = None
-        analytics['max_score'] = None
-        analytics['min_score'] = None
-        analytics['excellent'] = 0
-        analytics['good'] = 0
-        analytics['average'] = 0
-        analytics['needs_improvement'] = 0
-    
     # Top performers
     analytics['top_performers'] = repos.filter(
         is_analyzed=True, 
@@ -91,11 +38,14 @@ def assignment_analytics(request, assignment_id):
     
     # Student list with stats
     students_data = []
-    for repo in repos:
+    student_repos = repos.only(
+        'id', 'student_name', 'commit_count', 'performance_score', 'is_analyzed'
+    ).prefetch_related('language_rows')
+    for repo in student_repos:
         student_data = {
             'name': repo.student_name,
             'commits': repo.commit_count,
-            'languages': list(repo.languages.keys()) if repo.languages else [],
+            'languages': [row.language for row in repo.language_rows.all()],
             'score': repo.performance_score,
             'analyzed': repo.is_analyzed,
             'id': repo.id
@@ -127,23 +77,11 @@ def generate_assignment_report(request, assignment_id):
     repos = StudentRepo.objects.filter(assignment=assignment)
     
     # Calculate all statistics
-    total_students = repos.count()
-    analyzed_repos = repos.filter(is_analyzed=True).count()
-    total_commits = sum(repo.commit_count for repo in repos)
-    
-    # Language statistics
-    all_languages = Counter()
-    for repo in repos:
-        if repo.languages:
-            for lang, bytes_count in repo.languages.items():
-                all_languages[lang] += bytes_count
-    
-    # Performance scores
-    analyzed_repos_with_scores = repos.filter(is_analyzed=True, performance_score__isnull=False)
-    avg_score = None
-    if analyzed_repos_with_scores.exists():
-        scores = [repo.performance_score for repo in analyzed_repos_with_scores]
-        avg_score = round(sum(scores) / len(scores), 1)
+    stats = assignment_stats(assignment)
+    total_students = stats['total_repos']
+    analyzed_repos = stats['analyzed_repos']
+    total_commits = stats['total_commits']
+    avg_score = stats['avg_score']
     
     # Generate report
     report = f"""
@@ -159,7 +97,7 @@ def generate_assignment_report(request, assignment_id):
 - **Total Students:** {total_students}
 - **Repositories Analyzed:** {analyzed_repos} / {total_students}
 - **Total Commits (All Students):** {total_commits}
-- **Average Commits per Student:** {round(total_commits / total_students, 1) if total_students > 0 else 0}
+- **Average Commits per Student:** {stats['avg_commits']}
 - **Average Performance Score:** {avg_score if avg_score else 'Not yet analyzed'}
 
 ---
@@ -169,24 +107,22 @@ def generate_assignment_report(request, assignment_id):
 """
     
     # Add language breakdown
-    total_bytes = sum(all_languages.values())
-    if total_bytes > 0:
-        for lang, bytes_count in all_languages.most_common():
-            percentage = (bytes_count / total_bytes) * 100
-            report += f"- **{lang}:** {percentage:.1f}%\n"
-    else:
+    language_stats = stats['languages']
+    for entry in language_stats:
+        report += f"- **{entry['language']}:** {entry['percentage']:.1f}%\n"
+    if not language_stats:
         report += "- No language data available\n"
     
     report += "\n---\n\n## 👥 Student Details\n\n"
     
     # Add individual student details
-    for repo in repos.order_by('student_name'):
+    for repo in repos.order_by('student_name').prefetch_related('language_rows'):
         report += f"\n### {repo.student_name}\n"
         report += f"- **Repository:** {repo.repo_url}\n"
         report += f"- **Commits:** {repo.commit_count}\n"
         
-        if repo.languages:
-            langs = ', '.join(repo.languages.keys())
+        langs = ', '.join(row.language for row in repo.language_rows.all())
+        if langs:
             report += f"- **Languages:** {langs}\n"
         
         if repo.is_analyzed:
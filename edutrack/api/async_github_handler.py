@@ -0,0 +1,187 @@
+"""
+Async GitHub API Handler for the ASGI deployment
+"""
+import asyncio
+import random
+import threading
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .github_handler import GitHubHandler
+from .rate_limiter import RateLimitDeferred, get_rate_limiter
+
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# httpx clients are bound to the event loop they were created on, so the
+# shared pool is kept per loop and dropped together with it
+_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_async_client():
+    """Return the pooled AsyncClient for the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.GITHUB_POOL_MAXSIZE,
+                    max_keepalive_connections=settings.GITHUB_POOL_MAXSIZE,
+                ),
+                # Requests queue for a free connection instead of failing
+                timeout=httpx.Timeout(settings.GITHUB_REQUEST_TIMEOUT, pool=None),
+            )
+            _clients[loop] = client
+        return client
+
+
+async def close_async_client():
+    """Close the running loop's pooled client, e.g. at the end of a batch job"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+class AsyncGitHubHandler(GitHubHandler):
+    """
+    asyncio counterpart of GitHubHandler
+
+    Same URL parsing, response parsing, ETag cache, rate-limit scheduling
+    and result shapes; fetch_repo_data, fetch_many and probe_freshness are
+    coroutines that share one connection pool per event loop, and the
+    requests session of the sync handler is never opened. Database work
+    (the ETag cache and rate-limit state) runs through sync_to_async.
+    """
+
+    async def fetch_repo_data(self, repo_url):
+        """
+        Fetch comprehensive repository data from GitHub
+        Every endpoint call is issued at once on the event loop
+        """
+        repo_name = self.parse_repo_url(repo_url)
+        if not repo_name:
+            return {"error": "Invalid GitHub URL"}
+
+        part_requests = self._part_requests(repo_name)
+        try:
+            responses = await asyncio.wait_for(
+                asyncio.gather(*(
+                    self._aget(path, params) for path, params, _ in part_requests.values()
+                )),
+                timeout=settings.GITHUB_FETCH_TIMEOUT,
+            )
+            parts = {
+                name: parse(response)
+                for (name, (_, _, parse)), response in zip(part_requests.items(), responses)
+            }
+            return self._build_result(repo_name, parts)
+
+        except RateLimitDeferred as e:
+            return self._deferred_result(repo_name, e)
+
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": f"Timed out fetching {repo_name}",
+                "repo_name": repo_name
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "repo_name": repo_name
+            }
+
+    async def fetch_many(self, repo_urls, batch_size=None):
+        """
+        Fetch many repositories concurrently
+        Returns {repo_url: result} like GitHubHandler.fetch_many
+
+        Authenticated handlers send the GraphQL batches at the same time;
+        without a token every repo is fetched over REST, at most
+        settings.GITHUB_MAX_CONCURRENCY repos at a time.
+        """
+        results, repo_names = self._resolve_repo_urls(repo_urls)
+
+        if not self.authenticated:
+            semaphore = asyncio.Semaphore(settings.GITHUB_MAX_CONCURRENCY)
+
+            async def fetch(repo_url):
+                async with semaphore:
+                    return repo_url, await self.fetch_repo_data(repo_url)
+
+            results.update(await asyncio.gather(*(fetch(url) for url in repo_names)))
+            return results
+
+        batches = self._batches(repo_names, batch_size)
+        outcomes = await asyncio.gather(
+            *(self._aquery_repositories([name for _, name in batch]) for batch in batches),
+            return_exceptions=True,
+        )
+        for batch, nodes in zip(batches, outcomes):
+            results.update(self._batch_results(batch, nodes))
+        return results
+
+    async def probe_freshness(self, repo_url):
+        """Async version of GitHubHandler.probe_freshness"""
+        repo_name = self.parse_repo_url(repo_url)
+        if not repo_name:
+            return {"error": "Invalid GitHub URL"}
+
+        try:
+            response = await self._aget(f"/repos/{repo_name}")
+        except RateLimitDeferred as e:
+            return self._deferred_result(repo_name, e)
+        except Exception as e:
+            return {"success": False, "error": str(e), "repo_name": repo_name}
+        return self._freshness_result(repo_name, response)
+
+    async def _aget(self, path, params=None):
+        """Async version of GitHubHandler._get"""
+        url = self._url(path, params)
+        headers, cached = await sync_to_async(self._conditional_headers)(url)
+
+        if self.rate_limited:
+            # May sleep to pace requests, so keep it off the shared sync thread
+            await sync_to_async(get_rate_limiter("core").acquire, thread_sensitive=False)()
+        response = await self._send("GET", url, headers=headers)
+        await sync_to_async(self._track_rate_limit)(response, "core")
+        return await sync_to_async(self._handle_response)(url, response, cached)
+
+    async def _aquery_repositories(self, repo_names):
+        """Async version of GitHubHandler._query_repositories"""
+        if self.rate_limited:
+            await sync_to_async(get_rate_limiter("graphql").acquire, thread_sensitive=False)()
+        response = await self._send(
+            "POST",
+            f"{self.base_url}/graphql",
+            headers=self.headers,
+            json={"query": self._graphql_query(repo_names)},
+        )
+        await sync_to_async(self._track_rate_limit)(response, "graphql")
+        return self._graphql_data(response)
+
+    async def _send(self, method, url, **kwargs):
+        """Send a request, retrying connection errors and 5xx with jittered backoff"""
+        client = get_async_client()
+        retries = settings.GITHUB_MAX_RETRIES
+        backoff = settings.GITHUB_RETRY_BACKOFF
+
+        for attempt in range(retries + 1):
+            try:
+                response = await client.request(method, url, timeout=self.timeout, **kwargs)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+            await asyncio.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
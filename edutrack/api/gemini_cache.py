@@ -0,0 +1,82 @@
+"""
+Content-addressed cache of Gemini analyses
+"""
+import hashlib
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import GeminiAnalysisCache
+
+
+# Writes from the analysis worker threads take turns, as SQLite cannot
+# upgrade concurrent read transactions to writes
+_write_lock = threading.Lock()
+
+
+def cache_key(model_name, prompt):
+    """sha256 of the model name and the exact prompt text"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _max_age():
+    return timedelta(days=settings.GEMINI_CACHE_MAX_AGE_DAYS)
+
+
+def get_cached_analysis(model_name, prompt):
+    """The stored (analysis, raw_response) for this prompt, or None"""
+    key = cache_key(model_name, prompt)
+    entry = GeminiAnalysisCache.objects.filter(
+        key=key, created_at__gte=timezone.now() - _max_age()
+    ).first()
+    if entry is None:
+        return None
+
+    with _write_lock:
+        GeminiAnalysisCache.objects.filter(pk=entry.pk).update(
+            hits=F("hits") + 1, last_used_at=timezone.now()
+        )
+    return entry.analysis, entry.raw_response
+
+
+def store_analysis(model_name, prompt, analysis, raw_response):
+    """Remember a successful analysis, then evict old and surplus entries"""
+    now = timezone.now()
+    with _write_lock:
+        GeminiAnalysisCache.objects.update_or_create(
+            key=cache_key(model_name, prompt),
+            defaults={
+                "model_name": model_name,
+                "analysis": analysis,
+                "raw_response": raw_response,
+                "created_at": now,
+                "last_used_at": now,
+            },
+        )
+        evict()
+
+
+def evict():
+    """
+    Drop entries past settings.GEMINI_CACHE_MAX_AGE_DAYS, then the least
+    recently used ones beyond settings.GEMINI_CACHE_MAX_ENTRIES
+    Returns the number of entries removed.
+    """
+    removed, _ = GeminiAnalysisCache.objects.filter(
+        created_at__lt=timezone.now() - _max_age()
+    ).delete()
+
+    surplus = GeminiAnalysisCache.objects.order_by("-last_used_at").values_list(
+        "pk", flat=True
+    )[settings.GEMINI_CACHE_MAX_ENTRIES:]
+    stale = list(surplus)
+    if stale:
+        removed += GeminiAnalysisCache.objects.filter(pk__in=stale).delete()[0]
+    return removed
@@ -2,14 +2,121 @@
 Gemini API Handler for AI-based analysis
 """
 import google.generativeai as genai
+from google.generativeai import client as genai_client
 from django.conf import settings
 import json
+import logging
+import re
+import threading
+import time
+
+from .gemini_cache import get_cached_analysis, store_analysis
+from .gemini_limiter import GeminiUnavailable, get_gemini_limiter, is_overload
+from .prompt_builder import ContextBuilder, count_tokens
+
+
+logger = logging.getLogger(__name__)
+
+# Set once this process has warned that structured requests fail
+_structured_fallback_logged = threading.Event()
+
+
+def _log_structured_fallback(error):
+    """
+    Report a structured request that failed and fell back to the text format
+    Warns the first time only: a client library or model without JSON mode
+    fails every request the same way. Later failures are logged at debug.
+    """
+    if _structured_fallback_logged.is_set():
+        logger.debug("Structured Gemini request failed: %s: %s", type(error).__name__, error)
+        return
+    _structured_fallback_logged.set()
+    logger.warning(
+        "Structured Gemini request failed, falling back to the text format "
+        "(google-generativeai >= 0.8 is required; repeats are logged at debug level): %s: %s",
+        type(error).__name__, error,
+    )
+
+# List fields every structured analysis must carry
+BATCH_LIST_FIELDS = ("strengths", "improvements", "recommendations")
+
+# JSON schema Gemini's structured output mode constrains answers to
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "improvements": {"type": "array", "items": {"type": "string"}},
+        "score": {"type": "integer"},
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "strengths", "improvements", "score", "recommendations"],
+}
+BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"repo_id": {"type": "string"}, **ANALYSIS_SCHEMA["properties"]},
+        "required": ["repo_id", *ANALYSIS_SCHEMA["required"]],
+    },
+}
+
+# genai.configure replaces the process-wide client and its transport, so it
+# runs once per API key; models are built once per name and then shared by
+# every handler, worker thread and event loop in the process
+_models = {}
+_configured_key = None
+_models_lock = threading.Lock()
+_model_stats = {
+    "configure_calls": 0,
+    "configure_seconds": 0.0,
+    "models_built": 0,
+    "build_seconds": 0.0,
+    "lookups": 0,
+}
+
+
+def get_model(model_name):
+    """Return the shared GenerativeModel for model_name, creating it on first use"""
+    global _configured_key
+    api_key = settings.GEMINI_API_KEY
+    with _models_lock:
+        _model_stats["lookups"] += 1
+        if api_key != _configured_key:
+            start = time.perf_counter()
+            genai.configure(api_key=api_key)
+            # Build the transport now rather than inside the first analysis
+            genai_client.get_default_generative_client()
+            _model_stats["configure_calls"] += 1
+            _model_stats["configure_seconds"] += time.perf_counter() - start
+            _configured_key = api_key
+            _models.clear()
+
+        model = _models.get(model_name)
+        if model is None:
+            start = time.perf_counter()
+            model = genai.GenerativeModel(model_name)
+            _model_stats["models_built"] += 1
+            _model_stats["build_seconds"] += time.perf_counter() - start
+            _models[model_name] = model
+        return model
+
+
+def get_model_stats():
+    """
+    Construction counters for the shared models
+    Lookups beyond models_built were served without configuring or building
+    """
+    with _models_lock:
+        stats = dict(_model_stats)
+    stats["reused"] = stats["lookups"] - stats["models_built"]
+    return stats
 
 
 class GeminiHandler:
     """Handler for Gemini API operations"""
     
-    def __init__(self, model_name='gemini-2.5-pro'):
+    def __init__(self, model_name='gemini-2.5-pro', use_cache=None, structured=None):
         """
         Initialize Gemini handler with specified model
         Available models:
@@ -17,11 +124,16 @@ class GeminiHandler:
         - gemini-2.5-flash (fast and efficient)
         - gemini-2.0-flash (older but reliable)
         - gemini-pro-latest (automatically uses latest Pro)
+        
+        use_cache reuses stored analyses of identical prompts
+        (default: settings.GEMINI_CACHE_ENABLED); structured asks for JSON
+        matching ANALYSIS_SCHEMA (default: settings.GEMINI_STRUCTURED_OUTPUT)
         """
+        self.use_cache = settings.GEMINI_CACHE_ENABLED if use_cache is None else use_cache
+        self.structured = settings.GEMINI_STRUCTURED_OUTPUT if structured is None else structured
         self.api_key = settings.GEMINI_API_KEY
         if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(model_name)
+            self.model = get_model(model_name)
             self.model_name = model_name
         else:
             self.model = None
@@ -39,67 +151,416 @@ class GeminiHandler:
             }
         
         try:
-            # Prepare the prompt
-            prompt = self._create_analysis_prompt(repo_data)
+            if self.structured:
+                result = self._generate(self._create_structured_prompt(repo_data), structured=True)
+                if result:
+                    return result
+            
+            return self._generate(self._create_analysis_prompt(repo_data), structured=False)
+            
+        except Exception as e:
+            if self._is_backoff(e):
+                return self._deferred_result(e)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def stream_repository(self, repo_data):
+        """
+        Analyze repository data like analyze_repository, yielding the answer as it is written
+        
+        Yields {"type": "chunk", "text": ...} events while the model streams
+        the free-text answer, then one {"type": "result", ...} event carrying
+        analyze_repository's result. A cached answer arrives as one chunk.
+        """
+        if not self.model:
+            yield {"type": "result", "success": False, "error": "Gemini API key not configured"}
+            return
+        
+        prompt = self._create_analysis_prompt(repo_data)
+        try:
+            if self.use_cache:
+                cached = get_cached_analysis(self.model_name, prompt)
+                if cached:
+                    analysis, raw_response = cached
+                    yield {"type": "chunk", "text": raw_response}
+                    yield {"type": "result", "success": True, "analysis": analysis,
+                           "raw_response": raw_response, "cached": True,
+                           **self._token_counts(prompt, raw_response)}
+                    return
+            
+            start = time.perf_counter()
+            parts = []
+            chunk = None
+            with get_gemini_limiter().slot():
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield {"type": "chunk", "text": text}
+            latency_ms = int((time.perf_counter() - start) * 1000)
             
+            response_text = "".join(parts)
+            analysis = self._parse_analysis_response(response_text)
+            if self.use_cache:
+                store_analysis(self.model_name, prompt, analysis, response_text)
+            # The last chunk carries the usage metadata of the whole answer
+            yield {"type": "result", "success": True, "analysis": analysis,
+                   "raw_response": response_text, "latency_ms": latency_ms,
+                   **self._token_counts(prompt, response_text, chunk)}
+        
+        except Exception as e:
+            if self._is_backoff(e):
+                yield {"type": "result", **self._deferred_result(e)}
+            else:
+                yield {"type": "result", "success": False, "error": str(e)}
+    
+    def _generate(self, prompt, structured):
+        """
+        Answer prompt from the cache or the model and parse it
+        Returns None when a structured answer is missing or malformed
+        """
+        # The same prompt to the same model was answered before
+        if self.use_cache:
+            cached = get_cached_analysis(self.model_name, prompt)
+            if cached:
+                analysis, raw_response = cached
+                return {
+                    "success": True,
+                    "analysis": analysis,
+                    "raw_response": raw_response,
+                    "cached": True,
+                    **self._token_counts(prompt, raw_response)
+                }
+        
+        start = time.perf_counter()
+        if structured:
+            try:
+                response = self._call_model(
+                    prompt,
+                    generation_config={
+                        "response_mime_type": "application/json",
+                        "response_schema": ANALYSIS_SCHEMA
+                    }
+                )
+                analysis = self._parse_structured_response(response.text)
+            except Exception as e:
+                if self._is_backoff(e):
+                    raise
+                _log_structured_fallback(e)
+                return None
+            if analysis is None:
+                logger.warning("Structured Gemini answer failed validation; using the text format")
+                return None
+        else:
             # Generate content
-            response = self.model.generate_content(prompt)
+            response = self._call_model(prompt)
             
             # Parse the response
             analysis = self._parse_analysis_response(response.text)
-            
+        
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        
+        if self.use_cache:
+            store_analysis(self.model_name, prompt, analysis, response.text)
+        
+        return {
+            "success": True,
+            "analysis": analysis,
+            "raw_response": response.text,
+            "latency_ms": latency_ms,
+            **self._token_counts(prompt, response.text, response)
+        }
+    
+    def _token_counts(self, prompt, response_text, response=None):
+        """
+        Prompt and response token counts: Gemini's usage metadata when the
+        response carries it, local counts otherwise
+        """
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_token_count", None) or count_tokens(prompt),
+            "response_tokens": (getattr(usage, "candidates_token_count", None)
+                                or count_tokens(response_text))
+        }
+    
+    def _call_model(self, prompt, **kwargs):
+        """generate_content inside the adaptive Gemini concurrency limit"""
+        with get_gemini_limiter().slot():
+            return self.model.generate_content(prompt, **kwargs)
+    
+    def _is_backoff(self, error):
+        """True for errors that mean Gemini is overloaded or backing off"""
+        return isinstance(error, GeminiUnavailable) or is_overload(error)
+    
+    def _deferred_result(self, error):
+        """Result for an analysis postponed until Gemini recovers"""
+        retry_at = getattr(error, "retry_at", None) or get_gemini_limiter().retry_at()
+        return {
+            "success": False,
+            "deferred": True,
+            "retry_at": retry_at.isoformat(),
+            "error": str(error)
+        }
+    
+    def analyze_repositories(self, repos_data, token_budget=None):
+        """
+        Analyze several repositories with as few Gemini calls as possible
+        
+        repos_data maps a repo id to fetch_repo_data output. Repos are packed
+        into prompts of at most token_budget estimated tokens (default:
+        settings.GEMINI_BATCH_TOKEN_BUDGET) that ask for a JSON array keyed
+        by repo id. Repos missing or malformed in the answer are retried on
+        their own with analyze_repository.
+        Returns {repo_id: result}, each result shaped like analyze_repository's
+        """
+        if not self.model:
             return {
-                "success": True,
-                "analysis": analysis,
-                "raw_response": response.text
+                repo_id: {"success": False, "error": "Gemini API key not configured"}
+                for repo_id in repos_data
             }
-            
+        
+        results = {}
+        pending = {}
+        for repo_id, repo_data in repos_data.items():
+            cached = None
+            if self.use_cache:
+                # A single-repo answer saw more context, so it is preferred
+                cached = (get_cached_analysis(self.model_name, self._single_prompt(repo_data))
+                          or get_cached_analysis(self.model_name, self._batch_cache_key(repo_data)))
+            if cached:
+                analysis, raw_response = cached
+                results[repo_id] = {
+                    "success": True,
+                    "analysis": analysis,
+                    "raw_response": raw_response,
+                    "cached": True
+                }
+            else:
+                pending[repo_id] = repo_data
+        
+        for batch in self._pack_batches(pending, token_budget or settings.GEMINI_BATCH_TOKEN_BUDGET):
+            results.update(self._analyze_batch(batch))
+        return results
+    
+    def _pack_batches(self, repos_data, token_budget):
+        """
+        Split repos into groups whose batch prompt fits token_budget
+        A repo too large for any batch gets a group of its own
+        """
+        base = count_tokens(self._create_batch_prompt({}))
+        batches = []
+        current, used = {}, base
+        for repo_id, repo_data in repos_data.items():
+            cost = count_tokens(self._describe_batch_entry(repo_id, repo_data))
+            if current and (used + cost > token_budget
+                            or len(current) >= settings.GEMINI_BATCH_MAX_REPOS):
+                batches.append(current)
+                current, used = {}, base
+            current[repo_id] = repo_data
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _analyze_batch(self, batch):
+        """One Gemini call for every repo in batch; malformed answers are retried alone"""
+        if len(batch) == 1:
+            repo_id, repo_data = next(iter(batch.items()))
+            return {repo_id: self.analyze_repository(repo_data)}
+        
+        prompt = self._create_batch_prompt(batch)
+        start = time.perf_counter()
+        try:
+            response = self._call_model(
+                prompt,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": BATCH_SCHEMA
+                }
+            )
+            analyses = self._parse_batch_response(response.text, batch)
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
+            if self._is_backoff(e):
+                # Retrying each repo alone would only add to the overload
+                return {repo_id: self._deferred_result(e) for repo_id in batch}
+            _log_structured_fallback(e)
+            analyses = {}
+        
+        # The call's cost is shared evenly between the repos it answered
+        if analyses:
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            usage = self._token_counts(prompt, response.text, response)
+            share = {name: count // len(batch) for name, count in usage.items()}
+        
+        results = {}
+        for repo_id, repo_data in batch.items():
+            analysis = analyses.get(repo_id)
+            if analysis is None:
+                results[repo_id] = self.analyze_repository(repo_data)
+                continue
+            
+            if self.use_cache:
+                store_analysis(self.model_name, self._batch_cache_key(repo_data),
+                               analysis, analysis["full_text"])
+            results[repo_id] = {
+                "success": True,
+                "analysis": analysis,
+                "raw_response": analysis["full_text"],
+                "batched": True,
+                "latency_ms": latency_ms,
+                **share
             }
+        return results
     
-    def _create_analysis_prompt(self, repo_data):
+    def _create_batch_prompt(self, batch):
         """
-        Create a detailed prompt for Gemini based on repository data
+        Create one prompt covering every repository in batch
+        """
+        entries = "\n\n".join(
+            self._describe_batch_entry(repo_id, repo_data) for repo_id, repo_data in batch.items()
+        )
+        return f"""
+You are an expert code reviewer and educational mentor. Analyze each of the following students' GitHub repositories independently and provide constructive feedback.
+
+{entries}
+
+---
+
+Respond with a JSON array containing one object per repository, in this form:
+[{{"repo_id": "<id>", "summary": "50-75 words on what the project does and its overall quality", "strengths": ["3-5 positive aspects"], "improvements": ["3-5 specific improvements"], "score": <integer 0-100>, "recommendations": ["2-3 actionable next steps"]}}]
+
+Base the score on code activity and commit frequency, documentation quality (README, comments), best practices (git workflow, code organization) and project completeness.
+Keep your feedback constructive, encouraging, and educational.
+"""
+    
+    def _batch_cache_key(self, repo_data):
+        """
+        What a batch answer is cached under: the repo's batch-budget context
+        Batch entries are built from less context than the single-repo prompt,
+        so their answers never stand in for analyze_repository's.
         """
-        # Extract relevant information
-        commit_count = repo_data.get("commit_count", 0)
-        languages = repo_data.get("languages", {})
-        readme = repo_data.get("readme_content", "")
-        last_commit = repo_data.get("last_commit", {})
-        contributors = repo_data.get("contributors", [])
-        repo_info = repo_data.get("repo_info", {})
-        
-        # Calculate language percentages
-        total_bytes = sum(languages.values()) if languages else 0
-        language_breakdown = ""
-        if total_bytes > 0:
-            for lang, bytes_count in sorted(languages.items(), key=lambda x: x[1], reverse=True):
-                percentage = (bytes_count / total_bytes) * 100
-                language_breakdown += f"- {lang}: {percentage:.1f}%\n"
+        context = self._describe_repository(repo_data, settings.GEMINI_BATCH_CONTEXT_TOKEN_BUDGET)
+        return f"batch entry\n{context}"
+    
+    def _describe_batch_entry(self, repo_id, repo_data):
+        context = self._describe_repository(repo_data, settings.GEMINI_BATCH_CONTEXT_TOKEN_BUDGET)
+        return f"=== Repository {repo_id} ===\n{context}"
+    
+    def _parse_batch_response(self, response_text, batch):
+        """
+        Map a batch answer back to {repo_id: analysis}
+        Entries that are missing or fail validation are left out
+        """
+        items = self._load_json(response_text)
+        if isinstance(items, dict):
+            items = items.get("repositories", [])
         
-        # Format prompt
-        prompt = f"""
+        ids = {str(repo_id): repo_id for repo_id in batch}
+        analyses = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or str(item.get("repo_id")) not in ids:
+                continue
+            analysis = self._validate_analysis(item)
+            if analysis is not None:
+                analyses[ids[str(item["repo_id"])]] = analysis
+        return analyses
+    
+    def _parse_structured_response(self, response_text):
+        """
+        Parse a schema-constrained JSON answer
+        Returns the validated analysis, or None if it is not valid
+        """
+        try:
+            item = self._load_json(response_text)
+        except ValueError:
+            return None
+        if not isinstance(item, dict):
+            return None
+        return self._validate_analysis(item)
+    
+    def _load_json(self, response_text):
+        """json.loads that tolerates a Markdown code fence around the answer"""
+        text = response_text.strip()
+        if text.startswith("```"):
+            text = text.strip("`")
+            text = text[text.index("\n") + 1:] if "\n" in text else text
+        return json.loads(text)
+    
+    def _validate_analysis(self, item):
+        """A structured analysis with full_text rendered, or None if item is malformed"""
+        summary = item.get("summary")
+        score = item.get("score")
+        if not isinstance(summary, str) or not summary.strip():
+            return None
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+            return None
+        analysis = {"summary": summary.strip(), "score": int(round(score))}
+        for field in BATCH_LIST_FIELDS:
+            values = item.get(field)
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                return None
+            analysis[field] = [v.strip() for v in values if v.strip()]
+        analysis["full_text"] = self._format_analysis_text(analysis)
+        return analysis
+    
+    def _format_analysis_text(self, analysis):
+        """Render a structured analysis in the layout of the single-repo answer"""
+        def bullets(values):
+            return "\n".join(f"- {value}" for value in values) or "- None"
+        
+        return f"""**1. Summary:**
+{analysis['summary']}
+
+**2. Strengths:**
+{bullets(analysis['strengths'])}
+
+**3. Areas for Improvement:**
+{bullets(analysis['improvements'])}
+
+**4. Performance Score:** {analysis['score']}/100
+
+**5. Recommendations:**
+{bullets(analysis['recommendations'])}
+"""
+    
+    def _single_prompt(self, repo_data):
+        """The prompt analyze_repository sends first for repo_data"""
+        if self.structured:
+            return self._create_structured_prompt(repo_data)
+        return self._create_analysis_prompt(repo_data)
+    
+    def _create_structured_prompt(self, repo_data):
+        """
+        Create the prompt for a JSON answer matching ANALYSIS_SCHEMA
+        """
+        return f"""
 You are an expert code reviewer and educational mentor. Analyze the following student's GitHub repository and provide constructive feedback.
 
-**Repository Information:**
-- Total Commits: {commit_count}
-- Languages Used:
-{language_breakdown if language_breakdown else "- No language data available"}
+{self._describe_repository(repo_data)}
 
-**Last Commit:**
-- Message: {last_commit.get('message', 'N/A') if last_commit else 'N/A'}
-- Date: {last_commit.get('date', 'N/A') if last_commit else 'N/A'}
+---
 
-**Contributors:** {len(contributors)}
+Respond with a JSON object with these fields:
+- summary: 50-75 words on what this project does and its overall quality
+- strengths: 3-5 positive aspects of this repository
+- improvements: 3-5 specific improvements the student could make
+- score: an integer from 0 to 100 rating the overall quality of the project, considering code activity and commit frequency, documentation quality (README, comments), best practices (git workflow, code organization) and project completeness and functionality
+- recommendations: 2-3 actionable next steps for the student
 
-**README Excerpt:**
-{readme[:500] if readme else "No README available"}
+Keep your feedback constructive, encouraging, and educational.
+"""
+    
+    def _create_analysis_prompt(self, repo_data):
+        """
+        Create a detailed prompt for Gemini based on repository data
+        """
+        # Format prompt
+        prompt = f"""
+You are an expert code reviewer and educational mentor. Analyze the following student's GitHub repository and provide constructive feedback.
 
-**Project Description:**
-{repo_info.get('description', 'No description available')}
+{self._describe_repository(repo_data)}
 
 ---
 
@@ -128,6 +589,13 @@ Keep your feedback constructive, encouraging, and educational.
 """
         return prompt
     
+    def _describe_repository(self, repo_data, budget=None):
+        """
+        The repository facts shared by the single and batch prompts, packed
+        into budget tokens (default: settings.GEMINI_CONTEXT_TOKEN_BUDGET)
+        """
+        return ContextBuilder(repo_data, budget or settings.GEMINI_CONTEXT_TOKEN_BUDGET).build()
+    
     def _parse_analysis_response(self, response_text):
         """
         Parse Gemini's response into structured data
@@ -164,14 +632,13 @@ Keep your feedback constructive, encouraging, and educational.
                     # Check if this looks like the score section (avoid false positives)
                     if any(keyword in section_lower for keyword in ["performance score", "score (0-100)", "score:", "rating"]):
                         score_text = sections[i + 1].strip()
-                        print(f"[SCORE DEBUG] Found score section: {score_text[:200]}")  # Debug log
+                        logger.debug("Found score section: %s", score_text[:200])
                         # Try to extract number - look for patterns like "85/100", "85", or "Score: 85"
-                        import re
                         # First try to find X/100 pattern
                         score_match = re.search(r'(\d+)\s*/\s*100', score_text)
                         if score_match:
                             analysis["score"] = int(score_match.group(1))
-                            print(f"[SCORE DEBUG] ✓ Extracted score from X/100 pattern: {analysis['score']}")
+                            logger.debug("Extracted score from X/100 pattern: %s", analysis["score"])
                         else:
                             # Try to find "Score: XX" or similar patterns
                             score_match = re.search(r'(?:score|rating)[\s:]+(\d{1,3})', score_text, re.IGNORECASE)
@@ -179,9 +646,9 @@ Keep your feedback constructive, encouraging, and educational.
                                 score_value = int(score_match.group(1))
                                 if 0 <= score_value <= 100:
                                     analysis["score"] = score_value
-                                    print(f"[SCORE DEBUG] ✓ Extracted score from 'Score: XX' pattern: {score_value}")
+                                    logger.debug("Extracted score from 'Score: XX' pattern: %s", score_value)
                                 else:
-                                    print(f"[SCORE DEBUG] ✗ Score {score_value} out of range")
+                                    logger.debug("Score %s out of range", score_value)
                             else:
                                 # Look for standalone number (2-3 digits) as last resort
                                 score_match = re.search(r'\b(\d{2,3})\b', score_text)
@@ -190,9 +657,9 @@ Keep your feedback constructive, encouraging, and educational.
                                     # Validate it's in reasonable range
                                     if 0 <= score_value <= 100:
                                         analysis["score"] = score_value
-                                        print(f"[SCORE DEBUG] ✓ Extracted score from standalone number: {score_value}")
+                                        logger.debug("Extracted score from standalone number: %s", score_value)
                                     else:
-                                        print(f"[SCORE DEBUG] ✗ Score {score_value} out of range")
+                                        logger.debug("Score %s out of range", score_value)
                 
                 elif "recommendation" in section_lower and i + 1 < len(sections):
                     recommendations_text = sections[i + 1].strip()
@@ -200,13 +667,12 @@ Keep your feedback constructive, encouraging, and educational.
             
             # If we still don't have a score, try one more time with the full text
             if analysis["score"] is None:
-                print(f"[SCORE DEBUG] No score found in sections, trying full text extraction...")
-                import re
+                logger.debug("No score found in sections, trying full text extraction")
                 # Try to find X/100 anywhere in the text
                 score_match = re.search(r'(\d+)\s*/\s*100', response_text)
                 if score_match:
                     analysis["score"] = int(score_match.group(1))
-                    print(f"[SCORE DEBUG] ✓ Extracted score from full text X/100: {analysis['score']}")
+                    logger.debug("Extracted score from full text X/100: %s", analysis["score"])
                 else:
                     # Look for patterns like "Performance Score: 85" or "Score: 85"
                     score_match = re.search(r'(?:performance\s+)?score[\s:]+(\d{1,3})', response_text, re.IGNORECASE)
@@ -214,18 +680,18 @@ Keep your feedback constructive, encouraging, and educational.
                         score_value = int(score_match.group(1))
                         if 0 <= score_value <= 100:
                             analysis["score"] = score_value
-                            print(f"[SCORE DEBUG] ✓ Extracted score from full text pattern: {score_value}")
+                            logger.debug("Extracted score from full text pattern: %s", score_value)
             
             # Final validation
             if analysis["score"] is not None:
-                print(f"[SCORE DEBUG] ✅ Final score: {analysis['score']}")
+                logger.debug("Final score: %s", analysis["score"])
             else:
-                print(f"[SCORE DEBUG] ❌ No score could be extracted from response")
+                logger.warning("No score could be extracted from the Gemini response")
         
         except Exception as e:
             # If parsing fails, just return the full text
             analysis["parse_error"] = str(e)
-            print(f"[SCORE DEBUG] ❌ Parsing error: {str(e)}")
+            logger.warning("Could not parse the Gemini response: %s", e)
         
         return analysis
     
@@ -238,7 +704,7 @@ Keep your feedback constructive, encouraging, and educational.
         
         try:
             prompt = f"Summarize the following text in {max_words} words or less:\n\n{text}"
-            response = self.model.generate_content(prompt)
+            response = self._call_model(prompt)
             return response.text
         except Exception as e:
             return f"Error generating summary: {str(e)}"
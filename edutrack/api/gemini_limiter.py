@@ -0,0 +1,183 @@
+"""
+Adaptive concurrency limit and circuit breaker for Gemini calls
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from google.api_core import exceptions as google_exceptions
+
+
+# Errors that mean Gemini is over quota or overloaded, not that the request was bad
+OVERLOAD_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    TimeoutError,
+)
+
+logger = logging.getLogger(__name__)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+class GeminiUnavailable(Exception):
+    """Gemini is backing off; the analysis should be retried at retry_at"""
+
+    def __init__(self, retry_at, reason):
+        self.retry_at = retry_at
+        super().__init__(f"Gemini {reason}; retry after {retry_at.isoformat()}")
+
+
+def get_gemini_limiter():
+    """Return the process-wide Gemini limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveGeminiLimiter()
+        return _limiter
+
+
+def is_overload(error):
+    return isinstance(error, OVERLOAD_ERRORS)
+
+
+class AdaptiveGeminiLimiter:
+    """
+    AIMD limit on concurrent Gemini calls, with a circuit breaker
+
+    The limit starts at settings.ANALYSIS_GEMINI_CONCURRENCY. Each call
+    answered within settings.GEMINI_LATENCY_TARGET_MS raises it by 1/limit
+    (about one per round of calls); a 429, 503 or timeout multiplies it by
+    settings.GEMINI_BACKOFF_FACTOR, a slow answer by the gentler
+    SLOW_FACTOR. It stays between 1 and ANALYSIS_GEMINI_CONCURRENCY.
+
+    settings.GEMINI_CIRCUIT_FAILURES overloads in a row open the circuit:
+    every call fails fast with GeminiUnavailable for
+    settings.GEMINI_CIRCUIT_COOLDOWN seconds, doubling (up to 32 times) with
+    each trip that follows. Then a single probe call goes through (half open); its success
+    closes the circuit, another overload reopens it.
+
+    State is per process, like the call latencies it reacts to.
+    """
+
+    SLOW_FACTOR = 0.9
+
+    def __init__(self):
+        self.max_limit = settings.ANALYSIS_GEMINI_CONCURRENCY
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.open_until = None
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold a call slot while the body runs, reporting its outcome
+        Raises GeminiUnavailable when the circuit is open or no slot frees
+        up within settings.GEMINI_LIMITER_MAX_WAIT seconds.
+        """
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            # Includes GeneratorExit when a streaming consumer stops early
+            self.release("overload" if is_overload(e) else "error")
+            raise
+        self.release("ok", latency_ms=(time.perf_counter() - start) * 1000)
+
+    def acquire(self):
+        deadline = time.monotonic() + settings.GEMINI_LIMITER_MAX_WAIT
+        with self._condition:
+            while True:
+                self._check_circuit()
+                if self.in_flight < max(int(self.limit), 1):
+                    self.in_flight += 1
+                    if self.state == "half_open":
+                        self.state = "probing"
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise GeminiUnavailable(
+                        timezone.now() + timedelta(seconds=settings.GEMINI_CIRCUIT_COOLDOWN),
+                        "is at its concurrency limit",
+                    )
+                self._condition.wait(remaining)
+
+    def release(self, outcome, latency_ms=None):
+        """
+        Free a slot and adapt to how the call went: outcome is 'ok',
+        'overload' (429, 503, timeout) or 'error' (any other failure, which
+        says nothing about load)
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if outcome == "overload":
+                self.limit = max(self.limit * settings.GEMINI_BACKOFF_FACTOR, 1.0)
+                if self.state == "probing":
+                    self._open()
+                elif self.state == "closed":
+                    self.failures += 1
+                    if self.failures >= settings.GEMINI_CIRCUIT_FAILURES:
+                        self._open()
+            else:
+                if self.state == "probing":
+                    self.state = "closed"
+                    self.trips = 0
+                self.failures = 0
+                if outcome == "ok":
+                    if latency_ms > settings.GEMINI_LATENCY_TARGET_MS:
+                        self.limit = max(self.limit * self.SLOW_FACTOR, 1.0)
+                    else:
+                        self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+            self._condition.notify_all()
+
+    def retry_at(self):
+        """When a call postponed now should be tried again"""
+        with self._condition:
+            if self.state == "open":
+                return self.open_until
+            return timezone.now() + timedelta(seconds=settings.GEMINI_CIRCUIT_COOLDOWN)
+
+    def status(self):
+        """Current limit, calls in flight and circuit state"""
+        with self._condition:
+            return {
+                "limit": round(self.limit, 2),
+                "max_limit": self.max_limit,
+                "in_flight": self.in_flight,
+                "state": self.state,
+                "failures": self.failures,
+                "open_until": self.open_until.isoformat() if self.open_until else None,
+            }
+
+    def _open(self):
+        cooldown = settings.GEMINI_CIRCUIT_COOLDOWN * 2 ** min(self.trips, 5)
+        self.trips += 1
+        self.failures = 0
+        self.state = "open"
+        self.open_until = timezone.now() + timedelta(seconds=cooldown)
+        logger.warning("Gemini circuit open for %ss; concurrency limit %.2f", cooldown, self.limit)
+
+    def _check_circuit(self):
+        """Raise GeminiUnavailable unless a call may start now"""
+        if self.state == "open":
+            if timezone.now() < self.open_until:
+                raise GeminiUnavailable(self.open_until, "circuit is open")
+            self.state = "half_open"
+            self.open_until = None
+        if self.state == "probing":
+            raise GeminiUnavailable(
+                timezone.now() + timedelta(seconds=settings.GEMINI_CIRCUIT_COOLDOWN),
+                "circuit is half open",
+            )
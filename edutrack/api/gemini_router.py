@@ -0,0 +1,105 @@
+"""
+Tiered Gemini model routing: the fast model first, the pro model on demand
+"""
+from django.conf import settings
+
+from .gemini_handler import GeminiHandler
+
+
+class TieredGeminiRouter:
+    """
+    Sends analyses to settings.GEMINI_FAST_MODEL and escalates to
+    settings.GEMINI_PRO_MODEL when a rule fires:
+
+    - large repository: over GEMINI_LARGE_REPO_COMMITS commits or
+      GEMINI_LARGE_REPO_BYTES of code (these skip the fast model)
+    - the fast model failed or its answer could not be parsed
+    - no score could be extracted
+    - a borderline score, between GEMINI_BORDERLINE_SCORE_MIN and _MAX
+
+    Same interface as GeminiHandler. Every result also carries tier
+    ('fast' or 'pro'), model_name and escalation_reason.
+    """
+
+    def __init__(self):
+        self.fast = GeminiHandler(settings.GEMINI_FAST_MODEL)
+        self.pro = GeminiHandler(settings.GEMINI_PRO_MODEL)
+
+    def analyze_repository(self, repo_data):
+        """Analyze one repository, escalating when a rule fires"""
+        reason = self.size_reason(repo_data)
+        if reason:
+            return self._tag(self.pro.analyze_repository(repo_data), 'pro', reason)
+
+        result = self.fast.analyze_repository(repo_data)
+        reason = self.escalation_reason(result)
+        if reason is None:
+            return self._tag(result, 'fast', '')
+        return self._tag(self.pro.analyze_repository(repo_data), 'pro', reason)
+
+    def analyze_repositories(self, repos_data, token_budget=None):
+        """
+        Batch version: the fast model analyzes in batches, then every repo a
+        rule escalates is analyzed again by the pro model, also in batches
+        """
+        results = {}
+        escalated = {}
+        fast_data = {}
+        for repo_id, repo_data in repos_data.items():
+            reason = self.size_reason(repo_data)
+            if reason:
+                escalated[repo_id] = reason
+            else:
+                fast_data[repo_id] = repo_data
+
+        for repo_id, result in self.fast.analyze_repositories(fast_data, token_budget).items():
+            reason = self.escalation_reason(result)
+            if reason is None:
+                results[repo_id] = self._tag(result, 'fast', '')
+            else:
+                escalated[repo_id] = reason
+
+        pro_data = {repo_id: repos_data[repo_id] for repo_id in escalated}
+        for repo_id, result in self.pro.analyze_repositories(pro_data, token_budget).items():
+            results[repo_id] = self._tag(result, 'pro', escalated[repo_id])
+        return results
+
+    def stream_repository(self, repo_data):
+        """
+        Streamed analyses go to the pro model: text already shown to the
+        teacher cannot be replaced by an escalated answer
+        """
+        for event in self.pro.stream_repository(repo_data):
+            if event['type'] == 'result':
+                event = self._tag(event, 'pro', 'streamed')
+            yield event
+
+    def size_reason(self, repo_data):
+        """Escalation reason from the repository's size alone, or None"""
+        if repo_data.get('commit_count', 0) >= settings.GEMINI_LARGE_REPO_COMMITS:
+            return 'large repository (commits)'
+        if sum((repo_data.get('languages') or {}).values()) >= settings.GEMINI_LARGE_REPO_BYTES:
+            return 'large repository (code size)'
+        return None
+
+    def escalation_reason(self, result):
+        """Why a fast-model result needs the pro model, or None if it stands"""
+        if result.get('deferred'):
+            return None  # Gemini is backing off; the whole analysis is retried later
+        if not result.get('success'):
+            if not self.pro.model:
+                return None  # nothing to escalate to
+            return 'fast model failed'
+        analysis = result.get('analysis', {})
+        if analysis.get('parse_error'):
+            return 'parse failure'
+        score = analysis.get('score')
+        if score is None:
+            return 'no score'
+        if settings.GEMINI_BORDERLINE_SCORE_MIN <= score <= settings.GEMINI_BORDERLINE_SCORE_MAX:
+            return 'borderline score'
+        return None
+
+    def _tag(self, result, tier, reason):
+        handler = self.pro if tier == 'pro' else self.fast
+        return dict(result, tier=tier, model_name=handler.model_name or '', escalation_reason=reason)
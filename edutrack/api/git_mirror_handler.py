@@ -0,0 +1,281 @@
+"""
+Git mirror ingestion backend: repository data from local bare mirrors
+"""
+import base64
+import hashlib
+import os
+import subprocess
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+
+# File extension -> language, for the byte counts GitHub's /languages reports
+LANGUAGE_EXTENSIONS = {
+    ".py": "Python", ".pyw": "Python", ".ipynb": "Jupyter Notebook",
+    ".js": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript", ".jsx": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".html": "HTML", ".htm": "HTML", ".css": "CSS", ".scss": "SCSS", ".sass": "Sass",
+    ".vue": "Vue", ".svelte": "Svelte",
+    ".java": "Java", ".kt": "Kotlin", ".kts": "Kotlin", ".scala": "Scala", ".groovy": "Groovy",
+    ".c": "C", ".h": "C", ".cpp": "C++", ".cc": "C++", ".cxx": "C++", ".hpp": "C++",
+    ".cs": "C#", ".go": "Go", ".rs": "Rust", ".swift": "Swift", ".m": "Objective-C",
+    ".rb": "Ruby", ".php": "PHP", ".pl": "Perl", ".lua": "Lua", ".r": "R", ".R": "R",
+    ".dart": "Dart", ".ex": "Elixir", ".exs": "Elixir", ".erl": "Erlang", ".hs": "Haskell",
+    ".clj": "Clojure", ".jl": "Julia", ".sql": "SQL",
+    ".sh": "Shell", ".bash": "Shell", ".zsh": "Shell", ".ps1": "PowerShell",
+    ".dockerfile": "Dockerfile", ".tex": "TeX", ".mat": "MATLAB",
+}
+LANGUAGE_FILENAMES = {"Dockerfile": "Dockerfile", "Makefile": "Makefile"}
+
+# Paths GitHub's language statistics treat as vendored or generated
+VENDORED_PREFIXES = ("node_modules/", "vendor/", "dist/", "build/", ".venv/", "venv/")
+
+README_NAMES = ("readme.md", "readme.rst", "readme.txt", "readme")
+
+_mirror_locks = {}
+_mirror_locks_lock = threading.Lock()
+
+
+def _mirror_lock(path):
+    """One lock per mirror directory so concurrent fetches do not race a clone"""
+    with _mirror_locks_lock:
+        return _mirror_locks.setdefault(str(path), threading.Lock())
+
+
+class GitCommandError(Exception):
+    """A git subprocess exited with an error"""
+
+
+class GitMirrorHandler:
+    """
+    Ingestion backend that keeps bare mirrors of student repos on local disk
+
+    The first fetch clones a mirror; every later fetch is one incremental
+    `git fetch`, and all statistics come from the local object store, so
+    there are no per-endpoint API calls and no rate limit. Accepts GitHub
+    URLs as well as file:// remotes. Results have the fetch_repo_data shape
+    of GitHubHandler.
+    """
+
+    def __init__(self, mirror_root=None):
+        self.mirror_root = Path(mirror_root or settings.GIT_MIRROR_ROOT)
+        self.token = settings.GITHUB_TOKEN
+        self.authenticated = bool(self.token and self.token != 'your_github_token_here')
+        self.timeout = settings.GIT_MIRROR_TIMEOUT
+
+    def parse_repo_url(self, repo_url):
+        """
+        Name of the repo behind repo_url
+        GitHub URLs give owner/repo; file:// remotes give their directory name
+        """
+        if repo_url.startswith("file://"):
+            path = urlparse(repo_url).path.rstrip("/")
+            name = os.path.basename(path)
+            return name[:-4] if name.endswith(".git") else name or None
+        if "github.com/" in repo_url:
+            parts = repo_url.split("github.com/")[-1].strip("/").split("/")
+            if len(parts) >= 2:
+                name = parts[1][:-4] if parts[1].endswith(".git") else parts[1]
+                return f"{parts[0]}/{name}"
+        return None
+
+    def mirror_path(self, repo_url):
+        """Where the bare mirror for repo_url lives"""
+        if repo_url.startswith("file://"):
+            digest = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:10]
+            return self.mirror_root / "local" / f"{self.parse_repo_url(repo_url)}-{digest}.git"
+        return self.mirror_root / "github" / f"{self.parse_repo_url(repo_url)}.git"
+
+    def _remote_url(self, repo_url):
+        if repo_url.startswith("file://"):
+            return repo_url
+        return f"https://github.com/{self.parse_repo_url(repo_url)}.git"
+
+    def _auth_env(self):
+        """
+        The token as an HTTP header for github.com, passed through git's environment
+        Kept out of remote URLs so it never reaches the mirror's config on disk
+        or the git command line.
+        """
+        if not self.authenticated:
+            return {}
+        credentials = base64.b64encode(f"x-access-token:{self.token}".encode("utf-8"))
+        header = f"Authorization: Basic {credentials.decode('ascii')}"
+        return {
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.https://github.com/.extraHeader",
+            "GIT_CONFIG_VALUE_0": header,
+        }
+
+    def _git(self, *args, cwd=None):
+        """Run git and return its stdout"""
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0", **self._auth_env())
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=self.timeout,
+        )
+        if result.returncode != 0:
+            message = result.stderr.strip() or f"git {args[0]} failed"
+            if self.token:
+                message = message.replace(self.token, "***")
+            raise GitCommandError(message)
+        return result.stdout
+
+    def sync_mirror(self, repo_url):
+        """Clone the mirror on first use, otherwise fetch only what is new"""
+        path = self.mirror_path(repo_url)
+        with _mirror_lock(path):
+            if (path / "HEAD").exists():
+                # Also rewrites remotes of older mirrors that embedded the token
+                self._git("remote", "set-url", "origin", self._remote_url(repo_url), cwd=path)
+                self._git("fetch", "--prune", "--quiet", "origin", cwd=path)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._git("clone", "--mirror", "--quiet", self._remote_url(repo_url), str(path))
+        return path
+
+    def fetch_repo_data(self, repo_url):
+        """
+        Sync the mirror and compute repository data from it
+        Returns the same dictionary shape as GitHubHandler.fetch_repo_data
+        """
+        repo_name = self.parse_repo_url(repo_url)
+        if not repo_name:
+            return {"error": "Invalid repository URL"}
+
+        try:
+            path = self.sync_mirror(repo_url)
+            if not self._has_commits(path):
+                return self._build_result(repo_name, path, empty=True)
+            return self._build_result(repo_name, path)
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "repo_name": repo_name
+            }
+
+    def probe_freshness(self, repo_url):
+        """Cheap change check: the remote HEAD commit via `git ls-remote`"""
+        repo_name = self.parse_repo_url(repo_url)
+        if not repo_name:
+            return {"error": "Invalid repository URL"}
+        try:
+            output = self._git("ls-remote", self._remote_url(repo_url), "HEAD")
+        except Exception as e:
+            return {"success": False, "error": str(e), "repo_name": repo_name}
+        head_sha = output.split()[0] if output.strip() else ""
+        return {"success": True, "repo_name": repo_name, "head_sha": head_sha}
+
+    def _has_commits(self, path):
+        try:
+            self._git("rev-parse", "--verify", "--quiet", "HEAD^{commit}", cwd=path)
+            return True
+        except GitCommandError:
+            return False
+
+    def _build_result(self, repo_name, path, empty=False):
+        commits = [] if empty else self._get_commits(path)
+        return {
+            "success": True,
+            "repo_name": repo_name,
+            "commit_count": 0 if empty else int(self._git("rev-list", "--count", "HEAD", cwd=path)),
+            "commits": commits,  # Last 10 commits
+            "last_commit": commits[0] if commits else None,
+            "languages": {} if empty else self._get_languages(path),
+            "readme_content": "" if empty else self._get_readme(path),
+            "contributors": [] if empty else self._get_contributors(path),
+            "repo_info": self._get_repo_info(repo_name, path, commits),
+            "authenticated": self.authenticated,
+            "fetched_at": datetime.now().isoformat()
+        }
+
+    def _get_commits(self, path, limit=10):
+        """The most recent commits on HEAD"""
+        output = self._git("log", f"-{limit}", "--format=%H%x1f%aI%x1f%an%x1f%B%x1e", "HEAD",
+                           cwd=path)
+        commits = []
+        for record in output.split("\x1e"):
+            record = record.strip("\n")
+            if not record:
+                continue
+            sha, date, author, message = record.split("\x1f", 3)
+            commits.append({
+                "sha": sha,
+                "message": message.strip(),
+                "date": date,
+                "author": author
+            })
+        return commits
+
+    def _get_languages(self, path):
+        """Bytes per language over every file in the HEAD tree"""
+        languages = Counter()
+        output = self._git("ls-tree", "-r", "-l", "-z", "HEAD", cwd=path)
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            meta, file_path = entry.split("\t", 1)
+            _mode, object_type, _sha, size = meta.split()
+            if object_type != "blob" or size == "-" or file_path.startswith(VENDORED_PREFIXES):
+                continue
+            filename = os.path.basename(file_path)
+            language = (LANGUAGE_FILENAMES.get(filename)
+                        or LANGUAGE_EXTENSIONS.get(os.path.splitext(filename)[1])
+                        or LANGUAGE_EXTENSIONS.get(os.path.splitext(filename)[1].lower()))
+            if language:
+                languages[language] += int(size)
+        return dict(languages.most_common())
+
+    def _get_readme(self, path):
+        """README at the root of the HEAD tree"""
+        names = self._git("ls-tree", "--name-only", "HEAD", cwd=path).splitlines()
+        by_lower = {name.lower(): name for name in names}
+        for candidate in README_NAMES:
+            if candidate in by_lower:
+                content = self._git("show", f"HEAD:{by_lower[candidate]}", cwd=path)
+                return content
+        return ""
+
+    def _get_contributors(self, path):
+        """Top 10 commit authors on HEAD"""
+        output = self._git("shortlog", "-s", "-n", "HEAD", cwd=path)
+        contributors = []
+        for line in output.splitlines()[:10]:
+            count, _, name = line.strip().partition("\t")
+            contributors.append({"login": name, "contributions": int(count)})
+        return contributors
+
+    def _get_repo_info(self, repo_name, path, commits):
+        """Repository metadata available from the mirror itself"""
+        try:
+            default_branch = self._git("symbolic-ref", "--short", "HEAD", cwd=path).strip()
+        except GitCommandError:
+            default_branch = "main"
+        created_at = None
+        if commits:
+            roots = self._git("rev-list", "--max-parents=0", "HEAD", cwd=path).split()
+            if roots:
+                created_at = self._git("show", "-s", "--format=%aI", roots[-1], cwd=path).strip()
+        last_date = commits[0]["date"] if commits else None
+        return {
+            "name": repo_name.split("/")[-1],
+            "description": None,
+            "created_at": created_at,
+            "updated_at": last_date,
+            "pushed_at": last_date,
+            "stars": None,
+            "forks": None,
+            "default_branch": default_branch
+        }
@@ -3,8 +3,142 @@ GitHub API Handler for fetching repository data
 """
 import requests
 import base64
-from datetime import datetime
+import json
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from django.conf import settings
+from urllib.parse import parse_qs, urlparse
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import parse_header_links
+from urllib3.util.retry import Retry
+
+from ..models import GitHubResponseCache
+from .rate_limiter import RateLimitDeferred, get_rate_limiter
+
+
+# Status code, decoded JSON body and headers of one API call
+APIResponse = namedtuple("APIResponse", ["status_code", "data", "headers"])
+
+
+# Fields fetched per repository in a batched GraphQL query; each repository
+# becomes one aliased `repository(...)` selection in the same request
+GRAPHQL_REPO_FIELDS = """
+    name
+    description
+    createdAt
+    updatedAt
+    pushedAt
+    stargazerCount
+    forkCount
+    defaultBranchRef {
+      name
+      target {
+        ... on Commit {
+          history(first: 10) {
+            totalCount
+            nodes {
+              oid
+              message
+              committedDate
+              author { name user { login } }
+            }
+          }
+        }
+      }
+    }
+    languages(first: 20, orderBy: {field: SIZE, direction: DESC}) {
+      edges { size node { name } }
+    }
+    readmeMd: object(expression: "HEAD:README.md") { ... on Blob { text } }
+    readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { text } }
+    readmePlain: object(expression: "HEAD:README") { ... on Blob { text } }
+"""
+
+
+# Shared by every handler so the concurrency cap applies process-wide,
+# not per repository being fetched
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the process-wide thread pool used for concurrent fetches"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.GITHUB_MAX_CONCURRENCY,
+                thread_name_prefix="github-fetch",
+            )
+        return _executor
+
+
+# One keep-alive session per process: every handler reuses its pooled
+# connections instead of paying a TCP+TLS handshake on each call
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_retry():
+    """Retry connection errors and 5xx responses with jittered exponential backoff"""
+    options = dict(
+        total=settings.GITHUB_MAX_RETRIES,
+        backoff_factor=settings.GITHUB_RETRY_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        # GraphQL queries are POSTed but read-only, so safe to retry
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    try:
+        return Retry(backoff_jitter=settings.GITHUB_RETRY_BACKOFF, **options)
+    except TypeError:
+        # urllib3 < 2 has no jitter support
+        return Retry(**options)
+
+
+def get_session():
+    """Return the process-wide pooled requests session for GitHub calls"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(
+                pool_connections=settings.GITHUB_POOL_CONNECTIONS,
+                pool_maxsize=settings.GITHUB_POOL_MAXSIZE,
+                max_retries=_build_retry(),
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_pool_stats():
+    """
+    Connection counters for the shared session
+    Returns connections opened, requests sent and how many of those
+    requests reused an already-open connection
+    """
+    opened = 0
+    sent = 0
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+    return {
+        "connections_opened": opened,
+        "requests_sent": sent,
+        "connections_reused": max(sent - opened, 0),
+    }
 
 
 class GitHubHandler:
@@ -16,9 +150,25 @@ class GitHubHandler:
     - WITH TOKEN: 5,000 requests/hour (public + private repos)
     """
     
-    def __init__(self):
+    def __init__(self, concurrent=None, timeout=None, conditional=None, rate_limited=None):
+        """
+        concurrent:  issue the independent endpoint requests in parallel
+                     (defaults to settings.GITHUB_CONCURRENT_FETCH)
+        timeout:     per-request timeout in seconds
+                     (defaults to settings.GITHUB_REQUEST_TIMEOUT)
+        conditional: send ETag/Last-Modified validators and replay cached
+                     bodies on 304 (defaults to settings.GITHUB_CONDITIONAL_REQUESTS)
+        rate_limited: pace requests through the shared rate-limit scheduler
+                     (defaults to settings.GITHUB_RATE_LIMIT_ENABLED)
+        """
         self.token = settings.GITHUB_TOKEN
-        self.base_url = "https://api.github.com"
+        self.base_url = settings.GITHUB_API_URL.rstrip("/")
+        self.concurrent = settings.GITHUB_CONCURRENT_FETCH if concurrent is None else concurrent
+        self.timeout = timeout or settings.GITHUB_REQUEST_TIMEOUT
+        self.conditional = (settings.GITHUB_CONDITIONAL_REQUESTS
+                            if conditional is None else conditional)
+        self.rate_limited = (settings.GITHUB_RATE_LIMIT_ENABLED
+                             if rate_limited is None else rate_limited)
         
         # Set headers based on whether token is available
         if self.token and self.token != 'your_github_token_here':
@@ -33,6 +183,11 @@ class GitHubHandler:
             }
             self.authenticated = False
     
+    @property
+    def session(self):
+        """The process-wide pooled session, opened by the first handler that sends a request"""
+        return get_session()
+    
     def parse_repo_url(self, repo_url):
         """
         Extract owner and repo name from GitHub URL
@@ -56,35 +211,18 @@ class GitHubHandler:
             return {"error": "Invalid GitHub URL"}
         
         try:
-            # Fetch basic repo info
-            repo_info = self._get_repo_info(repo_name)
-            
-            # Fetch commits
-            commits = self._get_commits(repo_name)
-            
-            # Fetch languages
-            languages = self._get_languages(repo_name)
-            
-            # Fetch README
-            readme = self._get_readme(repo_name)
-            
-            # Fetch contributors
-            contributors = self._get_contributors(repo_name)
-            
-            return {
-                "success": True,
-                "repo_name": repo_name,
-                "commit_count": len(commits),
-                "commits": commits[:10],  # Last 10 commits
-                "last_commit": commits[0] if commits else None,
-                "languages": languages,
-                "readme_content": readme,
-                "contributors": contributors,
-                "repo_info": repo_info,
-                "authenticated": self.authenticated,
-                "fetched_at": datetime.now().isoformat()
-            }
-            
+            if self.concurrent:
+                parts = self._fetch_parts_concurrently(repo_name)
+            else:
+                parts = {
+                    name: self._fetch_part(path, params, parse)
+                    for name, (path, params, parse) in self._part_requests(repo_name).items()
+                }
+            return self._build_result(repo_name, parts)
+        
+        except RateLimitDeferred as e:
+            return self._deferred_result(repo_name, e)
+        
         except Exception as e:
             return {
                 "success": False,
@@ -92,31 +230,419 @@ class GitHubHandler:
                 "repo_name": repo_name
             }
     
-    def _get_repo_info(self, repo_name):
-        """Get basic repository information"""
-        url = f"{self.base_url}/repos/{repo_name}"
-        response = requests.get(url, headers=self.headers)
+    def probe_freshness(self, repo_url):
+        """
+        Cheap change check: one request for the repository's pushed_at
+        With conditional requests on, an unchanged repo costs a free 304
+        """
+        repo_name = self.parse_repo_url(repo_url)
+        if not repo_name:
+            return {"error": "Invalid GitHub URL"}
+        
+        try:
+            response = self._get(f"/repos/{repo_name}")
+        except RateLimitDeferred as e:
+            return self._deferred_result(repo_name, e)
+        except Exception as e:
+            return {"success": False, "error": str(e), "repo_name": repo_name}
+        return self._freshness_result(repo_name, response)
+    
+    def _freshness_result(self, repo_name, response):
+        """The probe_freshness result for the /repos/{repo_name} response"""
+        repo_info = self._parse_repo_info(response)
+        if not repo_info:
+            return {"success": False, "error": "Repository not found", "repo_name": repo_name}
+        return {
+            "success": True,
+            "repo_name": repo_name,
+            "pushed_at": repo_info.get("pushed_at"),
+            "default_branch": repo_info.get("default_branch")
+        }
+    
+    def projected_completion(self, repo_count):
+        """Estimate when fetch_repo_data will have finished for repo_count repos"""
+        return get_rate_limiter("core").projected_completion(
+            repo_count * len(self._part_requests(""))
+        )
+    
+    def budget_status(self, repo_count):
+        """The shared core budget, plus when fetching repo_count more repos would be done"""
+        return get_rate_limiter("core").status(repo_count * len(self._part_requests("")))
+    
+    def _part_requests(self, repo_name):
+        """
+        The independent endpoint calls that make up fetch_repo_data
+        Maps each result part to its (path, params, parser)
+        """
+        return {
+            "repo_info": (f"/repos/{repo_name}", None, self._parse_repo_info),
+            "commit_count": (f"/repos/{repo_name}/commits", {"per_page": 1},
+                             self._parse_commit_count),
+            "commits": (f"/repos/{repo_name}/commits", {"per_page": 10}, self._parse_commits),
+            "languages": (f"/repos/{repo_name}/languages", None, self._parse_languages),
+            "readme": (f"/repos/{repo_name}/readme", None, self._parse_readme),
+            "contributors": (f"/repos/{repo_name}/contributors", {"per_page": 10},
+                             self._parse_contributors),
+        }
+    
+    def _fetch_part(self, path, params, parse):
+        return parse(self._get(path, params))
+    
+    def _build_result(self, repo_name, parts):
+        """Assemble the fetch_repo_data result from the parsed endpoint parts"""
+        commits = parts["commits"]
+        return {
+            "success": True,
+            "repo_name": repo_name,
+            "commit_count": parts["commit_count"],
+            "commits": commits,  # Last 10 commits
+            "last_commit": commits[0] if commits else None,
+            "languages": parts["languages"],
+            "readme_content": parts["readme"],
+            "contributors": parts["contributors"],
+            "repo_info": parts["repo_info"],
+            "authenticated": self.authenticated,
+            "fetched_at": datetime.now().isoformat()
+        }
+    
+    def _deferred_result(self, repo_name, error):
+        """Result for a fetch postponed until the rate-limit window resets"""
+        return {
+            "success": False,
+            "deferred": True,
+            "retry_at": error.retry_at.isoformat(),
+            "error": str(error),
+            "repo_name": repo_name
+        }
+    
+    def _fetch_parts_concurrently(self, repo_name):
+        """
+        Run every endpoint call at the same time on the shared pool
+        Raises the first error encountered, like the sequential path would
+
+        GITHUB_FETCH_TIMEOUT bounds each call from when it starts running,
+        retries included: time spent queued behind other repos on the
+        shared pool does not count against it.
+        """
+        executor = _get_executor()
+        started = {}
+        changed = threading.Event()  # a call started or finished
+        
+        def run(name, path, params, parse):
+            started[name] = time.monotonic()
+            changed.set()
+            return self._fetch_part(path, params, parse)
+        
+        futures = {}
+        for name, (path, params, parse) in self._part_requests(repo_name).items():
+            futures[name] = executor.submit(run, name, path, params, parse)
+            futures[name].add_done_callback(lambda future: changed.set())
+        
+        try:
+            while True:
+                changed.clear()
+                if all(future.done() for future in futures.values()):
+                    break
+                if any(future.done() and not future.cancelled() and future.exception()
+                       for future in futures.values()):
+                    break
+                
+                now = time.monotonic()
+                deadlines = {name: started[name] + settings.GITHUB_FETCH_TIMEOUT
+                             for name, future in futures.items()
+                             if name in started and not future.done()}
+                late = [name for name, deadline in deadlines.items() if deadline <= now]
+                if late:
+                    raise TimeoutError(f"Timed out fetching {', '.join(late)} for {repo_name}")
+                # Calls still queued have no deadline yet and set changed once they start
+                changed.wait(min(deadlines.values()) - now if deadlines else None)
+            
+            for future in futures.values():
+                if future.done() and not future.cancelled() and future.exception():
+                    raise future.exception()
+            return {name: future.result() for name, future in futures.items()}
+        finally:
+            # Calls still queued for this repo are not needed any more
+            for future in futures.values():
+                future.cancel()
+    
+    def fetch_many(self, repo_urls, batch_size=None):
+        """
+        Fetch many repositories through the GraphQL endpoint
+        Returns {repo_url: result} with the same result shape as fetch_repo_data
+        
+        Each request covers up to batch_size repositories (defaults to
+        settings.GITHUB_GRAPHQL_BATCH_SIZE). GraphQL requires a token, so
+        unauthenticated handlers fall back to one fetch_repo_data per repo.
+        Contributors are not exposed over GraphQL; they are derived from the
+        authors of the recent commits instead.
+        """
+        results, repo_names = self._resolve_repo_urls(repo_urls)
+        
+        if not self.authenticated:
+            for repo_url in repo_names:
+                results[repo_url] = self.fetch_repo_data(repo_url)
+            return results
+        
+        for batch in self._batches(repo_names, batch_size):
+            try:
+                nodes = self._query_repositories([name for _, name in batch])
+            except Exception as e:
+                nodes = e
+            results.update(self._batch_results(batch, nodes))
+        
+        return results
+    
+    def _resolve_repo_urls(self, repo_urls):
+        """Split repo_urls into error results for invalid URLs and {url: owner/name}"""
+        results = {}
+        repo_names = {}
+        for repo_url in repo_urls:
+            repo_name = self.parse_repo_url(repo_url)
+            if repo_name:
+                repo_names[repo_url] = repo_name
+            else:
+                results[repo_url] = {"error": "Invalid GitHub URL"}
+        return results, repo_names
+    
+    def _batches(self, repo_names, batch_size=None):
+        """Chunk (url, name) pairs into GraphQL-sized batches"""
+        batch_size = batch_size or settings.GITHUB_GRAPHQL_BATCH_SIZE
+        pending = list(repo_names.items())
+        return [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    
+    def _batch_results(self, batch, nodes):
+        """
+        Map a batch query outcome back to per-repo results
+        nodes is the query data, or the exception that failed the whole batch
+        """
+        results = {}
+        for index, (repo_url, repo_name) in enumerate(batch):
+            if isinstance(nodes, RateLimitDeferred):
+                results[repo_url] = self._deferred_result(repo_name, nodes)
+            elif isinstance(nodes, Exception):
+                results[repo_url] = {"success": False, "error": str(nodes), "repo_name": repo_name}
+            elif nodes.get(f"r{index}"):
+                results[repo_url] = self._parse_graphql_repo(repo_name, nodes[f"r{index}"])
+            else:
+                results[repo_url] = {
+                    "success": False,
+                    "error": "Repository not found",
+                    "repo_name": repo_name
+                }
+        return results
+    
+    def _graphql_query(self, repo_names):
+        """One aliased GraphQL query covering every repo in repo_names"""
+        selections = []
+        for index, repo_name in enumerate(repo_names):
+            owner, name = repo_name.split("/", 1)
+            selections.append(
+                f"r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) "
+                f"{{{GRAPHQL_REPO_FIELDS}}}"
+            )
+        return "query {\n" + "\n".join(selections) + "\n}"
+    
+    def _query_repositories(self, repo_names):
+        """Run the batch query for repo_names and return its data"""
+        if self.rate_limited:
+            get_rate_limiter("graphql").acquire()
+        response = self.session.post(
+            f"{self.base_url}/graphql",
+            headers=self.headers,
+            json={"query": self._graphql_query(repo_names)},
+            timeout=self.timeout,
+        )
+        self._track_rate_limit(response, "graphql")
+        return self._graphql_data(response)
+    
+    def _graphql_data(self, response):
+        """Extract the data of a GraphQL response, raising if the whole query failed"""
+        if response.status_code != 200:
+            raise RuntimeError(f"GraphQL request failed with status {response.status_code}")
+        
+        payload = response.json()
+        # Missing repositories come back as null data plus a NOT_FOUND error;
+        # only give up on the whole batch when there is no data at all
+        if payload.get("data") is None:
+            errors = payload.get("errors") or [{"message": "Unknown GraphQL error"}]
+            raise RuntimeError(errors[0].get("message"))
+        return payload["data"]
+    
+    def _parse_graphql_repo(self, repo_name, node):
+        """Map one GraphQL repository node onto the fetch_repo_data result shape"""
+        branch = node.get("defaultBranchRef") or {}
+        history = (branch.get("target") or {}).get("history") or {}
         
+        commits = []
+        authors = Counter()
+        for commit in history.get("nodes") or []:
+            author = commit.get("author") or {}
+            commits.append({
+                "sha": commit.get("oid"),
+                "message": commit.get("message"),
+                "date": commit.get("committedDate"),
+                "author": author.get("name")
+            })
+            login = (author.get("user") or {}).get("login")
+            if login:
+                authors[login] += 1
+        
+        languages = {
+            edge["node"]["name"]: edge["size"]
+            for edge in (node.get("languages") or {}).get("edges") or []
+        }
+        
+        readme = ""
+        for alias in ("readmeMd", "readmeLower", "readmePlain"):
+            blob = node.get(alias)
+            if blob and blob.get("text"):
+                readme = blob["text"]
+                break
+        
+        return {
+            "success": True,
+            "repo_name": repo_name,
+            "commit_count": history.get("totalCount", len(commits)),
+            "commits": commits,
+            "last_commit": commits[0] if commits else None,
+            "languages": languages,
+            "readme_content": readme,
+            "contributors": [
+                {"login": login, "contributions": count}
+                for login, count in authors.most_common(10)
+            ],
+            "repo_info": {
+                "name": node.get("name"),
+                "description": node.get("description"),
+                "created_at": node.get("createdAt"),
+                "updated_at": node.get("updatedAt"),
+                "pushed_at": node.get("pushedAt"),
+                "stars": node.get("stargazerCount"),
+                "forks": node.get("forkCount"),
+                "default_branch": branch.get("name", "main")
+            },
+            "authenticated": self.authenticated,
+            "fetched_at": datetime.now().isoformat()
+        }
+    
+    def _get(self, path, params=None):
+        """
+        GET an API path and decode the JSON body
+        
+        With conditional requests enabled the stored ETag/Last-Modified are
+        sent along; a 304 does not count against the rate limit and is
+        answered from the stored body, reported as a plain 200.
+        """
+        url = self._url(path, params)
+        headers, cached = self._conditional_headers(url)
+        
+        if self.rate_limited:
+            get_rate_limiter("core").acquire()
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        self._track_rate_limit(response, "core")
+        return self._handle_response(url, response, cached)
+    
+    def _url(self, path, params=None):
+        return requests.Request("GET", f"{self.base_url}{path}", params=params).prepare().url
+    
+    def _conditional_headers(self, url):
+        """Request headers for url plus the cached copy they revalidate, if any"""
+        headers = dict(self.headers)
+        cached = None
+        
+        if self.conditional:
+            cached = GitHubResponseCache.objects.filter(url=url).first()
+            if cached:
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
+        return headers, cached
+    
+    def _handle_response(self, url, response, cached):
+        """Turn an HTTP response into an APIResponse, storing or replaying the cached copy"""
+        if response.status_code == 304 and cached:
+            # A 304 need not repeat the Link header, so replay the stored one
+            response_headers = CaseInsensitiveDict(response.headers)
+            if cached.link:
+                response_headers["Link"] = cached.link
+            return APIResponse(200, cached.body, response_headers)
+        
+        if response.status_code != 200:
+            return APIResponse(response.status_code, None, response.headers)
+        
+        data = response.json()
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        if self.conditional and (etag or last_modified):
+            GitHubResponseCache.objects.update_or_create(
+                url=url,
+                defaults={
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "link": response.headers.get("Link", ""),
+                    "body": data,
+                },
+            )
+        return APIResponse(200, data, response.headers)
+    
+    def _track_rate_limit(self, response, resource):
+        """
+        Feed the budget GitHub reports back into the shared scheduler
+        Raises RateLimitDeferred when GitHub refused the call for lack of budget
+        """
+        resource = response.headers.get("X-RateLimit-Resource", resource)
+        if self.rate_limited:
+            limiter = get_rate_limiter(resource)
+            limiter.update_from_headers(response.headers)
+            if response.status_code == 304:
+                # Conditional hits are not charged against the budget
+                limiter.refund()
+        
+        if (response.status_code in (403, 429)
+                and response.headers.get("X-RateLimit-Remaining") == "0"):
+            reset = int(response.headers.get("X-RateLimit-Reset", time.time() + 60))
+            raise RateLimitDeferred(resource, datetime.fromtimestamp(reset, tz=timezone.utc))
+    
+    def _parse_repo_info(self, response):
+        """Basic repository information"""
         if response.status_code == 200:
-            data = response.json()
+            data = response.data
             return {
                 "name": data.get("name"),
                 "description": data.get("description"),
                 "created_at": data.get("created_at"),
                 "updated_at": data.get("updated_at"),
+                "pushed_at": data.get("pushed_at"),
                 "stars": data.get("stargazers_count"),
                 "forks": data.get("forks_count"),
                 "default_branch": data.get("default_branch", "main")
             }
         return {}
     
-    def _get_commits(self, repo_name):
-        """Fetch repository commits"""
-        url = f"{self.base_url}/repos/{repo_name}/commits"
-        response = requests.get(url, headers=self.headers, params={"per_page": 100})
+    def _parse_commit_count(self, response):
+        """
+        Count all commits on the default branch from a single one-item page
+        
+        With per_page=1 the page number of the Link header's rel="last" URL
+        is the exact commit count, whatever the size of the history.
+        """
+        if response.status_code != 200:
+            return 0
         
+        for link in parse_header_links(response.headers.get("Link", "")):
+            if link.get("rel") == "last":
+                page = parse_qs(urlparse(link["url"]).query).get("page")
+                if page:
+                    return int(page[0])
+        # No pagination means everything fit on the first page
+        return len(response.data)
+    
+    def _parse_commits(self, response):
+        """The most recent repository commits"""
         if response.status_code == 200:
-            commits_data = response.json()
+            commits_data = response.data
             commits = []
             for commit in commits_data:
                 commits.append({
@@ -128,38 +654,29 @@ class GitHubHandler:
             return commits
         return []
     
-    def _get_languages(self, repo_name):
-        """Fetch programming languages used in the repository"""
-        url = f"{self.base_url}/repos/{repo_name}/languages"
-        response = requests.get(url, headers=self.headers)
-        
+    def _parse_languages(self, response):
+        """Programming languages used in the repository"""
         if response.status_code == 200:
-            return response.json()
+            return response.data
         return {}
     
-    def _get_readme(self, repo_name):
-        """Fetch README content"""
-        url = f"{self.base_url}/repos/{repo_name}/readme"
-        response = requests.get(url, headers=self.headers)
-        
+    def _parse_readme(self, response):
+        """README content"""
         if response.status_code == 200:
-            data = response.json()
+            data = response.data
             content = data.get("content", "")
             try:
                 # README content is base64 encoded
                 decoded_content = base64.b64decode(content).decode('utf-8')
-                return decoded_content[:2000]  # First 2000 chars
+                return decoded_content
             except Exception:
                 return ""
         return ""
     
-    def _get_contributors(self, repo_name):
-        """Fetch repository contributors"""
-        url = f"{self.base_url}/repos/{repo_name}/contributors"
-        response = requests.get(url, headers=self.headers, params={"per_page": 10})
-        
+    def _parse_contributors(self, response):
+        """Repository contributors"""
         if response.status_code == 200:
-            contributors_data = response.json()
+            contributors_data = response.data
             contributors = []
             for contributor in contributors_data:
                 contributors.append({
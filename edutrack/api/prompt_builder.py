@@ -0,0 +1,153 @@
+"""
+Token-budgeted repository context for Gemini prompts
+"""
+import re
+
+
+# Letter runs, single digits and single punctuation marks
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d|\S")
+_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})\s+(.+?)[\s#]*$")
+
+# Commit messages that count as recent, ahead of the language breakdown
+RECENT_COMMITS = 5
+
+
+def _token_cost(token):
+    return (len(token) + 5) // 6 if token[0].isalpha() else 1
+
+
+def count_tokens(text):
+    """
+    Local token count approximating Gemini's tokenizer: one token per six
+    letters of a word, per digit and per punctuation mark
+    """
+    return sum(_token_cost(token) for token in _TOKEN_RE.findall(text))
+
+
+def clip_to_tokens(text, budget):
+    """The longest prefix of text within budget tokens, marked when cut"""
+    used = 0
+    for match in _TOKEN_RE.finditer(text):
+        used += _token_cost(match.group())
+        if used > budget:
+            return text[:match.start()].rstrip() + " ..."
+    return text
+
+
+def split_readme(readme):
+    """
+    Split a Markdown README into (level, heading, body) sections
+    Text before the first heading is a section with level 0 and no heading.
+    """
+    sections = []
+    level, heading, body = 0, None, []
+    for line in readme.splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            if heading is not None or "".join(body).strip():
+                sections.append((level, heading, "\n".join(body).strip()))
+            level, heading, body = len(match.group(1)), match.group(2), []
+        else:
+            body.append(line)
+    if heading is not None or "".join(body).strip():
+        sections.append((level, heading, "\n".join(body).strip()))
+    return sections
+
+
+class ContextBuilder:
+    """
+    Fills a token budget with repository facts, most useful first
+
+    The fixed facts (commit count, contributors, description, last commit)
+    always go in. The rest is added piece by piece while it fits, in this
+    order: the README outline, its first section, the RECENT_COMMITS most
+    recent commit messages, the language breakdown, the remaining README
+    sections, then the older commit messages. A README section too large
+    for what is left is clipped.
+    """
+
+    def __init__(self, repo_data, budget):
+        self.repo_data = repo_data
+        self.budget = budget
+        self.groups = {"outline": [], "readme": [], "commits": [], "languages": []}
+
+    def build(self):
+        """The context text, at most about budget tokens"""
+        fixed = self._fixed_facts()
+        remaining = self.budget - count_tokens(fixed) - count_tokens(self._render_groups(empty=True))
+
+        for group, text, clippable in self._pieces():
+            cost = count_tokens(text) + 1
+            if cost <= remaining:
+                self.groups[group].append(text)
+                remaining -= cost
+            elif clippable and remaining > 20:
+                self.groups[group].append(clip_to_tokens(text, remaining - 2))
+                remaining = 0
+
+        return f"{fixed}\n\n{self._render_groups()}"
+
+    def _fixed_facts(self):
+        repo_data = self.repo_data
+        last_commit = repo_data.get("last_commit") or {}
+        repo_info = repo_data.get("repo_info") or {}
+        return f"""**Repository Information:**
+- Total Commits: {repo_data.get("commit_count", 0)}
+- Contributors: {len(repo_data.get("contributors") or [])}
+- Description: {repo_info.get('description') or 'No description available'}
+
+**Last Commit:**
+- Message: {last_commit.get('message') or 'N/A'}
+- Date: {last_commit.get('date') or 'N/A'}"""
+
+    def _pieces(self):
+        """(group, text, clippable) in priority order"""
+        sections = split_readme(self.repo_data.get("readme_content") or "")
+        for level, heading, _ in sections:
+            if heading:
+                yield "outline", f"{'  ' * max(level - 1, 0)}- {heading}", False
+
+        readme = [self._section_text(heading, body) for _, heading, body in sections]
+        if readme:
+            yield "readme", readme[0], True
+
+        commits = [
+            f"- {commit['message'].splitlines()[0]} ({commit.get('date') or 'N/A'})"
+            for commit in self.repo_data.get("commits") or []
+            if commit.get("message")
+        ]
+        for line in commits[:RECENT_COMMITS]:
+            yield "commits", line, False
+
+        languages = self.repo_data.get("languages") or {}
+        total_bytes = sum(languages.values())
+        for lang, bytes_count in sorted(languages.items(), key=lambda x: x[1], reverse=True):
+            if total_bytes:
+                yield "languages", f"- {lang}: {bytes_count / total_bytes * 100:.1f}%", False
+
+        for text in readme[1:]:
+            yield "readme", text, True
+        for line in commits[RECENT_COMMITS:]:
+            yield "commits", line, False
+
+    def _section_text(self, heading, body):
+        return f"{heading}\n{body}".strip() if heading else body
+
+    def _render_groups(self, empty=False):
+        """The variable part of the context; empty=True renders just the labels"""
+        def block(group, fallback):
+            parts = [] if empty else self.groups[group]
+            separator = "\n\n" if group == "readme" else "\n"
+            return separator.join(parts) if parts else fallback
+
+        return f"""**Languages Used:**
+{block("languages", "- No language data available")}
+
+**Recent Commits:**
+{block("commits", "- No commit messages available")}
+
+**README Outline:**
+{block("outline", "- No headings")}
+
+**README Excerpt:**
+{block("readme", "No README available")}"""
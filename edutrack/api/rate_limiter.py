@@ -0,0 +1,196 @@
+"""
+Rate-limit-aware scheduler for GitHub API requests
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import GitHubRateLimit
+
+
+# GitHub budgets are granted per rolling hour
+RATE_LIMIT_WINDOW = 3600
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimitDeferred(Exception):
+    """The budget is spent; the request should be retried at retry_at"""
+
+    def __init__(self, resource, retry_at):
+        self.resource = resource
+        self.retry_at = retry_at
+        super().__init__(
+            f"GitHub {resource} rate limit reached; retry after {retry_at.isoformat()}"
+        )
+
+
+def get_rate_limiter(resource="core"):
+    """Return the process-wide limiter for a GitHub rate-limit resource"""
+    with _limiters_lock:
+        if resource not in _limiters:
+            _limiters[resource] = GitHubRateLimiter(resource)
+        return _limiters[resource]
+
+
+class GitHubRateLimiter:
+    """
+    Token bucket paced to spend what is left of the budget evenly until the reset
+    
+    State lives in the GitHubRateLimit table, so every process and thread
+    draws from the same budget; each update is one transaction, which on
+    SQLite holds the database's write lock from its start. The bucket
+    holds up to settings.GITHUB_RATE_LIMIT_BURST tokens and refills at
+    remaining / seconds until the reset GitHub last reported (limit/hour
+    before it has reported one); once nothing is remaining, requests wait
+    for the reset. A request that would have to wait longer than
+    settings.GITHUB_RATE_LIMIT_MAX_WAIT raises RateLimitDeferred instead
+    of blocking the worker.
+    """
+
+    def __init__(self, resource="core", max_wait=None):
+        self.resource = resource
+        self.max_wait = settings.GITHUB_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+
+    def _capacity(self, state):
+        return max(min(settings.GITHUB_RATE_LIMIT_BURST, state.limit), 1)
+
+    def _window_rate(self, state):
+        """Tokens added per second over a whole window"""
+        return max(state.limit, 1) / RATE_LIMIT_WINDOW
+
+    def _rate(self, state, now):
+        """Tokens added per second: the remaining budget spread until the reset"""
+        if not state.reset_at or state.remaining <= 0:
+            return self._window_rate(state)
+        until_reset = max((state.reset_at - now).total_seconds(), 1)
+        return state.remaining / until_reset
+
+    def _refill(self, state, now):
+        """Bring the bucket level and budget up to date"""
+        if state.reset_at and state.reset_at <= now:
+            # A new window has started since GitHub last reported
+            state.remaining = state.limit
+            state.reset_at = None
+            state.tokens_updated_at = None
+        if state.tokens_updated_at is None:
+            state.tokens = self._capacity(state)
+        else:
+            elapsed = (now - state.tokens_updated_at).total_seconds()
+            state.tokens = min(self._capacity(state),
+                               state.tokens + elapsed * self._rate(state, now))
+        state.tokens_updated_at = now
+
+    def _load(self):
+        state, _ = GitHubRateLimit.objects.select_for_update().get_or_create(
+            resource=self.resource
+        )
+        return state
+
+    def acquire(self):
+        """
+        Reserve one request against the budget, sleeping if pacing requires it
+        Raises RateLimitDeferred when the wait would exceed max_wait
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            state = self._load()
+            self._refill(state, now)
+
+            if state.remaining <= 0 and state.reset_at:
+                ready_at = state.reset_at
+            elif state.tokens >= 1:
+                ready_at = now
+            else:
+                ready_at = now + timedelta(seconds=(1 - state.tokens) / self._rate(state, now))
+
+            wait = (ready_at - now).total_seconds()
+            if wait > self.max_wait:
+                raise RateLimitDeferred(self.resource, ready_at)
+
+            # Reserve the slot now; a negative level makes later callers queue behind it
+            state.tokens -= 1
+            state.remaining -= 1
+            state.save()
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def refund(self):
+        """Give back a reserved slot for a request GitHub did not charge"""
+        with transaction.atomic():
+            state = self._load()
+            state.tokens = min(state.tokens + 1, self._capacity(state))
+            state.save()
+
+    def update_from_headers(self, headers):
+        """Record the budget GitHub reports in X-RateLimit-* response headers"""
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        limit = headers.get("X-RateLimit-Limit")
+        reset = headers.get("X-RateLimit-Reset")
+
+        with transaction.atomic():
+            state = self._load()
+            self._refill(state, timezone.now())
+            state.remaining = int(remaining)
+            if limit is not None and int(limit) != state.limit:
+                # A different budget (the first report, or a token added or
+                # removed): refill the bucket to its size rather than pacing
+                # the new budget by the old one
+                state.limit = int(limit)
+                state.tokens = self._capacity(state)
+            if reset is not None:
+                state.reset_at = datetime.fromtimestamp(int(reset), tz=dt_timezone.utc)
+            state.tokens = min(state.tokens, state.remaining)
+            state.save()
+
+    def _peek(self):
+        """The stored state for reading, unlocked (defaults before the first request)"""
+        state = GitHubRateLimit.objects.filter(resource=self.resource).first()
+        return state or GitHubRateLimit(resource=self.resource)
+
+    def status(self, request_count=None):
+        """
+        Current budget: limit, remaining, reset time and bucket level
+        With request_count, also when that many more requests will have been sent.
+        """
+        now = timezone.now()
+        state = self._peek()
+        self._refill(state, now)
+        status = {
+            "resource": self.resource,
+            "limit": state.limit,
+            "remaining": state.remaining,
+            "reset_at": state.reset_at,
+            "tokens": round(state.tokens, 2),
+        }
+        if request_count is not None:
+            status["projected_completion"] = self._projected_completion(state, now, request_count)
+        return status
+
+    def projected_completion(self, request_count):
+        """Estimate when request_count more requests will have been sent"""
+        now = timezone.now()
+        state = self._peek()
+        self._refill(state, now)
+        return self._projected_completion(state, now, request_count)
+
+    def _projected_completion(self, state, now, request_count):
+        rate = self._rate(state, now)
+        if request_count <= state.remaining or not state.reset_at:
+            seconds = max(request_count - state.tokens, 0) / rate
+        else:
+            # Spend what is left, wait for the reset, then continue at a full window's pace
+            until_reset = (state.reset_at - now).total_seconds()
+            spent_before_reset = max(state.remaining - state.tokens, 0) / rate
+            after_reset = max(request_count - state.remaining - self._capacity(state), 0)
+            seconds = (max(until_reset, spent_before_reset)
+                       + after_reset / self._window_rate(state))
+        return now + timedelta(seconds=seconds)
@@ -0,0 +1,39 @@
+"""
+SQLite backend whose transactions can take the write lock as they begin
+
+The stock backend opens every transaction.atomic() block with a deferred
+BEGIN: it reads under a shared lock and only asks for the write lock at
+its first write. When two threads do that at once SQLite cannot let one
+wait for the other, so it fails straight away with "database is locked",
+whatever the busy timeout. With OPTIONS['transaction_mode'] = 'IMMEDIATE'
+the write lock is taken by BEGIN, where the timeout applies, and
+concurrent writers (analysis workers, GitHub fetch threads) queue instead.
+
+The option mirrors the one Django 5.1 added to its own SQLite backend,
+which makes this one unnecessary from that version on.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'EXCLUSIVE', 'IMMEDIATE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        mode = params.pop('transaction_mode', None)
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+            )
+        self.transaction_mode = mode and mode.upper()
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
@@ -0,0 +1,362 @@
+"""
+Background analysis jobs: a DB-backed queue drained by an in-process worker pool
+"""
+import asyncio
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .analysis import analyze_student_repo, stream_student_repo_analysis
+from .models import AnalysisJob, AnalysisLog, StudentRepo
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Stage of a job queued for a streaming page, which normally runs it itself
+STREAM_STAGE = 'waiting for stream'
+STREAM_PROGRESS = {'fetching': 10, 'analyzing': 40}
+STREAM_POLL_INTERVAL = 1  # seconds between reads of a job followed by a stream
+LOCKED_RETRY_DELAY = 5  # seconds before rerunning a job that found SQLite locked
+
+
+def _get_executor():
+    """Worker pool shared by every request in this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_WORKERS,
+                thread_name_prefix="analysis",
+            )
+        return _executor
+
+
+def enqueue_analysis(repo, force=False, batch=None, stream=False):
+    """
+    Queue an analysis of repo and return its AnalysisJob
+    A queued or running job for the same repo is returned instead of a new one
+
+    stream marks a new job for stream_job: the worker pool leaves it to the
+    page that queued it for ANALYSIS_STREAM_GRACE seconds, then runs it
+    itself in case the page never connected.
+    """
+    with transaction.atomic():
+        job = AnalysisJob.objects.filter(repo=repo, status__in=('queued', 'running')).first()
+        if job is not None:
+            update_fields = []
+            if force and not job.force and job.status == 'queued':
+                job.force = True
+                update_fields.append('force')
+            if batch and job.batch is None:
+                job.batch = batch
+                update_fields.append('batch')
+            if update_fields:
+                job.save(update_fields=update_fields)
+            return job
+
+        delay = settings.ANALYSIS_STREAM_GRACE if stream else 0
+        job = AnalysisJob.objects.create(
+            repo=repo,
+            force=force,
+            batch=batch,
+            stage=STREAM_STAGE if stream else '',
+            run_after=timezone.now() + timedelta(seconds=delay) if stream else None,
+        )
+        # Workers read the job from the database, so only hand it over once committed
+        transaction.on_commit(lambda: submit(job.id, delay=delay))
+    return job
+
+
+def enqueue_assignment(assignment, pending_only=False):
+    """
+    Queue every repo of an assignment that needs analysis, as one batch
+    Not-yet-analyzed repos always run; analyzed ones are included unless
+    pending_only is set and are skipped by the freshness probe when unchanged.
+    Returns (batch id, jobs).
+
+    Same rules as enqueue_analysis for each repo, in a fixed number of
+    queries: active jobs are looked up together and new ones bulk created.
+    """
+    batch = uuid.uuid4()
+    repos = StudentRepo.objects.filter(assignment=assignment)
+    if pending_only:
+        repos = repos.filter(is_analyzed=False)
+
+    with transaction.atomic():
+        repo_ids = list(repos.order_by('id').values_list('id', flat=True))
+        active = {}
+        for job in AnalysisJob.objects.filter(repo_id__in=repos.values('id'),
+                                              status__in=('queued', 'running')).order_by('id'):
+            active.setdefault(job.repo_id, job)
+
+        # Active jobs that are not part of a batch yet join this one
+        unbatched = [job for job in active.values() if job.batch is None]
+        if unbatched:
+            AnalysisJob.objects.filter(id__in=[job.id for job in unbatched]).update(batch=batch)
+            for job in unbatched:
+                job.batch = batch
+
+        created = AnalysisJob.objects.bulk_create([
+            AnalysisJob(repo_id=repo_id, batch=batch)
+            for repo_id in repo_ids if repo_id not in active
+        ])
+        # Workers read the jobs from the database, so only hand them over once committed
+        transaction.on_commit(lambda: [submit(job.id) for job in created])
+
+    created_jobs = iter(created)
+    return batch, [active[repo_id] if repo_id in active else next(created_jobs)
+                   for repo_id in repo_ids]
+
+
+def batch_summary(assignment, batch):
+    """Counts by job status for a bulk analysis, plus one entry per repo"""
+    jobs = (AnalysisJob.objects.filter(batch=batch, repo__assignment=assignment)
+            .select_related('repo').order_by('repo__student_name'))
+    counts = {'queued': 0, 'running': 0, 'success': 0, 'failed': 0, 'skipped': 0}
+    repos = []
+    for job in jobs:
+        skipped = job.status == 'success' and job.result.get('skipped', False)
+        counts['skipped' if skipped else job.status] += 1
+        repos.append({
+            'repo_id': job.repo_id,
+            'student_name': job.repo.student_name,
+            'status': 'skipped' if skipped else job.status,
+            'stage': job.stage,
+            'error': job.error_message,
+        })
+    return {
+        'total': len(repos),
+        'done': counts['success'] + counts['failed'] + counts['skipped'],
+        'counts': counts,
+        'repos': repos,
+    }
+
+
+def submit(job_id, delay=0):
+    """Hand a queued job to the worker pool, after delay seconds if given"""
+    if delay > 0:
+        timer = threading.Timer(delay, submit, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+        return
+    _get_executor().submit(_work, job_id)
+
+
+def requeue_stale_jobs():
+    """
+    Queue again the jobs 'running' for over ANALYSIS_STALE_AFTER seconds
+    Their worker died with its process; younger ones may still be running
+    elsewhere. Returns how many were requeued.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.ANALYSIS_STALE_AFTER)
+    return AnalysisJob.objects.filter(status='running').filter(
+        Q(started_at__isnull=True) | Q(started_at__lte=stale)
+    ).update(status='queued', stage='', progress=0)
+
+
+def resume_jobs():
+    """
+    Hand the jobs a previous process left behind to this process's worker pool
+    Returns (requeued, submitted)
+
+    The queue lives in the database but workers only learn of a job through
+    submit, so after a restart nothing would run it. Jobs 'running' for over
+    ANALYSIS_STALE_AFTER seconds lost their worker and are queued again;
+    then every queued job is submitted, deferred ones for their run_after.
+    Other processes may be resuming too: claim_job runs each job once.
+    """
+    now = timezone.now()
+    try:
+        requeued = requeue_stale_jobs()
+        queued = list(AnalysisJob.objects.filter(status='queued')
+                      .order_by('created_at').values_list('id', 'run_after'))
+    except DatabaseError as e:
+        # E.g. the first start, before migrate
+        logger.warning("Could not resume analysis jobs: %s", e)
+        return 0, 0
+
+    for job_id, run_after in queued:
+        submit(job_id, delay=(run_after - now).total_seconds() if run_after else 0)
+    if requeued or queued:
+        logger.info("Resumed %d analysis jobs (%d interrupted)", len(queued), requeued)
+    return requeued, len(queued)
+
+
+def _work(job_id):
+    """Executor entry point: worker threads hold their own DB connections"""
+    close_old_connections()
+    try:
+        job = run_job(job_id)
+        if job is not None and job.status == 'queued':
+            submit(job.id, delay=(job.run_after - timezone.now()).total_seconds())
+    finally:
+        close_old_connections()
+
+
+def claim_job(job_id, due_only=False):
+    """
+    Mark a queued job running and return it, or None if another worker claimed it
+    due_only leaves jobs alone that are deferred to a later run_after,
+    except those waiting for a stream.
+    """
+    jobs = AnalysisJob.objects.filter(id=job_id, status='queued')
+    if due_only:
+        jobs = jobs.filter(
+            Q(run_after__isnull=True) | Q(run_after__lte=timezone.now()) | Q(stage=STREAM_STAGE)
+        )
+    claimed = jobs.update(
+        status='running',
+        stage='starting',
+        progress=0,
+        started_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+    return AnalysisJob.objects.select_related('repo', 'log').get(id=job_id)
+
+
+def _pending_log(job):
+    """The log a deferred earlier run of job left for this one to complete, if any"""
+    return job.log if job.log is not None and job.log.status == 'pending' else None
+
+
+def _attempt_log_id(job):
+    """The log this run of job wrote before it raised, if it got that far"""
+    return (AnalysisLog.objects.filter(repo_id=job.repo_id, status='pending',
+                                       analysis_date__gte=job.started_at)
+            .values_list('id', flat=True).first())
+
+
+def run_job(job_id):
+    """
+    Run one queued job in the calling thread
+    Returns the finished (or requeued) job, or None if another worker claimed it
+    """
+    job = claim_job(job_id)
+    if job is None:
+        return None
+
+    def progress(stage, percent):
+        AnalysisJob.objects.filter(id=job_id).update(stage=stage, progress=percent)
+
+    log = _pending_log(job)
+    try:
+        result = analyze_student_repo(job.repo, force=job.force, progress=progress, log=log)
+    except Exception as e:
+        if isinstance(e, OperationalError) and is_locked(e):
+            result = _locked_result(e)
+        else:
+            result = {'success': False, 'error': str(e)}
+        log_id = log.id if log else _attempt_log_id(job)
+        if log_id:
+            result['log_id'] = log_id
+    return _finish(job, result)
+
+
+def is_locked(error):
+    """True for SQLite's "database is locked", raised once its busy timeout ran out"""
+    return 'database is locked' in str(error)
+
+
+def _locked_result(error):
+    """
+    A deferred result for a run that could not write to SQLite in time
+    The job goes back on the queue instead of failing; a Gemini answer it
+    already paid for is served from the analysis cache on the rerun.
+    """
+    retry_at = timezone.now() + timedelta(seconds=LOCKED_RETRY_DELAY)
+    return {'success': False, 'deferred': True, 'retry_at': retry_at.isoformat(), 'error': str(error)}
+
+
+def _finish(job, result):
+    """Record the outcome; GitHub and Gemini deferrals go back on the queue until retry_at"""
+    job.result = result
+    job.log_id = result.get('log_id', job.log_id)
+    job.error_message = result.get('error')
+
+    if result.get('deferred') and job.attempts < settings.ANALYSIS_MAX_ATTEMPTS:
+        retry_at = result.get('retry_at')
+        job.run_after = datetime.fromisoformat(retry_at) if retry_at else timezone.now()
+        job.status = 'queued'
+        job.stage = 'waiting for rate limit'
+        job.progress = 0
+        job.save()
+        return job
+
+    job.status = 'success' if result.get('success') else 'failed'
+    job.stage = 'done'
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.save()
+    if job.status == 'failed' and job.log_id:
+        # A log left pending for a rerun that will not come
+        AnalysisLog.objects.filter(id=job.log_id, status='pending').update(
+            status='failed', error_message=job.error_message)
+    return job
+
+
+async def stream_job(job_id):
+    """
+    Run a queued job here, yielding stream_student_repo_analysis's events
+
+    The SSE counterpart of run_job: ("status", stage) and ("chunk", text)
+    events, then ("done", result) once the job is finished. A job that a
+    worker already runs, or that is deferred, is followed instead: its
+    stage changes are reported and its result is sent when it ends.
+    """
+    job = await sync_to_async(claim_job)(job_id, due_only=True)
+    if job is None:
+        async for event in _follow_job(job_id):
+            yield event
+        return
+
+    def progress(stage):
+        AnalysisJob.objects.filter(id=job_id).update(stage=stage, progress=STREAM_PROGRESS[stage])
+
+    result = {'success': False, 'error': 'Analysis stream ended without a result'}
+    try:
+        async for event, data in stream_student_repo_analysis(job.repo, log=_pending_log(job)):
+            if event == 'done':
+                result = data
+                continue
+            if event == 'status':
+                await sync_to_async(progress)(data)
+            yield event, data
+    except (asyncio.CancelledError, GeneratorExit):
+        # The browser went away mid-stream
+        interrupted = {'success': False, 'error': 'Analysis stream was interrupted'}
+        await asyncio.shield(sync_to_async(_finish)(job, interrupted))
+        raise
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+
+    job = await sync_to_async(_finish)(job, result)
+    if job.status == 'queued':
+        submit(job.id, delay=(job.run_after - timezone.now()).total_seconds())
+    yield 'done', result
+
+
+async def _follow_job(job_id):
+    """Status events for a job run elsewhere, then its result"""
+    stage = None
+    while True:
+        job = await sync_to_async(AnalysisJob.objects.get)(id=job_id)
+        deferred = job.status == 'queued' and job.result.get('deferred')
+        if job.status in ('success', 'failed') or deferred:
+            yield 'done', job.result or {'success': False, 'error': job.error_message}
+            return
+        if job.stage and job.stage != stage:
+            stage = job.stage
+            yield 'status', stage
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
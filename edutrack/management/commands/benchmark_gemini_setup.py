@@ -0,0 +1,65 @@
+"""
+Measure what building a Gemini client per analysis costs compared with the shared models
+"""
+import json
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from google.generativeai import client as genai_client
+
+from edutrack.api.gemini_handler import GeminiHandler, get_model_stats
+
+
+class Command(BaseCommand):
+    help = ("Time GeminiHandler construction with the process-wide model registry "
+            "against configuring genai and building a GenerativeModel every time")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200,
+                            help="Handlers constructed per approach (default: 200)")
+        parser.add_argument('--model', default='gemini-2.5-pro', help="Model name to build")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        model_name = options['model']
+        # Construction makes no API call, so a placeholder key is enough offline
+        api_key = settings.GEMINI_API_KEY or 'benchmark-key'
+
+        # Both paths fetch the transport the way the first generate_content call does
+        start = time.perf_counter()
+        for _ in range(iterations):
+            genai.configure(api_key=api_key)
+            genai.GenerativeModel(model_name)
+            genai_client.get_default_generative_client()
+        per_request = time.perf_counter() - start
+
+        before = get_model_stats()
+        with override_settings(GEMINI_API_KEY=api_key):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                GeminiHandler(model_name)
+                genai_client.get_default_generative_client()
+            shared = time.perf_counter() - start
+        after = get_model_stats()
+
+        result = {
+            'iterations': iterations,
+            'per_request_ms': round(per_request / iterations * 1000, 3),
+            'shared_ms': round(shared / iterations * 1000, 3),
+            'saved_ms_per_analysis': round((per_request - shared) / iterations * 1000, 3),
+            'models_built': after['models_built'] - before['models_built'],
+            'reused': after['reused'] - before['reused'],
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        self.stdout.write(f"Per-request construction: {result['per_request_ms']} ms per handler")
+        self.stdout.write(f"Shared models:            {result['shared_ms']} ms per handler")
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {result['saved_ms_per_analysis']} ms per analysis; "
+            f"{result['models_built']} model built, {result['reused']} lookups reused"
+        ))
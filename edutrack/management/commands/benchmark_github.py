@@ -0,0 +1,219 @@
+"""
+Offline benchmark of GitHub ingestion against the local GitHub stand-in server
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.test import override_settings
+
+from edutrack.api.async_github_handler import AsyncGitHubHandler, close_async_client
+from edutrack.api.github_handler import GitHubHandler
+from edutrack.models import GitHubRateLimit, GitHubResponseCache
+from edutrack.testing.github_server import (
+    DEFAULT_FIXTURES, GitHubStandInServer, load_fixtures, record_fixtures, save_fixtures,
+    scale_fixtures,
+)
+
+# GitHub's hourly budget for an authenticated token
+GITHUB_RATE_LIMIT = 5000
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+class Command(BaseCommand):
+    help = ("Measure GitHubHandler.fetch_repo_data throughput and p50/p99 latency "
+            "against the local GitHub stand-in, at several repo counts and concurrency levels")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repos', type=int_list, default=[10, 50, 200],
+                            help="Comma-separated repository counts (default: 10,50,200)")
+        parser.add_argument('--concurrency', type=int_list, default=[1, 4, 16],
+                            help="Comma-separated numbers of repos fetched at once (default: 1,4,16)")
+        parser.add_argument('--mode', choices=['rest', 'async', 'graphql'], default='rest',
+                            help="rest: fetch_repo_data in threads; async: AsyncGitHubHandler; "
+                                 "graphql: fetch_many batches")
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Repositories per GraphQL query in graphql mode")
+        parser.add_argument('--fixtures', default=str(DEFAULT_FIXTURES),
+                            help="Recorded repositories to replay")
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help="Seconds of server latency per request")
+        parser.add_argument('--latency-max', type=float,
+                            help="Draw the latency uniformly between --latency and this value")
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help="Fraction of requests answered with a 502")
+        parser.add_argument('--rate-limit', type=int,
+                            help=f"Requests the stand-in allows per hour (default: {GITHUB_RATE_LIMIT} "
+                                 f"when rate limited, else unlimited)")
+        parser.add_argument('--sequential-parts', action='store_true',
+                            help="Fetch the endpoints of each repo one after another")
+        parser.add_argument('--conditional', action=argparse.BooleanOptionalAction,
+                            help="Use the ETag cache (default: GITHUB_CONDITIONAL_REQUESTS)")
+        parser.add_argument('--rate-limited', action=argparse.BooleanOptionalAction,
+                            help="Use the shared rate-limit scheduler (default: GITHUB_RATE_LIMIT_ENABLED)")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for latency and errors")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON")
+        parser.add_argument('--record', nargs='+', metavar='OWNER/REPO',
+                            help="Record these live repositories into --fixtures and exit")
+        parser.add_argument('--token', default='', help="GitHub token used with --record")
+
+    def handle(self, *args, **options):
+        if options['record']:
+            repos = record_fixtures(options['record'], token=options['token'] or None)
+            save_fixtures(repos, options['fixtures'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Recorded {len(repos)} repositories into {options['fixtures']}"))
+            return
+
+        try:
+            fixtures = load_fixtures(options['fixtures'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not load fixtures: {e}")
+
+        latency = options['latency']
+        if options['latency_max'] is not None:
+            latency = (options['latency'], options['latency_max'])
+
+        # Production settings unless turned off with --no-conditional / --no-rate-limited
+        conditional = (settings.GITHUB_CONDITIONAL_REQUESTS
+                       if options['conditional'] is None else options['conditional'])
+        rate_limited = (settings.GITHUB_RATE_LIMIT_ENABLED
+                        if options['rate_limited'] is None else options['rate_limited'])
+        rate_limit = options['rate_limit']
+        if rate_limit is None and rate_limited:
+            # GitHub always reports a budget; without one the scheduler paces at 60 an hour
+            rate_limit = GITHUB_RATE_LIMIT
+
+        try:
+            saved_limits = list(GitHubRateLimit.objects.all())
+        except DatabaseError as e:
+            raise CommandError(f"The ETag cache and rate-limit scheduler need a migrated "
+                               f"database ({e}); run migrate or pass --no-conditional --no-rate-limited")
+
+        results = []
+        try:
+            for repo_count in options['repos']:
+                repos = scale_fixtures(fixtures, repo_count)
+                for concurrency in options['concurrency']:
+                    server = GitHubStandInServer(
+                        repos,
+                        latency=latency,
+                        rate_limit=rate_limit,
+                        error_rate=options['error_rate'],
+                        seed=options['seed'],
+                    )
+                    # Every configuration starts like a fresh worker, with a cold cache
+                    GitHubRateLimit.objects.all().delete()
+                    with server, override_settings(
+                        GITHUB_API_URL=server.url,
+                        GITHUB_TOKEN='benchmark-token' if options['mode'] == 'graphql' else '',
+                        GITHUB_CONCURRENT_FETCH=(settings.GITHUB_CONCURRENT_FETCH
+                                                 and not options['sequential_parts']),
+                        GITHUB_CONDITIONAL_REQUESTS=conditional,
+                        GITHUB_RATE_LIMIT_ENABLED=rate_limited,
+                        GITHUB_GRAPHQL_BATCH_SIZE=options['batch_size'],
+                    ):
+                        urls = [f"https://github.com/{name}" for name in repos]
+                        try:
+                            result = self._run(options['mode'], urls, concurrency)
+                        finally:
+                            GitHubResponseCache.objects.filter(url__startswith=server.url).delete()
+                        result.update({
+                            'mode': options['mode'],
+                            'repos': repo_count,
+                            'concurrency': concurrency,
+                            'http_requests': len(server.requests),
+                        })
+                        results.append(result)
+        finally:
+            # Put back the budget of the real GitHub account
+            GitHubRateLimit.objects.all().delete()
+            GitHubRateLimit.objects.bulk_create(saved_limits)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self._print_table(results)
+
+    def _run(self, mode, urls, concurrency):
+        """Fetch every url; returns wall time, throughput, latencies and errors"""
+        started = time.perf_counter()
+        if mode == 'async':
+            outcomes = asyncio.run(self._run_async(urls, concurrency))
+        elif mode == 'graphql':
+            handler = GitHubHandler()
+            batches = [[url for url, _ in batch]
+                       for batch in handler._batches({url: url for url in urls})]
+
+            def fetch_batch(batch):
+                start = time.perf_counter()
+                results = handler.fetch_many(batch)
+                elapsed = time.perf_counter() - start
+                return [(elapsed, result) for result in results.values()]
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = [item for batch in executor.map(fetch_batch, batches) for item in batch]
+        else:
+            handler = GitHubHandler()
+
+            def fetch(url):
+                start = time.perf_counter()
+                result = handler.fetch_repo_data(url)
+                return time.perf_counter() - start, result
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = list(executor.map(fetch, urls))
+        wall = time.perf_counter() - started
+
+        latencies = [elapsed for elapsed, _ in outcomes]
+        return {
+            'wall_seconds': round(wall, 3),
+            'repos_per_second': round(len(urls) / wall, 2) if wall else None,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+            'errors': sum(1 for _, result in outcomes if not result.get('success')),
+        }
+
+    async def _run_async(self, urls, concurrency):
+        handler = AsyncGitHubHandler()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                start = time.perf_counter()
+                result = await handler.fetch_repo_data(url)
+                return time.perf_counter() - start, result
+
+        try:
+            return await asyncio.gather(*(fetch(url) for url in urls))
+        finally:
+            await close_async_client()
+
+    def _print_table(self, results):
+        header = (f"{'mode':<8}{'repos':>7}{'conc':>6}{'wall s':>9}{'repos/s':>9}"
+                  f"{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'requests':>10}")
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in results:
+            self.stdout.write(
+                f"{row['mode']:<8}{row['repos']:>7}{row['concurrency']:>6}"
+                f"{row['wall_seconds']:>9}{row['repos_per_second']:>9}"
+                f"{row['p50_ms']:>9}{row['p99_ms']:>9}{row['errors']:>8}{row['http_requests']:>10}"
+            )
@@ -0,0 +1,40 @@
+"""
+Rebuild or check the materialized AssignmentStats rows
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from edutrack.models import Assignment
+from edutrack.stats import rebuild_stats, verify_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute AssignmentStats from the student repos, or with --verify report any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assignment', type=int, help="Only this assignment id")
+        parser.add_argument('--verify', action='store_true',
+                            help="Compare without writing; exit with an error on drift")
+
+    def handle(self, *args, **options):
+        assignments = Assignment.objects.order_by('id')
+        if options['assignment']:
+            assignments = assignments.filter(id=options['assignment'])
+
+        drifted = 0
+        checked = 0
+        for assignment_id, title in assignments.values_list('id', 'title'):
+            checked += 1
+            if options['verify']:
+                drift = verify_stats(assignment_id)
+            else:
+                drift = rebuild_stats(assignment_id)
+            if drift:
+                drifted += 1
+                self.stderr.write(f"{title} (#{assignment_id}): {', '.join(drift)}")
+
+        if options['verify']:
+            if drifted:
+                raise CommandError(f"{drifted} of {checked} assignments have stale stats")
+            self.stdout.write(self.style.SUCCESS(f"All {checked} assignments are up to date"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {checked} assignments, {drifted} had drifted"))
@@ -0,0 +1,41 @@
+"""
+Drain the analysis job queue, e.g. after the web process restarted mid-job
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from edutrack.jobs import requeue_stale_jobs, run_job
+from edutrack.models import AnalysisJob
+
+
+class Command(BaseCommand):
+    help = "Run every queued analysis job that is due, in this process"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requeue-running', action='store_true',
+                            help="Also restart jobs left 'running' by a process that died "
+                                 "(running for over ANALYSIS_STALE_AFTER seconds)")
+
+    def handle(self, *args, **options):
+        if options['requeue_running']:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} interrupted jobs")
+
+        due = AnalysisJob.objects.filter(status='queued').filter(
+            Q(run_after__isnull=True) | Q(run_after__lte=timezone.now())
+        ).order_by('created_at').values_list('id', flat=True)
+
+        counts = {'success': 0, 'queued': 0, 'failed': 0}
+        for job_id in list(due):
+            job = run_job(job_id)
+            if job is None:
+                continue  # claimed by a web worker meanwhile
+            counts[job.status] += 1
+            if job.status == 'failed':
+                self.stderr.write(f"{job.repo}: {job.error_message}")
+
+        self.stdout.write(self.style.SUCCESS(
+            "Succeeded {success}, deferred {queued}, failed {failed}".format(**counts)
+        ))
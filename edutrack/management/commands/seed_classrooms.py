@@ -0,0 +1,40 @@
+"""
+Fill the database with seeded, realistic classrooms for local profiling
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from edutrack.testing.seed import seed_classrooms
+
+
+class Command(BaseCommand):
+    help = ("Create TEACHERS x ASSIGNMENTS x REPOS of generated student repos, analyses "
+            "and analysis logs; the same --seed always produces the same data")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=1)
+        parser.add_argument('--assignments', type=int, default=3, help="Per teacher")
+        parser.add_argument('--repos', type=int, default=20, help="Per assignment")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--analyzed', type=float, default=0.7,
+                            help="Share of repos that have an analysis (default: 0.7)")
+        parser.add_argument('--password',
+                            help="Password for the generated teachers (default: none, login disabled)")
+
+    def handle(self, *args, **options):
+        prefix = f"seed{options['seed']}-"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Seed {options['seed']} is already loaded; pick another --seed")
+
+        teachers = seed_classrooms(
+            teachers=options['teachers'],
+            assignments=options['assignments'],
+            repos=options['repos'],
+            seed=options['seed'],
+            analyzed=options['analyzed'],
+            password=options['password'],
+        )
+        total = options['teachers'] * options['assignments'] * options['repos']
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total} repos for {', '.join(t.username for t in teachers)}"
+        ))
@@ -0,0 +1,47 @@
+"""
+Nightly refresh: re-analyze every student repo that changed since its last analysis
+"""
+from django.core.management.base import BaseCommand
+
+from edutrack.analysis import analyze_student_repo, analyze_student_repos
+from edutrack.models import StudentRepo
+
+
+class Command(BaseCommand):
+    help = "Re-analyze student repositories that were pushed to since their last analysis"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assignment', type=int, help="Only sync repos of this assignment id")
+        parser.add_argument('--force', action='store_true',
+                            help="Re-analyze every repo, even when unchanged")
+        parser.add_argument('--batch', action='store_true',
+                            help="Analyze several repos per Gemini prompt")
+
+    def handle(self, *args, **options):
+        repos = StudentRepo.objects.select_related('assignment')
+        if options['assignment']:
+            repos = repos.filter(assignment_id=options['assignment'])
+
+        if options['batch']:
+            repos = list(repos)
+            results = analyze_student_repos(repos, force=options['force'])
+            outcomes = [(repo, results[repo.id]) for repo in repos]
+        else:
+            outcomes = ((repo, analyze_student_repo(repo, force=options['force'])) for repo in repos)
+
+        counts = {'analyzed': 0, 'skipped': 0, 'deferred': 0, 'failed': 0}
+        for repo, result in outcomes:
+            if result.get('skipped'):
+                counts['skipped'] += 1
+            elif result.get('deferred'):
+                counts['deferred'] += 1
+                self.stderr.write(f"{repo}: deferred until {result.get('retry_at')}")
+            elif result.get('success'):
+                counts['analyzed'] += 1
+            else:
+                counts['failed'] += 1
+                self.stderr.write(f"{repo}: {result.get('error')}")
+
+        self.stdout.write(self.style.SUCCESS(
+            "Analyzed {analyzed}, unchanged {skipped}, deferred {deferred}, failed {failed}".format(**counts)
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0002_githubresponsecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubresponsecache',
+            name='link',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
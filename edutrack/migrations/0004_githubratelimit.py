@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0003_githubresponsecache_link'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubRateLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=50, unique=True)),
+                ('limit', models.IntegerField(default=60)),
+                ('remaining', models.IntegerField(default=60)),
+                ('reset_at', models.DateTimeField(blank=True, null=True)),
+                ('tokens', models.FloatField(default=0)),
+                ('tokens_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
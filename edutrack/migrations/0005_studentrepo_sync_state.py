@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0004_githubratelimit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentrepo',
+            name='head_sha',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='studentrepo',
+            name='pushed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0006_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='batch',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0008_geminianalysiscache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysislog',
+            name='escalation_reason',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='analysislog',
+            name='model_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='analysislog',
+            name='model_tier',
+            field=models.CharField(blank=True, choices=[('fast', 'Fast'), ('pro', 'Pro')], default='', max_length=10),
+        ),
+    ]
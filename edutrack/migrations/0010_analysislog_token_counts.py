@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0009_analysislog_model_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysislog',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysislog',
+            name='prompt_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysislog',
+            name='response_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0010_analysislog_token_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepoLanguage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(db_index=True, max_length=100)),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('repo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='language_rows', to='edutrack.studentrepo')),
+            ],
+            options={
+                'ordering': ['-bytes'],
+                'unique_together': {('repo', 'language')},
+            },
+        ),
+    ]
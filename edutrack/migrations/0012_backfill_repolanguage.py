@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:15
+
+from django.db import migrations
+
+
+def backfill_languages(apps, schema_editor):
+    """One RepoLanguage row per entry of every StudentRepo.languages"""
+    StudentRepo = apps.get_model('edutrack', 'StudentRepo')
+    RepoLanguage = apps.get_model('edutrack', 'RepoLanguage')
+    rows = []
+    for repo_id, languages in StudentRepo.objects.values_list('id', 'languages').iterator():
+        rows.extend(
+            RepoLanguage(repo_id=repo_id, language=language, bytes=bytes_count)
+            for language, bytes_count in (languages or {}).items()
+        )
+        if len(rows) >= 1000:
+            RepoLanguage.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    RepoLanguage.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0011_repolanguage'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_languages, migrations.RunPython.noop),
+    ]
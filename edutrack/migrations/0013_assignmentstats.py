@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0012_backfill_repolanguage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_repos', models.IntegerField(default=0)),
+                ('analyzed_repos', models.IntegerField(default=0)),
+                ('total_commits', models.IntegerField(default=0)),
+                ('scored_repos', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('min_score', models.FloatField(blank=True, null=True)),
+                ('max_score', models.FloatField(blank=True, null=True)),
+                ('excellent', models.IntegerField(default=0)),
+                ('good', models.IntegerField(default=0)),
+                ('average', models.IntegerField(default=0)),
+                ('needs_improvement', models.IntegerField(default=0)),
+                ('language_bytes', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='edutrack.assignment')),
+            ],
+            options={
+                'verbose_name_plural': 'assignment stats',
+            },
+        ),
+    ]
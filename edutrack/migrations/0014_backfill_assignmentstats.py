@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:17
+
+from collections import defaultdict
+
+from django.db import migrations
+
+BUCKETS = (('excellent', 90, None), ('good', 75, 90), ('average', 60, 75), ('needs_improvement', None, 60))
+
+
+def backfill_stats(apps, schema_editor):
+    """One AssignmentStats row per assignment, totalled from its repos"""
+    Assignment = apps.get_model('edutrack', 'Assignment')
+    StudentRepo = apps.get_model('edutrack', 'StudentRepo')
+    AssignmentStats = apps.get_model('edutrack', 'AssignmentStats')
+
+    stats = {assignment_id: AssignmentStats(assignment_id=assignment_id, language_bytes={})
+             for assignment_id in Assignment.objects.values_list('id', flat=True)}
+    languages = defaultdict(lambda: defaultdict(int))
+    repos = StudentRepo.objects.values_list(
+        'assignment_id', 'commit_count', 'is_analyzed', 'performance_score', 'languages')
+    for assignment_id, commits, analyzed, score, repo_languages in repos.iterator():
+        row = stats[assignment_id]
+        row.total_repos += 1
+        row.analyzed_repos += int(analyzed)
+        row.total_commits += commits or 0
+        if analyzed and score is not None:
+            row.scored_repos += 1
+            row.score_sum += score
+            row.min_score = score if row.min_score is None else min(row.min_score, score)
+            row.max_score = score if row.max_score is None else max(row.max_score, score)
+            for name, low, high in BUCKETS:
+                if (low is None or score >= low) and (high is None or score < high):
+                    setattr(row, name, getattr(row, name) + 1)
+        for language, size in (repo_languages or {}).items():
+            languages[assignment_id][language] += size
+
+    for assignment_id, row in stats.items():
+        row.language_bytes = {lang: size for lang, size in languages[assignment_id].items() if size > 0}
+    AssignmentStats.objects.bulk_create(stats.values(), batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edutrack', '0013_assignmentstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
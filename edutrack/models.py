@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 
@@ -18,8 +18,53 @@ class Assignment(models.Model):
         return f"{self.title} - {self.teacher.username}"
 
 
+# StudentRepo fields that feed AssignmentStats
+STATS_FIELDS = {'assignment_id', 'commit_count', 'is_analyzed', 'performance_score', 'languages'}
+
+
+def _stats_values(values):
+    """values (field -> value, for some STATS_FIELDS) in the form AssignmentStats diffs use"""
+    values = dict(values)
+    if 'languages' in values:
+        values['languages'] = dict(values['languages'] or {})
+    return values
+
+
+class StudentRepoQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bulk updates send no signals, so when one writes a field AssignmentStats
+        is built from, the RepoLanguage rows and the stats of every assignment
+        involved are rebuilt here. bulk_update() goes through this as well;
+        bulk_create() does not (see edutrack.testing.seed for what to redo).
+        """
+        written = {'assignment_id' if name == 'assignment' else name for name in kwargs}
+        if written.isdisjoint(STATS_FIELDS):
+            return super().update(**kwargs)
+
+        from .stats import rebuild_stats
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('id', flat=True))
+            assignment_ids = set(self.values_list('assignment_id', flat=True))
+            rows = super().update(**kwargs)
+            repos = StudentRepo.objects.filter(id__in=ids)
+            assignment_ids.update(repos.values_list('assignment_id', flat=True))
+            if 'languages' in written:
+                for repo in repos.only('id', 'languages'):
+                    repo.sync_languages()
+            for assignment_id in sorted(assignment_ids):
+                rebuild_stats(assignment_id)
+        return rows
+
+
 class StudentRepo(models.Model):
-    """Model for student GitHub repositories"""
+    """
+    Model for student GitHub repositories
+
+    Saves and deletes keep RepoLanguage and AssignmentStats current through
+    the handlers in edutrack.signals; so do QuerySet.update() and
+    bulk_update() (StudentRepoQuerySet). bulk_create() bypasses all of them.
+    """
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='repos')
     student_name = models.CharField(max_length=100)
     repo_url = models.URLField()
@@ -31,6 +76,8 @@ class StudentRepo(models.Model):
     last_commit_message = models.TextField(blank=True, null=True)
     last_commit_date = models.DateTimeField(blank=True, null=True)
     contributors = models.JSONField(default=list)
+    head_sha = models.CharField(max_length=40, blank=True, default='')
+    pushed_at = models.DateTimeField(blank=True, null=True)
     
     # AI Analysis
     ai_summary = models.TextField(blank=True, null=True)
@@ -49,6 +96,86 @@ class StudentRepo(models.Model):
     def __str__(self):
         return f"{self.student_name} - {self.assignment.title}"
 
+    objects = StudentRepoQuerySet.as_manager()
+
+    def stats_snapshot(self, fields=STATS_FIELDS):
+        """The field values AssignmentStats totals are built from (only fields, if given)"""
+        return _stats_values({field: getattr(self, field) for field in fields})
+
+    def stored_stats_snapshot(self):
+        """
+        stats_snapshot() of the row as stored, locked until the transaction ends
+        None when the row does not exist (yet). On SQLite select_for_update()
+        is a no-op; there the IMMEDIATE transaction (edutrack.backends.sqlite3)
+        already holds the database's write lock.
+        """
+        if self.pk is None:
+            return None
+        row = (StudentRepo.objects.select_for_update()
+               .filter(pk=self.pk).values(*STATS_FIELDS).first())
+        return _stats_values(row) if row else None
+
+    def save(self, *args, **kwargs):
+        # The RepoLanguage and AssignmentStats updates made by the post_save
+        # handler (edutrack.signals) commit together with the row. They are
+        # diffed against the stored row read here under a lock, not against
+        # what this instance loaded, which may be long out of date. The
+        # transaction starts with the write lock on SQLite, so concurrent
+        # saves wait for each other rather than fail on the lock upgrade.
+        with transaction.atomic():
+            self._stats_before = self.stored_stats_snapshot()
+            super().save(*args, **kwargs)
+
+    def sync_languages(self):
+        """Rewrite the RepoLanguage rows to match the languages field (done on every save)"""
+        with transaction.atomic():
+            self.language_rows.all().delete()
+            RepoLanguage.objects.bulk_create([
+                RepoLanguage(repo=self, language=language, bytes=bytes_count)
+                for language, bytes_count in (self.languages or {}).items()
+            ])
+
+
+class RepoLanguage(models.Model):
+    """Bytes of code per language in a repo, mirroring StudentRepo.languages for SQL aggregation"""
+    repo = models.ForeignKey(StudentRepo, on_delete=models.CASCADE, related_name='language_rows')
+    language = models.CharField(max_length=100, db_index=True)
+    bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-bytes']
+        unique_together = ['repo', 'language']
+
+    def __str__(self):
+        return f"{self.language} ({self.bytes} bytes) - {self.repo.student_name}"
+
+
+class AssignmentStats(models.Model):
+    """
+    Per-assignment totals, kept current as repos are added, analyzed and
+    deleted (see edutrack.stats.apply_repo_change)
+    """
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, related_name='stats')
+    total_repos = models.IntegerField(default=0)
+    analyzed_repos = models.IntegerField(default=0)
+    total_commits = models.IntegerField(default=0)
+    scored_repos = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    min_score = models.FloatField(blank=True, null=True)
+    max_score = models.FloatField(blank=True, null=True)
+    excellent = models.IntegerField(default=0)
+    good = models.IntegerField(default=0)
+    average = models.IntegerField(default=0)
+    needs_improvement = models.IntegerField(default=0)
+    language_bytes = models.JSONField(default=dict)  # language -> bytes over all repos
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'assignment stats'
+
+    def __str__(self):
+        return f"Stats for {self.assignment.title}"
+
 
 class AnalysisLog(models.Model):
     """Log of AI analysis runs"""
@@ -60,9 +187,93 @@ class AnalysisLog(models.Model):
         ('pending', 'Pending')
     ])
     error_message = models.TextField(blank=True, null=True)
+    model_tier = models.CharField(max_length=10, blank=True, default='', choices=[
+        ('fast', 'Fast'),
+        ('pro', 'Pro')
+    ])
+    model_name = models.CharField(max_length=100, blank=True, default='')
+    escalation_reason = models.CharField(max_length=100, blank=True, default='')  # why pro was used
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    response_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)  # Gemini call time; empty when cached
 
     class Meta:
         ordering = ['-analysis_date']
 
     def __str__(self):
         return f"{self.repo.student_name} - {self.status} - {self.analysis_date}"
+
+
+class GitHubResponseCache(models.Model):
+    """Last GitHub API response per URL, replayed when GitHub answers 304 Not Modified"""
+    url = models.CharField(max_length=500, unique=True)
+    etag = models.CharField(max_length=200, blank=True, default='')
+    last_modified = models.CharField(max_length=100, blank=True, default='')
+    link = models.TextField(blank=True, default='')  # pagination header, not repeated on 304
+    body = models.JSONField(blank=True, null=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+
+class GitHubRateLimit(models.Model):
+    """GitHub rate-limit budget per API resource, shared by every worker process"""
+    resource = models.CharField(max_length=50, unique=True)  # "core", "graphql", ...
+    limit = models.IntegerField(default=60)
+    remaining = models.IntegerField(default=60)
+    reset_at = models.DateTimeField(blank=True, null=True)
+    tokens = models.FloatField(default=0)  # token bucket level used to pace requests
+    tokens_updated_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.resource}: {self.remaining}/{self.limit}"
+
+
+class AnalysisJob(models.Model):
+    """Background analysis of one repository, run by the in-process worker pool"""
+    repo = models.ForeignKey(StudentRepo, on_delete=models.CASCADE, related_name='analysis_jobs')
+    status = models.CharField(max_length=20, default='queued', choices=[
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('success', 'Success'),
+        ('failed', 'Failed')
+    ])
+    stage = models.CharField(max_length=50, blank=True, default='')
+    progress = models.IntegerField(default=0)  # percent
+    force = models.BooleanField(default=False)
+    batch = models.UUIDField(blank=True, null=True, db_index=True)  # set by bulk analyze
+    log = models.ForeignKey(AnalysisLog, on_delete=models.SET_NULL, blank=True, null=True,
+                            related_name='jobs')
+    result = models.JSONField(default=dict, blank=True)
+    error_message = models.TextField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(blank=True, null=True)  # set when deferred by rate limits
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.repo.student_name} - {self.status} ({self.progress}%)"
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+
+class GeminiAnalysisCache(models.Model):
+    """Parsed Gemini analysis per model + prompt, reused instead of calling the model again"""
+    key = models.CharField(max_length=64, unique=True)  # sha256 of model name and prompt
+    model_name = models.CharField(max_length=100)
+    analysis = models.JSONField(default=dict)
+    raw_response = models.TextField(blank=True, default='')
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name} {self.key[:12]}"
@@ -0,0 +1,52 @@
+"""
+Keep RepoLanguage rows and AssignmentStats current as student repos are saved and deleted
+
+Each change is diffed against the stored row, read under a lock in the
+same transaction (StudentRepo.save, and pre_delete here), so concurrent
+writers of one repo never apply the same old values twice. On SQLite the
+lock is the write lock the IMMEDIATE transaction takes as it begins. Bulk updates
+are handled by StudentRepoQuerySet.update instead.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import StudentRepo
+from .stats import apply_repo_change, rebuild_stats
+
+
+@receiver(post_save, sender=StudentRepo)
+def update_stats_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return  # loaddata; run rebuild_assignment_stats afterwards
+    if not hasattr(instance, '_stats_before'):
+        # Saved without StudentRepo.save (save_base): the old values are unknown
+        instance.sync_languages()
+        rebuild_stats(instance.assignment_id)
+        return
+
+    old = instance._stats_before
+    if old is not None and update_fields is not None:
+        # Fields left out of update_fields keep their stored values
+        written = {'assignment_id' if name == 'assignment' else name for name in update_fields}
+        new = dict(old, **instance.stats_snapshot(written & set(old)))
+    else:
+        new = instance.stats_snapshot()
+
+    if old is None or old['languages'] != new['languages']:
+        instance.sync_languages()
+    apply_repo_change(old, new)
+    del instance._stats_before
+
+
+@receiver(pre_delete, sender=StudentRepo)
+def lock_repo_before_delete(sender, instance, **kwargs):
+    # Deletes run in the Collector's transaction, so the row stays locked until post_delete
+    instance._stats_before = instance.stored_stats_snapshot()
+
+
+@receiver(post_delete, sender=StudentRepo)
+def update_stats_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, '_stats_before', None)
+    if old is not None:
+        apply_repo_change(old, None)
+        del instance._stats_before
@@ -0,0 +1,264 @@
+"""
+Assignment statistics shared by the assignment, analytics and report views
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import AssignmentStats, RepoLanguage, StudentRepo
+
+
+# Score distribution buckets: (name, lowest score, highest score exclusive)
+SCORE_BUCKETS = (
+    ('excellent', 90, None),
+    ('good', 75, 90),
+    ('average', 60, 75),
+    ('needs_improvement', None, 60),
+)
+
+SCORED = Q(is_analyzed=True, performance_score__isnull=False)
+
+
+# AssignmentStats fields that are plain sums of per-repo contributions
+SUMMED_FIELDS = (
+    'total_repos', 'analyzed_repos', 'total_commits', 'scored_repos', 'score_sum',
+) + tuple(name for name, _, _ in SCORE_BUCKETS)
+
+
+def _bucket_filter(low, high):
+    condition = SCORED
+    if low is not None:
+        condition &= Q(performance_score__gte=low)
+    if high is not None:
+        condition &= Q(performance_score__lt=high)
+    return condition
+
+
+def completion_percentage(analyzed, total):
+    """Share of repos analyzed, as a percentage rounded to one decimal"""
+    return round(analyzed / total * 100, 1) if total else 0
+
+
+def repo_stats(repos):
+    """
+    Totals, averages, min/max and score buckets for a StudentRepo queryset
+
+    Everything comes from a single aggregate() with conditional counts.
+    Scores only count for analyzed repos that have one; avg/max/min_score
+    are None when there are none.
+    """
+    row = repos.aggregate(
+        total_repos=Count('id'),
+        analyzed_repos=Count('id', filter=Q(is_analyzed=True)),
+        total_commits=Coalesce(Sum('commit_count'), 0),
+        scored_repos=Count('id', filter=SCORED),
+        score_sum=Coalesce(Sum('performance_score', filter=SCORED), 0.0),
+        avg_score=Avg('performance_score', filter=SCORED),
+        max_score=Max('performance_score', filter=SCORED),
+        min_score=Min('performance_score', filter=SCORED),
+        **{
+            name: Count('id', filter=_bucket_filter(low, high))
+            for name, low, high in SCORE_BUCKETS
+        }
+    )
+
+    total = row['total_repos']
+    row['pending_repos'] = total - row['analyzed_repos']
+    row['avg_commits'] = round(row['total_commits'] / total, 1) if total else 0
+    row['completion_percentage'] = completion_percentage(row['analyzed_repos'], total)
+    if row['avg_score'] is not None:
+        row['avg_score'] = round(row['avg_score'], 1)
+    return row
+
+
+def language_summary(repos, limit=None):
+    """
+    Language usage over the repos, grouped and summed by the database
+
+    Returns {'total_languages', 'total_bytes', 'languages'}, languages being
+    the most used ones as [{'language', 'percentage', 'bytes'}], at most
+    limit entries. limit=0 skips that query and returns just the totals.
+    """
+    rows = RepoLanguage.objects.filter(repo__in=repos.values('id'))
+    summary = rows.aggregate(
+        total_languages=Count('language', distinct=True),
+        total_bytes=Coalesce(Sum('bytes'), 0),
+    )
+
+    summary['languages'] = []
+    total_bytes = summary['total_bytes']
+    if total_bytes and limit != 0:
+        grouped = rows.values('language').annotate(
+            language_bytes=Sum('bytes')
+        ).order_by('-language_bytes', 'language')
+        summary['languages'] = [
+            {
+                'language': row['language'],
+                'percentage': round(row['language_bytes'] / total_bytes * 100, 1),
+                'bytes': row['language_bytes'],
+            }
+            for row in (grouped[:limit] if limit else grouped)
+        ]
+    return summary
+
+
+def _score_bucket(score):
+    for name, low, high in SCORE_BUCKETS:
+        if (low is None or score >= low) and (high is None or score < high):
+            return name
+
+
+def _contribution(snapshot):
+    """What one repo, as a StudentRepo.stats_snapshot(), adds to each summed field"""
+    values = dict.fromkeys(SUMMED_FIELDS, 0)
+    if snapshot is None:
+        return values
+    values['total_repos'] = 1
+    values['analyzed_repos'] = int(snapshot['is_analyzed'])
+    values['total_commits'] = snapshot['commit_count'] or 0
+    score = snapshot['performance_score']
+    if snapshot['is_analyzed'] and score is not None:
+        values['scored_repos'] = 1
+        values['score_sum'] = score
+        values[_score_bucket(score)] = 1
+    return values
+
+
+def _scored_value(snapshot):
+    if snapshot and snapshot['is_analyzed']:
+        return snapshot['performance_score']
+    return None
+
+
+def apply_repo_change(old, new):
+    """
+    Update AssignmentStats for one repo going from snapshot old to new
+
+    old is None for a new repo, new is None for a deleted one. Sums, bucket
+    counts and language bytes move by the difference; min/max are rescanned
+    only when the repo held one of them. Runs in the caller's transaction
+    (StudentRepo.save and deletes open one). A deleted assignment's row is
+    never recreated.
+    """
+    if old == new:
+        return
+    if old and new and old['assignment_id'] != new['assignment_id']:
+        apply_repo_change(old, None)
+        apply_repo_change(None, new)
+        return
+
+    assignment_id = (new or old)['assignment_id']
+    with transaction.atomic():
+        rows = AssignmentStats.objects.select_for_update()
+        if new is None:
+            stats = rows.filter(assignment_id=assignment_id).first()
+            if stats is None:
+                return
+        else:
+            stats, _ = rows.get_or_create(assignment_id=assignment_id)
+
+        before, after = _contribution(old), _contribution(new)
+        for field in SUMMED_FIELDS:
+            setattr(stats, field, getattr(stats, field) + after[field] - before[field])
+
+        languages = Counter(stats.language_bytes)
+        languages.update(new['languages'] if new else {})
+        languages.subtract(old['languages'] if old else {})
+        stats.language_bytes = {lang: size for lang, size in languages.items() if size > 0}
+
+        old_score, new_score = _scored_value(old), _scored_value(new)
+        if old_score is not None and old_score in (stats.min_score, stats.max_score):
+            extremes = StudentRepo.objects.filter(SCORED, assignment_id=assignment_id).aggregate(
+                min_score=Min('performance_score'), max_score=Max('performance_score'))
+            stats.min_score, stats.max_score = extremes['min_score'], extremes['max_score']
+        elif new_score is not None:
+            stats.min_score = new_score if stats.min_score is None else min(stats.min_score, new_score)
+            stats.max_score = new_score if stats.max_score is None else max(stats.max_score, new_score)
+
+        stats.save()
+
+
+def compute_stats(assignment_id):
+    """The AssignmentStats field values for an assignment, computed from its repos"""
+    repos = StudentRepo.objects.filter(assignment_id=assignment_id)
+    fields = repo_stats(repos)
+    values = {field: fields[field] for field in SUMMED_FIELDS + ('min_score', 'max_score')}
+    values['language_bytes'] = {
+        row['language']: row['bytes']
+        for row in language_summary(repos)['languages'] if row['bytes'] > 0
+    }
+    return values
+
+
+def rebuild_stats(assignment_id, create=True):
+    """
+    Recompute an assignment's AssignmentStats row from its repos
+    Returns the field names whose stored value was out of date.
+    """
+    values = compute_stats(assignment_id)
+    with transaction.atomic():
+        rows = AssignmentStats.objects.select_for_update()
+        if create:
+            stats, _ = rows.get_or_create(assignment_id=assignment_id)
+        else:
+            stats = rows.filter(assignment_id=assignment_id).first()
+            if stats is None:
+                return []
+        drift = [field for field, value in values.items() if not _same(getattr(stats, field), value)]
+        if drift:
+            for field, value in values.items():
+                setattr(stats, field, value)
+            stats.save()
+    return drift
+
+
+def verify_stats(assignment_id):
+    """Field names where the stored AssignmentStats differ from a fresh computation"""
+    values = compute_stats(assignment_id)
+    stats = AssignmentStats.objects.filter(assignment_id=assignment_id).first() or AssignmentStats()
+    return [field for field, value in values.items() if not _same(getattr(stats, field), value)]
+
+
+def _same(stored, fresh):
+    if isinstance(fresh, float) or isinstance(stored, float):
+        return stored is not None and fresh is not None and abs(stored - fresh) < 1e-6
+    return stored == fresh
+
+
+def assignment_stats(assignment):
+    """
+    The materialized statistics of an assignment, shaped like repo_stats()
+    plus total_languages and languages (language_summary's list, complete)
+    One query, whatever the class size.
+    """
+    stats = AssignmentStats.objects.filter(assignment=assignment).first() or AssignmentStats()
+    return stats_from_row(stats)
+
+
+def stats_from_row(stats):
+    """repo_stats()-shaped dict from an AssignmentStats row"""
+    total = stats.total_repos
+    values = {field: getattr(stats, field) for field in SUMMED_FIELDS}
+    values.update(
+        min_score=stats.min_score,
+        max_score=stats.max_score,
+        avg_score=round(stats.score_sum / stats.scored_repos, 1) if stats.scored_repos else None,
+        pending_repos=total - stats.analyzed_repos,
+        avg_commits=round(stats.total_commits / total, 1) if total else 0,
+        completion_percentage=completion_percentage(stats.analyzed_repos, total),
+    )
+
+    languages = Counter(stats.language_bytes)
+    total_bytes = sum(languages.values())
+    values['total_languages'] = len(languages)
+    values['languages'] = [
+        {
+            'language': lang,
+            'percentage': round(size / total_bytes * 100, 1),
+            'bytes': size,
+        }
+        for lang, size in sorted(languages.items(), key=lambda item: (-item[1], item[0]))
+    ]
+    return values
@@ -0,0 +1,410 @@
+"""
+Local stand-in for the GitHub API, for tests and offline benchmarks
+
+Serves the REST endpoints GitHubHandler reads and the GraphQL endpoint
+used by GitHubHandler.fetch_many from an in-memory set of repositories:
+
+    repos = {
+        "owner/name": {
+            "info": {...},          # /repos/{name} payload
+            "commits": [...],       # /repos/{name}/commits payload, newest first
+            "languages": {...},     # language -> bytes
+            "readme": "...",        # README text (served base64 encoded)
+            "contributors": [...],  # /repos/{name}/contributors payload
+        },
+    }
+
+Repositories can be generated with make_repo, or replayed from a fixture
+file captured from the real API with record_fixtures. The server can add
+latency, answer conditional requests with ETags, enforce a rate-limit
+budget with GitHub's X-RateLimit-* headers, and inject 5xx errors.
+
+Usage:
+    with GitHubStandInServer(repos, latency=0.05, rate_limit=5000) as server:
+        handler = GitHubHandler()
+        handler.base_url = server.url
+"""
+import base64
+import copy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+
+REPO_PATH = re.compile(r"^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)(?P<rest>/.*)?$")
+GRAPHQL_REPO = re.compile(
+    r'(?P<alias>\w+):\s*repository\(owner:\s*"(?P<owner>[^"]*)",\s*name:\s*"(?P<name>[^"]*)"\)'
+)
+
+# Sample student repositories in the record_fixtures format, shipped with the stand-in
+DEFAULT_FIXTURES = Path(__file__).parent / "fixtures" / "github_repos.json"
+
+RATE_LIMIT_WINDOW = 3600
+
+
+def make_repo(name, commit_count=3, languages=None, readme="# Project", contributors=None):
+    """Build a stand-in repository fixture with generated commits"""
+    owner, repo = name.split("/", 1)
+    contributors = contributors or [{"login": owner, "contributions": commit_count}]
+    return {
+        "info": {
+            "name": repo,
+            "full_name": name,
+            "description": f"Stand-in repository {name}",
+            "created_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-02T00:00:00Z",
+            "pushed_at": "2025-01-02T00:00:00Z",
+            "stargazers_count": 0,
+            "forks_count": 0,
+            "default_branch": "main",
+        },
+        "commits": [
+            {
+                "sha": f"{index:040x}",
+                "commit": {
+                    "message": f"Commit {index}",
+                    "author": {"name": owner, "date": f"2025-01-{(index % 28) + 1:02d}T12:00:00Z"},
+                },
+                "author": {"login": owner},
+            }
+            for index in range(commit_count, 0, -1)
+        ],
+        "languages": languages if languages is not None else {"Python": 1200, "HTML": 300},
+        "readme": readme,
+        "contributors": contributors,
+    }
+
+
+def load_fixtures(path=DEFAULT_FIXTURES):
+    """Load recorded repositories from a JSON fixture file"""
+    with open(path, encoding="utf-8") as fixture_file:
+        return json.load(fixture_file)
+
+
+def save_fixtures(repos, path):
+    with open(path, "w", encoding="utf-8") as fixture_file:
+        json.dump(repos, fixture_file, indent=1, sort_keys=True)
+
+
+def record_fixtures(repo_names, token=None, base_url="https://api.github.com", max_commits=300):
+    """
+    Capture the REST payloads of real repositories in the stand-in format
+    Up to max_commits commits are kept per repository
+    """
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if token:
+        headers["Authorization"] = f"token {token}"
+    session = requests.Session()
+    session.headers.update(headers)
+
+    def get(path, **params):
+        response = session.get(f"{base_url}{path}", params=params, timeout=30)
+        return response.json() if response.status_code == 200 else None
+
+    repos = {}
+    for name in repo_names:
+        commits = []
+        page = 1
+        while len(commits) < max_commits:
+            batch = get(f"/repos/{name}/commits", per_page=100, page=page) or []
+            commits.extend(batch)
+            if len(batch) < 100:
+                break
+            page += 1
+        readme = get(f"/repos/{name}/readme")
+        repos[name] = {
+            "info": get(f"/repos/{name}") or {},
+            "commits": commits[:max_commits],
+            "languages": get(f"/repos/{name}/languages") or {},
+            "readme": base64.b64decode(readme["content"]).decode("utf-8", "replace")
+            if readme else "",
+            "contributors": get(f"/repos/{name}/contributors", per_page=100) or [],
+        }
+    return repos
+
+
+def scale_fixtures(fixtures, count):
+    """Make count distinct repositories by cycling through the fixture repositories"""
+    templates = list(fixtures.values())
+    repos = {}
+    for index in range(count):
+        repo = copy.deepcopy(templates[index % len(templates)])
+        name = f"student{index}/{repo['info'].get('name') or 'project'}"
+        repo["info"]["full_name"] = name
+        repos[name] = repo
+    return repos
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        self.server.stand_in.record("GET", parsed.path)
+        self._respond(lambda: self.server.stand_in.rest_response(
+            parsed.path, parse_qs(parsed.query)), "core")
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        self.server.stand_in.record("POST", parsed.path)
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if parsed.path != "/graphql":
+            self._send(404, {"message": "Not Found"})
+            return
+        self._respond(lambda: (200, self.server.stand_in.graphql_response(
+            payload.get("query", "")), {}), "graphql", conditional=False)
+
+    def _respond(self, build, resource, conditional=True):
+        stand_in = self.server.stand_in
+        stand_in.delay()
+
+        if stand_in.inject_error():
+            self._send(stand_in.error_status, {"message": "Server Error"})
+            return
+
+        status, body, headers = build()
+        headers = dict(headers)
+        data = json.dumps(body).encode("utf-8")
+
+        if conditional and stand_in.etags and status == 200:
+            etag = f'"{hashlib.sha1(data).hexdigest()}"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                # Conditional hits are not charged against the budget
+                headers.update(stand_in.rate_limit_headers(resource))
+                self._send(304, None, headers)
+                return
+
+        allowed, rate_headers = stand_in.charge(resource)
+        headers.update(rate_headers)
+        if not allowed:
+            self._send(403, {"message": "API rate limit exceeded"}, headers)
+            return
+        self._send(status, body, headers, data)
+
+    def _send(self, status, body, headers=None, data=None):
+        if status == 304:
+            data = b""
+        elif data is None:
+            data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        if data:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class GitHubStandInServer:
+    """
+    In-process HTTP server answering like api.github.com for a fixed set of repos
+
+    latency:      seconds added to every response, or a (low, high) range
+    rate_limit:   requests allowed per resource and window, None for unlimited
+    error_rate:   fraction of requests answered with error_status
+    etags:        send ETags and answer If-None-Match with 304
+    """
+
+    def __init__(self, repos, host="127.0.0.1", port=0, latency=0.0, rate_limit=None,
+                 error_rate=0.0, error_status=502, etags=True, seed=None):
+        self.repos = repos
+        self.requests = []
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.etags = etags
+        self._random = random.Random(seed)
+        self._budgets = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+
+    def delay(self):
+        if isinstance(self.latency, (tuple, list)):
+            with self._lock:
+                seconds = self._random.uniform(*self.latency)
+        else:
+            seconds = self.latency
+        if seconds:
+            time.sleep(seconds)
+
+    def inject_error(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _budget(self, resource):
+        """[remaining, reset timestamp] for resource, starting a new window when due"""
+        budget = self._budgets.get(resource)
+        if budget is None or budget[1] <= time.time():
+            budget = self._budgets[resource] = [self.rate_limit, int(time.time()) + RATE_LIMIT_WINDOW]
+        return budget
+
+    def rate_limit_headers(self, resource):
+        if self.rate_limit is None:
+            return {}
+        with self._lock:
+            remaining, reset = self._budget(resource)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset),
+            "X-RateLimit-Resource": resource,
+        }
+
+    def charge(self, resource):
+        """Spend one request of the budget; returns (allowed, rate-limit headers)"""
+        if self.rate_limit is None:
+            return True, {}
+        with self._lock:
+            budget = self._budget(resource)
+            allowed = budget[0] > 0
+            if allowed:
+                budget[0] -= 1
+        return allowed, self.rate_limit_headers(resource)
+
+    def rest_response(self, path, query):
+        """Return (status, body, headers) for a REST path"""
+        match = REPO_PATH.match(path)
+        repo = match and self.repos.get(f"{match['owner']}/{match['name']}")
+        if not repo:
+            return 404, {"message": "Not Found"}, {}
+
+        rest = match["rest"] or ""
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        if rest == "":
+            return 200, repo["info"], {}
+        if rest == "/commits":
+            start = (page - 1) * per_page
+            return 200, repo["commits"][start:start + per_page], self._pagination(
+                path, per_page, page, len(repo["commits"]))
+        if rest == "/languages":
+            return 200, repo["languages"], {}
+        if rest == "/readme":
+            if not repo.get("readme"):
+                return 404, {"message": "Not Found"}, {}
+            content = base64.b64encode(repo["readme"].encode("utf-8")).decode("ascii")
+            return 200, {"content": content, "encoding": "base64"}, {}
+        if rest == "/contributors":
+            return 200, repo["contributors"][:per_page], {}
+        return 404, {"message": "Not Found"}, {}
+
+    def _pagination(self, path, per_page, page, total):
+        """GitHub-style Link header for a paginated list"""
+        last = max((total + per_page - 1) // per_page, 1)
+        if last == 1:
+            return {}
+        links = []
+        if page < last:
+            links.append(f'<{self.url}{path}?per_page={per_page}&page={page + 1}>; rel="next"')
+            links.append(f'<{self.url}{path}?per_page={per_page}&page={last}>; rel="last"')
+        if page > 1:
+            links.append(f'<{self.url}{path}?per_page={per_page}&page=1>; rel="first"')
+            links.append(f'<{self.url}{path}?per_page={per_page}&page={page - 1}>; rel="prev"')
+        return {"Link": ", ".join(links)}
+
+    def graphql_response(self, query):
+        """Answer an aliased multi-repository query with every field GitHubHandler asks for"""
+        data = {}
+        errors = []
+        for match in GRAPHQL_REPO.finditer(query):
+            name = f"{match['owner']}/{match['name']}"
+            repo = self.repos.get(name)
+            if repo is None:
+                data[match["alias"]] = None
+                errors.append({"type": "NOT_FOUND", "path": [match["alias"]],
+                               "message": f"Could not resolve to a Repository with the name '{name}'."})
+                continue
+            data[match["alias"]] = self._graphql_node(repo)
+
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        return body
+
+    def _graphql_node(self, repo):
+        info = repo["info"]
+        readme = {"text": repo["readme"]} if repo.get("readme") else None
+        return {
+            "name": info["name"],
+            "description": info.get("description"),
+            "createdAt": info.get("created_at"),
+            "updatedAt": info.get("updated_at"),
+            "pushedAt": info.get("pushed_at"),
+            "stargazerCount": info.get("stargazers_count", 0),
+            "forkCount": info.get("forks_count", 0),
+            "defaultBranchRef": {
+                "name": info.get("default_branch", "main"),
+                "target": {
+                    "oid": repo["commits"][0]["sha"] if repo["commits"] else None,
+                    "history": {
+                        "totalCount": len(repo["commits"]),
+                        "nodes": [
+                            {
+                                "oid": commit["sha"],
+                                "message": commit["commit"]["message"],
+                                "committedDate": commit["commit"]["author"]["date"],
+                                "author": {
+                                    "name": commit["commit"]["author"]["name"],
+                                    "user": commit.get("author"),
+                                },
+                            }
+                            for commit in repo["commits"][:10]
+                        ],
+                    },
+                },
+            },
+            "languages": {
+                "edges": [
+                    {"size": size, "node": {"name": language}}
+                    for language, size in sorted(repo["languages"].items(),
+                                                 key=lambda item: item[1], reverse=True)
+                ]
+            },
+            "readmeMd": readme,
+            "readmeLower": None,
+            "readmePlain": None,
+        }
@@ -0,0 +1,183 @@
+"""
+Seeded fixture generator for realistic classrooms, for tests and local profiling
+
+Creates N teachers x M assignments x K student repos with GitHub-shaped
+languages, Gemini-shaped analyses and AnalysisLog history:
+
+    teachers = seed_classrooms(teachers=2, assignments=5, repos=40, seed=1)
+
+The same arguments always produce the same data. Rows are written with
+bulk_create, so the StudentRepo signals do not fire; RepoLanguage rows are
+created alongside and AssignmentStats are rebuilt at the end, leaving the
+database as it would be after adding and analyzing every repo by hand.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from edutrack.models import AnalysisLog, Assignment, RepoLanguage, StudentRepo
+from edutrack.stats import rebuild_stats
+
+
+# (language, relative popularity, typical bytes) for intro programming courses
+LANGUAGES = (
+    ("Python", 30, 40000),
+    ("JavaScript", 20, 30000),
+    ("HTML", 18, 12000),
+    ("CSS", 15, 8000),
+    ("Java", 10, 50000),
+    ("Jupyter Notebook", 8, 120000),
+    ("TypeScript", 6, 35000),
+    ("C++", 5, 25000),
+    ("Shell", 5, 1500),
+    ("Dockerfile", 3, 600),
+)
+
+FIRST_NAMES = ("Ada", "Grace", "Alan", "Linus", "Barbara", "Ken", "Margaret", "Dennis",
+               "Frances", "Guido", "Radia", "Tim", "Hedy", "John", "Katherine", "Edsger")
+LAST_NAMES = ("Lovelace", "Hopper", "Turing", "Torvalds", "Liskov", "Thompson", "Hamilton",
+              "Ritchie", "Allen", "Rossum", "Perlman", "Berners-Lee", "Lamarr", "Backus")
+
+STRENGTHS = ("Clear module structure", "Consistent naming", "Good test coverage",
+             "Helpful README with setup steps", "Small, focused commits",
+             "Sensible use of the standard library", "Input validation on user data")
+IMPROVEMENTS = ("Add unit tests for edge cases", "Split the main script into functions",
+                "Document how to run the project", "Remove committed build artifacts",
+                "Handle errors instead of printing them", "Use descriptive commit messages")
+COMMIT_MESSAGES = ("Add tests", "Fix off-by-one in pagination", "Update README",
+                   "Refactor data loading", "Initial commit", "Handle empty input")
+
+MODELS = {"fast": "gemini-2.5-flash", "pro": "gemini-2.5-pro"}
+
+
+def _languages(rng):
+    """language -> bytes for one repo, like GitHub's /languages endpoint"""
+    names = [name for name, _, _ in LANGUAGES]
+    weights = [weight for _, weight, _ in LANGUAGES]
+    sizes = {name: size for name, _, size in LANGUAGES}
+    picked = set(rng.choices(names, weights=weights, k=rng.randint(1, 4)))
+    return {name: int(sizes[name] * rng.uniform(0.1, 2.0)) for name in picked}
+
+
+def _score(rng):
+    return round(min(100, max(20, rng.gauss(74, 12))), 1)
+
+
+def _summary(rng, name, languages, score):
+    """An analysis in the layout GeminiHandler writes to ai_summary"""
+    main = max(languages, key=languages.get) if languages else "an unknown language"
+
+    def bullets(options):
+        return "\n".join(f"- {value}" for value in rng.sample(options, 3))
+
+    return f"""**1. Summary:**
+{name}'s project is written mostly in {main}. It implements the assignment's core \
+features and includes {rng.randint(2, 30)} source files. The history shows steady \
+progress, with a few large commits near the deadline.
+
+**2. Strengths:**
+{bullets(STRENGTHS)}
+
+**3. Areas for Improvement:**
+{bullets(IMPROVEMENTS)}
+
+**4. Performance Score:** {score}/100
+
+**5. Recommendations:**
+{bullets(IMPROVEMENTS)}
+"""
+
+
+def _logs(rng, repo, count, analyzed, now):
+    """count AnalysisLog rows for repo, the newest matching its analyzed state"""
+    logs = []
+    for n in range(count):
+        newest = n == count - 1
+        if newest:
+            status = "success" if analyzed else rng.choice(("failed", "pending"))
+        elif analyzed:
+            status = rng.choices(("success", "failed"), weights=(4, 1))[0]
+        else:
+            status = "failed"
+        tier = rng.choices(("fast", "pro"), weights=(3, 1))[0]
+        done = status != "pending"
+        logs.append(AnalysisLog(
+            repo=repo,
+            status=status,
+            error_message="429 Resource has been exhausted" if status == "failed" else None,
+            model_tier=tier if done else "",
+            model_name=MODELS[tier] if done else "",
+            escalation_reason="borderline score" if done and tier == "pro" else "",
+            prompt_tokens=rng.randint(400, 1500) if done else None,
+            response_tokens=rng.randint(150, 600) if status == "success" else None,
+            latency_ms=rng.randint(800, 9000) if done else None,
+        ))
+    return logs
+
+
+@transaction.atomic
+def seed_classrooms(teachers=1, assignments=3, repos=20, seed=0, analyzed=0.7,
+                    logs_per_repo=(1, 3), password=None):
+    """
+    Create teachers x assignments x repos of realistic data; returns the teachers
+
+    analyzed is the share of repos with an analysis and score; logs_per_repo
+    the (min, max) AnalysisLog rows per repo. Usernames are
+    seed{seed}-teacher{n}, so several seeds can share a database. Teachers
+    get password when given and an unusable one otherwise.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = []
+
+    for t in range(teachers):
+        teacher = User.objects.create_user(f"seed{seed}-teacher{t}", password=password)
+        created.append(teacher)
+
+        for a in range(assignments):
+            assignment = Assignment.objects.create(
+                teacher=teacher,
+                title=f"Project {a + 1}",
+                description=f"Build and document a small application ({a + 1} of {assignments}).",
+                deadline=now + timedelta(days=rng.randint(-30, 30)),
+            )
+
+            rows = []
+            for r in range(repos):
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                languages = _languages(rng)
+                is_analyzed = rng.random() < analyzed
+                score = _score(rng) if is_analyzed else None
+                rows.append(StudentRepo(
+                    assignment=assignment,
+                    student_name=name,
+                    repo_url=f"https://github.com/student{t}-{a}-{r}/project-{a + 1}",
+                    commit_count=rng.randint(0, 120),
+                    languages=languages,
+                    readme_content=f"# Project {a + 1}\n\nBy {name}.",
+                    last_commit_message=rng.choice(COMMIT_MESSAGES),
+                    last_commit_date=now - timedelta(hours=rng.randint(1, 24 * 60)),
+                    contributors=[{"login": f"student{t}-{a}-{r}",
+                                   "contributions": rng.randint(1, 120)}],
+                    is_analyzed=is_analyzed,
+                    performance_score=score,
+                    ai_summary=_summary(rng, name, languages, score) if is_analyzed else None,
+                    suggestions="\n".join(rng.sample(IMPROVEMENTS, 2)) if is_analyzed else None,
+                ))
+            rows = StudentRepo.objects.bulk_create(rows)
+
+            RepoLanguage.objects.bulk_create([
+                RepoLanguage(repo=repo, language=language, bytes=size)
+                for repo in rows for language, size in repo.languages.items()
+            ])
+            AnalysisLog.objects.bulk_create([
+                log
+                for repo in rows
+                for log in _logs(rng, repo, rng.randint(*logs_per_repo), repo.is_analyzed, now)
+            ])
+            rebuild_stats(assignment.id)
+
+    return created
@@ -24,6 +24,11 @@ urlpatterns = [
     # Repositories
     path('assignments/<int:assignment_id>/add-repo/', views.add_student_repo, name='add_student_repo'),
     path('assignments/<int:assignment_id>/bulk-add/', views.bulk_add_repos, name='bulk_add_repos'),
+    path('assignments/<int:assignment_id>/analyze/', views.analyze_assignment, name='analyze_assignment'),
+    path('assignments/<int:assignment_id>/analyze/<uuid:batch>/', views.analysis_batch_status, name='analysis_batch_status'),
     path('repo/<int:repo_id>/', views.repo_detail, name='repo_detail'),
     path('repo/<int:repo_id>/analyze/', views.analyze_repo, name='analyze_repo'),
+    path('repo/<int:repo_id>/analyze/stream/', views.stream_repo_analysis, name='stream_repo_analysis'),
+    path('jobs/<int:job_id>/', views.analysis_job_status, name='analysis_job_status'),
+    path('jobs/<int:job_id>/stream/', views.stream_analysis_job, name='stream_analysis_job'),
 ]
@@ -1,14 +1,28 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib import messages
-from django.http import JsonResponse
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
-from .models import Assignment, StudentRepo, AnalysisLog
+from .models import Assignment, StudentRepo, AnalysisLog, AnalysisJob
+from .jobs import batch_summary, enqueue_analysis, enqueue_assignment, stream_job
+from .stats import assignment_stats, completion_percentage
+from .api.gemini_limiter import get_gemini_limiter
 from .api.github_handler import GitHubHandler
-from .api.gemini_handler import GeminiHandler
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
 from datetime import datetime
+import asyncio
+import json
+import queue
+import threading
 
 
 def home(request):
@@ -73,36 +87,37 @@ def dashboard(request):
     
     assignments = Assignment.objects.filter(teacher=request.user)
     
-    # Calculate statistics
-    total_assignments = assignments.count()
-    total_repos = StudentRepo.objects.filter(assignment__teacher=request.user).count()
-    analyzed_repos = StudentRepo.objects.filter(assignment__teacher=request.user, is_analyzed=True).count()
+    # Calculate statistics from the AssignmentStats rows: one query for the totals...
+    totals = assignments.aggregate(
+        total_assignments=Count('id'),
+        total_repos=Coalesce(Sum('stats__total_repos'), 0),
+        analyzed_repos=Coalesce(Sum('stats__analyzed_repos'), 0),
+    )
+    total_repos = totals['total_repos']
+    analyzed_repos = totals['analyzed_repos']
     
-    # Annotate assignments with student count
-    from django.db.models import Count
+    # ...and one for the latest 10 assignments with their counts
     assignments_with_stats = assignments.annotate(
-        student_count=Count('repos')
-    ).order_by('-created_at')
+        student_count=Coalesce(F('stats__total_repos'), 0),
+        analyzed_count=Coalesce(F('stats__analyzed_repos'), 0),
+    ).order_by('-created_at')[:10]
     
-    # Add additional stats for each assignment
-    assignment_list = []
-    for assignment in assignments_with_stats[:10]:  # Latest 10 assignments
-        repos = StudentRepo.objects.filter(assignment=assignment)
-        analyzed_count = repos.filter(is_analyzed=True).count()
-        
-        assignment_data = {
+    assignment_list = [
+        {
             'assignment': assignment,
             'student_count': assignment.student_count,
-            'analyzed_count': analyzed_count,
-            'pending_count': assignment.student_count - analyzed_count,
-            'completion_percentage': round((analyzed_count / assignment.student_count * 100), 1) if assignment.student_count > 0 else 0,
+            'analyzed_count': assignment.analyzed_count,
+            'pending_count': assignment.student_count - assignment.analyzed_count,
+            'completion_percentage': completion_percentage(assignment.analyzed_count,
+                                                           assignment.student_count),
         }
-        assignment_list.append(assignment_data)
+        for assignment in assignments_with_stats
+    ]
     
     context = {
         'assignments': assignments[:5],  # For backward compatibility
         'assignment_list': assignment_list,
-        'total_assignments': total_assignments,
+        'total_assignments': totals['total_assignments'],
         'total_repos': total_repos,
         'analyzed_repos': analyzed_repos,
         'pending_analysis': total_repos - analyzed_repos,
@@ -115,7 +130,9 @@ def dashboard(request):
 @login_required
 def assignment_list(request):
     """List all assignments"""
-    assignments = Assignment.objects.filter(teacher=request.user)
+    assignments = Assignment.objects.filter(teacher=request.user).annotate(
+        repo_count=Coalesce(F('stats__total_repos'), 0)
+    )
     return render(request, 'assignment_list.html', {'assignments': assignments})
 
 
@@ -126,41 +143,8 @@ def assignment_detail(request, assignment_id):
     repos = StudentRepo.objects.filter(assignment=assignment)
     
     # Calculate statistics
-    total_repos = repos.count()
-    analyzed_repos = repos.filter(is_analyzed=True).count()
-    pending_repos = total_repos - analyzed_repos
-    
-    # Commit statistics
-    total_commits = sum(repo.commit_count for repo in repos)
-    avg_commits = round(total_commits / total_repos, 1) if total_repos > 0 else 0
-    
-    # Debug output
-    print(f"\n=== Assignment Detail Stats Debug ===")
-    print(f"Assignment: {assignment.title}")
-    print(f"Total repos: {total_repos}")
-    print(f"Analyzed repos: {analyzed_repos}")
-    print(f"Total commits: {total_commits}")
-    print(f"Avg commits: {avg_commits}")
-    print(f"=====================================\n")
-    
-    # Score statistics
-    scored_repos = repos.filter(is_analyzed=True, performance_score__isnull=False)
-    if scored_repos.exists():
-        scores = [repo.performance_score for repo in scored_repos]
-        avg_score = round(sum(scores) / len(scores), 1)
-        max_score = max(scores)
-        min_score = min(scores)
-    else:
-        avg_score = None
-        max_score = None
-        min_score = None
-    
-    # Language count
-    all_languages = set()
-    for repo in repos:
-        if repo.languages:
-            all_languages.update(repo.languages.keys())
-    total_languages = len(all_languages)
+    stats = assignment_stats(assignment)
+    del stats['languages']
     
     # Top performers
     top_repos = repos.filter(is_analyzed=True, performance_score__isnull=False).order_by('-performance_score')[:3]
@@ -169,17 +153,8 @@ def assignment_detail(request, assignment_id):
         'assignment': assignment,
         'repos': repos,
         # Statistics
-        'total_repos': total_repos,
-        'analyzed_repos': analyzed_repos,
-        'pending_repos': pending_repos,
-        'total_commits': total_commits,
-        'avg_commits': avg_commits,
-        'avg_score': avg_score,
-        'max_score': max_score,
-        'min_score': min_score,
-        'total_languages': total_languages,
+        **stats,
         'top_repos': top_repos,
-        'completion_percentage': round((analyzed_repos / total_repos * 100), 1) if total_repos > 0 else 0,
     }
     
     return render(request, 'assignment_detail.html', context)
@@ -236,90 +211,186 @@ def add_student_repo(request, assignment_id):
 @login_required
 @require_POST
 def analyze_repo(request, repo_id):
-    """Analyze a repository using GitHub and Gemini APIs"""
+    """Queue a GitHub + Gemini analysis of a repository; poll analysis_job_status for progress"""
     repo = get_object_or_404(StudentRepo, id=repo_id, assignment__teacher=request.user)
     
     try:
-        # Create analysis log
-        log = AnalysisLog.objects.create(repo=repo, status='pending')
-        
-        # Fetch GitHub data
-        github_handler = GitHubHandler()
-        github_data = github_handler.fetch_repo_data(repo.repo_url)
-        
-        if not github_data.get('success'):
-            log.status = 'failed'
-            log.error_message = github_data.get('error', 'Unknown error')
-            log.save()
-            return JsonResponse({'success': False, 'error': github_data.get('error')})
-        
-        # Update repo with GitHub data
-        repo.commit_count = github_data.get('commit_count', 0)
-        repo.languages = github_data.get('languages', {})
-        repo.readme_content = github_data.get('readme_content', '')
-        
-        last_commit = github_data.get('last_commit')
-        if last_commit:
-            repo.last_commit_message = last_commit.get('message')
-            commit_date_str = last_commit.get('date')
-            if commit_date_str:
-                repo.last_commit_date = datetime.fromisoformat(commit_date_str.replace('Z', '+00:00'))
-        
-        repo.contributors = github_data.get('contributors', [])
-        
-        # Analyze with Gemini
-        gemini_handler = GeminiHandler()
-        analysis_result = gemini_handler.analyze_repository(github_data)
-        
-        if analysis_result.get('success'):
-            analysis = analysis_result.get('analysis', {})
-            repo.ai_summary = analysis.get('full_text', '')
-            
-            # Extract and validate score
-            extracted_score = analysis.get('score')
-            print(f"[VIEW DEBUG] Extracted score from analysis: {extracted_score}")
-            
-            if extracted_score is not None:
-                # Ensure it's an integer or float
-                try:
-                    repo.performance_score = float(extracted_score)
-                    print(f"[VIEW DEBUG] ✓ Saved performance_score: {repo.performance_score}")
-                except (ValueError, TypeError) as e:
-                    print(f"[VIEW DEBUG] ✗ Could not convert score {extracted_score} to number: {e}")
-                    repo.performance_score = None
-            else:
-                print(f"[VIEW DEBUG] ✗ No score in analysis result")
-                repo.performance_score = None
-            
-            # Combine improvements and recommendations as suggestions
-            suggestions = analysis.get('improvements', []) + analysis.get('recommendations', [])
-            repo.suggestions = '\n'.join(suggestions) if suggestions else ''
-            
-            repo.is_analyzed = True
-            log.status = 'success'
-        else:
-            log.status = 'failed'
-            log.error_message = analysis_result.get('error', 'Analysis failed')
-        
-        repo.save()
-        log.save()
+        # force=1 re-runs the analysis even when nothing was pushed since the last one
+        force = request.POST.get('force') == '1' or request.GET.get('force') == '1'
+        job = enqueue_analysis(repo, force=force)
+        return JsonResponse({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('analysis_job_status', args=[job.id])
+        }, status=202)
         
-        print(f"[VIEW DEBUG] Repository saved. Final performance_score in DB: {repo.performance_score}")
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@require_POST
+def analyze_assignment(request, assignment_id):
+    """Queue every pending or stale repository of an assignment for analysis"""
+    assignment = get_object_or_404(Assignment, id=assignment_id, teacher=request.user)
+    
+    try:
+        # pending_only=1 leaves analyzed repos alone instead of probing them for new pushes
+        pending_only = request.POST.get('pending_only') == '1' or request.GET.get('pending_only') == '1'
+        batch, jobs = enqueue_assignment(assignment, pending_only=pending_only)
+        return JsonResponse({
+            'success': True,
+            'batch': str(batch),
+            'queued': len(jobs),
+            'status_url': reverse('analysis_batch_status', args=[assignment.id, batch])
+        }, status=202)
         
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def analysis_batch_status(request, assignment_id, batch):
+    """Progress of a bulk analysis started by analyze_assignment"""
+    assignment = get_object_or_404(Assignment, id=assignment_id, teacher=request.user)
+    summary = batch_summary(assignment, batch)
+    summary['assignment_id'] = assignment.id
+    summary['gemini'] = get_gemini_limiter().status()
+    if settings.INGESTION_BACKEND == 'github_api' and settings.GITHUB_RATE_LIMIT_ENABLED:
+        # GitHub budget left and when the repos still to fetch should be done
+        summary['github'] = GitHubHandler().budget_status(summary['total'] - summary['done'])
+    return JsonResponse(summary)
+
+
+@login_required
+@require_POST
+def stream_repo_analysis(request, repo_id):
+    """
+    Queue a forced analysis for the page to stream; open stream_url with EventSource
+    An active job for the repo is reused rather than starting a second run.
+    """
+    repo = get_object_or_404(StudentRepo, id=repo_id, assignment__teacher=request.user)
+    
+    try:
+        job = enqueue_analysis(repo, force=True, stream=True)
         return JsonResponse({
             'success': True,
-            'message': 'Repository analyzed successfully!',
-            'score': repo.performance_score
-        })
+            'job_id': job.id,
+            'status': job.status,
+            'stream_url': reverse('stream_analysis_job', args=[job.id]),
+            'status_url': reverse('analysis_job_status', args=[job.id])
+        }, status=202)
         
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+async def stream_analysis_job(request, job_id):
+    """
+    Server-Sent Events for an analysis job queued by stream_repo_analysis
+    
+    Runs the job here when it is still queued, streaming Gemini's answer as
+    it is written; otherwise follows the run already in progress. Events:
+    status (stage), chunk ({"text": ...}) and done with the job's result.
+    Opening the stream never starts a new analysis. login_required cannot
+    wrap async views on Django 4.2, so authentication is checked here.
+    Served over WSGI (runserver), the events come from a sync iterator, as
+    Django 4.2 would read an async one to the end before sending anything.
+    """
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+    job = await sync_to_async(get_object_or_404)(
+        AnalysisJob, id=job_id, repo__assignment__teacher=user
+    )
+    
+    async def events():
+        async for event, data in stream_job(job.id):
+            payload = {'text': data} if event == 'chunk' else data
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    content = events() if isinstance(request, ASGIRequest) else _iterate_blocking(events)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # keep proxies from buffering the stream
+    return response
+
+
+def _iterate_blocking(make_iterator):
+    """
+    Consume an async iterator on its own event loop thread and yield its
+    items here, for WSGI servers. Closing this generator (the client went
+    away) cancels the async side.
+    """
+    loop = asyncio.new_event_loop()
+    items = queue.Queue()
+    finished = object()
+
+    async def produce():
+        try:
+            # Its own context, so its database work stays on one thread
+            async with ThreadSensitiveContext():
+                try:
+                    async for item in make_iterator():
+                        items.put(item)
+                finally:
+                    await sync_to_async(close_old_connections)()
+        except asyncio.CancelledError:
+            pass  # the client went away
+        except Exception as e:
+            items.put(e)
+        finally:
+            items.put(finished)
+
+    producer = loop.create_task(produce())
+    thread = threading.Thread(target=loop.run_until_complete, args=(producer,), daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        loop.call_soon_threadsafe(producer.cancel)
+        thread.join()
+        loop.close()
+
+
+@login_required
+def analysis_job_status(request, job_id):
+    """Progress of a background analysis job"""
+    job = get_object_or_404(
+        AnalysisJob.objects.select_related('log'),
+        id=job_id,
+        repo__assignment__teacher=request.user
+    )
+    
+    return JsonResponse({
+        'job_id': job.id,
+        'repo_id': job.repo_id,
+        'status': job.status,
+        'stage': job.stage,
+        'progress': job.progress,
+        'attempts': job.attempts,
+        'run_after': job.run_after.isoformat() if job.run_after else None,
+        'log_status': job.log.status if job.log else None,
+        'error': job.error_message,
+        'result': job.result,
+    })
+
+
 @login_required
 def repo_detail(request, repo_id):
     """View detailed analysis of a repository"""
-    repo = get_object_or_404(StudentRepo, id=repo_id, assignment__teacher=request.user)
+    repo = get_object_or_404(
+        StudentRepo.objects.select_related('assignment'),
+        id=repo_id,
+        assignment__teacher=request.user
+    )
     logs = AnalysisLog.objects.filter(repo=repo)
     
     context = {
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Test that analyze requests, single and bulk, are queued and run by the background job worker
+"""
+import threading
+import time
+from io import StringIO
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+
+from edutrack import analysis, jobs
+from edutrack.models import AnalysisJob, AnalysisLog, Assignment, StudentRepo
+from edutrack.stats import verify_stats
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stand_in(settings):
+    with GitHubStandInServer({"student/project": make_repo("student/project")}) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = ""
+        settings.GEMINI_API_KEY = ""
+        settings.GITHUB_CONCURRENT_FETCH = False
+        yield server
+
+
+@pytest.fixture
+def repo():
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    return StudentRepo.objects.create(
+        assignment=assignment,
+        student_name="Student",
+        repo_url="https://github.com/student/project",
+    )
+
+
+def test_analyze_endpoint_only_enqueues(client, stand_in, repo):
+    client.force_login(repo.assignment.teacher)
+
+    response = client.post(f"/repo/{repo.id}/analyze/")
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["status"] == "queued"
+    assert data["status_url"] == f"/jobs/{data['job_id']}/"
+    assert stand_in.requests == []
+
+
+def test_active_job_is_reused(repo):
+    first = jobs.enqueue_analysis(repo)
+    second = jobs.enqueue_analysis(repo, force=True)
+
+    assert second.id == first.id
+    assert AnalysisJob.objects.get(id=first.id).force is True
+
+
+def test_job_records_failure_and_log(client, stand_in, repo):
+    job = jobs.enqueue_analysis(repo)
+
+    jobs.run_job(job.id)
+
+    client.force_login(repo.assignment.teacher)
+    status = client.get(f"/jobs/{job.id}/").json()
+    assert status["status"] == "failed"
+    assert status["progress"] == 100
+    assert status["attempts"] == 1
+    assert status["log_status"] == "failed"
+    assert "Gemini API key not configured" in status["error"]
+    # The GitHub data was still refreshed
+    repo.refresh_from_db()
+    assert repo.commit_count == 3
+
+
+def test_deferred_job_is_requeued(monkeypatch, repo):
+    monkeypatch.setattr(jobs, "analyze_student_repo", lambda repo, force, progress, log: {
+        "success": False,
+        "deferred": True,
+        "retry_at": "2030-01-01T00:00:00+00:00",
+        "error": "GitHub core rate limit reached",
+    })
+    job = jobs.enqueue_analysis(repo)
+
+    job = jobs.run_job(job.id)
+
+    assert job.status == "queued"
+    assert job.run_after.year == 2030
+    assert jobs.run_job(job.id).attempts == 2
+
+
+def test_locked_database_requeues_instead_of_failing(monkeypatch, repo):
+    def locked(repo, force, progress, log):
+        raise OperationalError("database is locked")
+    monkeypatch.setattr(jobs, "analyze_student_repo", locked)
+    job = jobs.enqueue_analysis(repo)
+
+    job = jobs.run_job(job.id)
+
+    assert job.status == "queued"
+    assert job.run_after > timezone.now()
+    assert job.error_message == "database is locked"
+
+
+def test_restart_resumes_queued_and_interrupted_jobs(monkeypatch, settings, repo):
+    settings.ANALYSIS_STALE_AFTER = 600
+    submitted = {}
+    monkeypatch.setattr(jobs, "submit", lambda job_id, delay=0: submitted.update({job_id: delay}))
+    now = timezone.now()
+    other = StudentRepo.objects.create(assignment=repo.assignment, student_name="Other",
+                                       repo_url="https://github.com/student/other")
+    due = AnalysisJob.objects.create(repo=repo)
+    deferred = AnalysisJob.objects.create(repo=repo, run_after=now + timedelta(minutes=5))
+    lost = AnalysisJob.objects.create(repo=other, status="running",
+                                      started_at=now - timedelta(hours=1))
+    live = AnalysisJob.objects.create(repo=other, status="running",
+                                      started_at=now - timedelta(minutes=1))
+
+    assert jobs.resume_jobs() == (1, 3)
+
+    assert AnalysisJob.objects.get(id=lost.id).status == "queued"
+    assert AnalysisJob.objects.get(id=live.id).status == "running"
+    assert submitted.keys() == {due.id, deferred.id, lost.id}
+    assert submitted[due.id] == submitted[lost.id] == 0
+    assert 290 < submitted[deferred.id] <= 300
+
+
+class DeferringAnalyzer:
+    """Gemini backing off for the first `deferrals` calls, then answering"""
+
+    def __init__(self, deferrals):
+        self.deferrals = deferrals
+
+    def analyze_repository(self, github_data):
+        if self.deferrals:
+            self.deferrals -= 1
+            return {"success": False, "deferred": True, "error": "Gemini backing off",
+                    "retry_at": timezone.now().isoformat()}
+        return FakeAnalyzer().analyze_repository(github_data)
+
+
+def test_deferred_runs_complete_one_log(monkeypatch, stand_in, repo):
+    analyzer = DeferringAnalyzer(deferrals=2)
+    monkeypatch.setattr(analysis, "get_analyzer", lambda: analyzer)
+    job = jobs.enqueue_analysis(repo)
+
+    statuses = [jobs.run_job(job.id).status for _ in range(3)]
+
+    assert statuses == ["queued", "queued", "success"]
+    log = AnalysisLog.objects.get(repo=repo)
+    assert (log.status, log.error_message) == ("success", None)
+    assert AnalysisJob.objects.get(id=job.id).log_id == log.id
+
+
+def test_last_deferral_fails_its_log(monkeypatch, settings, stand_in, repo):
+    settings.ANALYSIS_MAX_ATTEMPTS = 2
+    monkeypatch.setattr(analysis, "get_analyzer", lambda: DeferringAnalyzer(deferrals=5))
+    job = jobs.enqueue_analysis(repo)
+
+    statuses = [jobs.run_job(job.id).status for _ in range(2)]
+
+    assert statuses == ["queued", "failed"]
+    log = AnalysisLog.objects.get(repo=repo)
+    assert (log.status, log.error_message) == ("failed", "Gemini backing off")
+
+
+def test_crashed_run_fails_its_log(monkeypatch, stand_in, repo):
+    class CrashingAnalyzer:
+        def analyze_repository(self, github_data):
+            raise RuntimeError("boom")
+    monkeypatch.setattr(analysis, "get_analyzer", CrashingAnalyzer)
+    job = jobs.enqueue_analysis(repo)
+
+    assert jobs.run_job(job.id).status == "failed"
+    log = AnalysisLog.objects.get(repo=repo)
+    assert (log.status, log.error_message) == ("failed", "boom")
+
+
+def test_requeue_running_command_spares_live_jobs(settings, repo):
+    settings.ANALYSIS_STALE_AFTER = 600
+    live = AnalysisJob.objects.create(repo=repo, status="running", started_at=timezone.now())
+
+    call_command("run_analysis_jobs", "--requeue-running", stdout=StringIO())
+
+    assert AnalysisJob.objects.get(id=live.id).status == "running"
+
+
+def test_status_is_private_to_the_teacher(client, repo):
+    job = jobs.enqueue_analysis(repo)
+    client.force_login(User.objects.create_user("other"))
+
+    assert client.get(f"/jobs/{job.id}/").status_code == 404
+
+
+def test_bulk_analyze_queues_one_batch(client, repo):
+    StudentRepo.objects.create(
+        assignment=repo.assignment,
+        student_name="Analyzed",
+        repo_url="https://github.com/student/done",
+        is_analyzed=True,
+    )
+    client.force_login(repo.assignment.teacher)
+
+    everything = client.post(f"/assignments/{repo.assignment.id}/analyze/").json()
+    pending = client.post(f"/assignments/{repo.assignment.id}/analyze/?pending_only=1").json()
+
+    assert everything["queued"] == 2
+    assert pending["queued"] == 1
+    # Repos already queued by the first batch are not queued twice
+    assert AnalysisJob.objects.count() == 2
+    status = client.get(everything["status_url"]).json()
+    assert status["total"] == 2
+    assert status["counts"]["queued"] == 2
+    # Two repos of six calls each against the shared GitHub budget
+    assert status["github"]["remaining"] == 60
+    assert status["github"]["projected_completion"]
+
+
+def test_stages_have_separate_concurrency_limits(settings):
+    settings.ANALYSIS_GITHUB_CONCURRENCY = 3
+    settings.ANALYSIS_GEMINI_CONCURRENCY = 2
+    active = {"github": 0, "gemini": 0}
+    peak = {"github": 0, "gemini": 0}
+    lock = threading.Lock()
+
+    def run(stage):
+        with analysis.stage_slot(stage):
+            with lock:
+                active[stage] += 1
+                peak[stage] = max(peak[stage], active[stage])
+            time.sleep(0.05)
+            with lock:
+                active[stage] -= 1
+
+    threads = [threading.Thread(target=run, args=(stage,))
+               for stage in ["github", "gemini"] * 6]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == {"github": 3, "gemini": 2}
+
+
+class FakeAnalyzer:
+    """Answers instantly in the shape of a successful Gemini analysis"""
+
+    def analyze_repository(self, github_data):
+        return {
+            "success": True,
+            "analysis": {"full_text": "**4. Performance Score:** 80/100", "score": 80},
+            "tier": "fast",
+            "model_name": "stand-in",
+        }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_analysis_on_worker_threads(client, settings, monkeypatch):
+    # Production defaults: every worker writes the repo, its stats, the ETag
+    # cache and the shared GitHub budget to the same SQLite database
+    settings.ANALYSIS_WORKERS = 8
+    settings.GITHUB_CONCURRENT_FETCH = True
+    settings.GITHUB_CONDITIONAL_REQUESTS = True
+    settings.GITHUB_RATE_LIMIT_ENABLED = True
+    settings.GITHUB_RATE_LIMIT_BURST = 500
+    settings.GITHUB_TOKEN = ""
+    monkeypatch.setattr(analysis, "get_analyzer", FakeAnalyzer)
+    monkeypatch.setattr(jobs, "_executor", None)
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    names = [f"student{n}/project" for n in range(24)]
+    for name in names:
+        StudentRepo.objects.create(assignment=assignment, student_name=name,
+                                   repo_url=f"https://github.com/{name}")
+    client.force_login(teacher)
+
+    with GitHubStandInServer({name: make_repo(name) for name in names},
+                             rate_limit=5000) as server:
+        settings.GITHUB_API_URL = server.url
+        batch = client.post(f"/assignments/{assignment.id}/analyze/").json()
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            status = client.get(batch["status_url"]).json()
+            if status["done"] == status["total"]:
+                break
+            time.sleep(0.2)
+    jobs._get_executor().shutdown(wait=True)
+
+    assert status["counts"] == {"queued": 0, "running": 0, "success": 24, "failed": 0,
+                                "skipped": 0}
+    assert AnalysisLog.objects.filter(status="success").count() == 24
+    assert not AnalysisLog.objects.exclude(status="success").exists()
+    assert verify_stats(assignment.id) == []
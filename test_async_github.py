@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the asyncio GitHub client against the local GitHub stand-in server
+"""
+import asyncio
+
+import pytest
+
+from edutrack.api import github_handler
+from edutrack.api.async_github_handler import AsyncGitHubHandler, close_async_client
+from edutrack.api.github_handler import GitHubHandler
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+
+@pytest.fixture
+def stand_in(settings):
+    repos = {f"student{i}/project": make_repo(f"student{i}/project", commit_count=20 * i + 1)
+             for i in range(6)}
+    with GitHubStandInServer(repos) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = ""
+        settings.GITHUB_CONDITIONAL_REQUESTS = False
+        settings.GITHUB_RATE_LIMIT_ENABLED = False
+        yield server
+
+
+def run(coroutine):
+    async def run_and_close():
+        try:
+            return await coroutine
+        finally:
+            await close_async_client()
+    return asyncio.run(run_and_close())
+
+
+def test_async_fetch_matches_sync_fetch(stand_in):
+    url = "https://github.com/student4/project"
+
+    async_data = run(AsyncGitHubHandler().fetch_repo_data(url))
+    sync_data = GitHubHandler().fetch_repo_data(url)
+
+    async_data.pop("fetched_at")
+    sync_data.pop("fetched_at")
+    assert async_data == sync_data
+    assert async_data["commit_count"] == 81
+
+
+def test_async_probe_matches_sync_probe(stand_in):
+    urls = ["https://github.com/student1/project", "https://github.com/nobody/missing"]
+
+    async def probe_all():
+        handler = AsyncGitHubHandler()
+        return [await handler.probe_freshness(url) for url in urls]
+
+    assert run(probe_all()) == [GitHubHandler().probe_freshness(url) for url in urls]
+
+
+def test_async_handler_leaves_the_sync_session_alone(stand_in, monkeypatch):
+    monkeypatch.setattr(github_handler, "_session", None)
+
+    async def fetch_and_probe():
+        handler = AsyncGitHubHandler()
+        await handler.fetch_repo_data("https://github.com/student2/project")
+        return await handler.probe_freshness("https://github.com/student2/project")
+
+    assert run(fetch_and_probe())["success"] is True
+    assert github_handler._session is None
+
+
+def test_async_fetch_many_over_rest(stand_in):
+    urls = [f"https://github.com/student{i}/project" for i in range(6)] + ["bad-url"]
+
+    results = run(AsyncGitHubHandler().fetch_many(urls))
+
+    assert all(results[url]["success"] for url in urls[:6])
+    assert results["bad-url"] == {"error": "Invalid GitHub URL"}
+
+
+def test_async_fetch_many_over_graphql(stand_in, settings):
+    settings.GITHUB_TOKEN = "test-token"
+    urls = [f"https://github.com/student{i}/project" for i in range(6)]
+
+    results = run(AsyncGitHubHandler().fetch_many(urls, batch_size=4))
+
+    assert stand_in.requests.count(("POST", "/graphql")) == 2
+    assert [results[url]["commit_count"] for url in urls] == [1, 21, 41, 61, 81, 101]
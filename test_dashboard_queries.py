@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test that the dashboard loads in a constant number of queries however many assignments a teacher has
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from edutrack.models import Assignment, StudentRepo
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def teacher(client):
+    teacher = User.objects.create_user("teacher")
+    client.force_login(teacher)
+    return teacher
+
+
+def add_assignments(teacher, count, repos_each=4):
+    for _ in range(count):
+        assignment = Assignment.objects.create(teacher=teacher, title="Project")
+        for n in range(repos_each):
+            StudentRepo.objects.create(
+                assignment=assignment,
+                student_name=f"Student {n}",
+                repo_url=f"https://github.com/student/project{n}",
+                is_analyzed=n % 2 == 0,
+            )
+
+
+def dashboard_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/dashboard/")
+    assert response.status_code == 200
+    return response, len(queries)
+
+
+def test_query_count_does_not_grow_with_assignments(client, teacher):
+    add_assignments(teacher, 2)
+    _, few = dashboard_queries(client)
+
+    add_assignments(teacher, 13, repos_each=6)
+    response, many = dashboard_queries(client)
+
+    assert many == few
+    # Session, user, totals and the assignment list
+    assert many <= 4
+    assert response.context["total_assignments"] == 15
+    assert len(response.context["assignment_list"]) == 10
+
+
+def test_counts_and_completion(client, teacher):
+    add_assignments(teacher, 1, repos_each=3)
+    Assignment.objects.create(teacher=teacher, title="Empty")
+
+    response, _ = dashboard_queries(client)
+
+    assert response.context["total_repos"] == 3
+    assert response.context["analyzed_repos"] == 2
+    assert response.context["pending_analysis"] == 1
+    items = {item["assignment"].title: item for item in response.context["assignment_list"]}
+    assert (items["Project"]["analyzed_count"], items["Project"]["pending_count"]) == (2, 1)
+    assert items["Project"]["completion_percentage"] == 66.7
+    assert items["Empty"]["completion_percentage"] == 0
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test that batch mode packs several repos into one Gemini prompt and retries malformed ones
+"""
+import json
+
+import pytest
+
+from edutrack.api.gemini_handler import GeminiHandler
+from edutrack.api.prompt_builder import count_tokens
+
+pytestmark = pytest.mark.django_db
+
+SINGLE_RESPONSE = """**1. Summary (50-75 words):** Analyzed alone.
+**4. Performance Score (0-100):** 55/100
+"""
+
+
+def repo_data(n):
+    return {
+        "commit_count": n,
+        "languages": {"Python": 100 * n},
+        "readme_content": f"# Project {n}",
+        "last_commit": {"message": f"Commit {n}", "date": "2025-01-04T12:00:00Z"},
+    }
+
+
+def analysis_item(repo_id, **overrides):
+    item = {
+        "repo_id": repo_id,
+        "summary": f"Summary of {repo_id}",
+        "strengths": ["Clear commits"],
+        "improvements": ["Add tests"],
+        "score": 70,
+        "recommendations": ["Write a README"],
+    }
+    item.update(overrides)
+    return item
+
+
+class FakeModel:
+    """Answers batch prompts with batch_answer(prompt) and single prompts with SINGLE_RESPONSE"""
+
+    def __init__(self, batch_answer):
+        self.batch_answer = batch_answer
+        self.calls = []
+
+    def generate_content(self, prompt, generation_config=None):
+        batched = generation_config is not None
+        self.calls.append("batch" if batched else "single")
+        text = json.dumps(self.batch_answer(prompt)) if batched else SINGLE_RESPONSE
+        return type("Response", (), {"text": text})()
+
+
+@pytest.fixture
+def handler(settings):
+    settings.GEMINI_API_KEY = "test-key"
+    settings.GEMINI_CACHE_ENABLED = False
+    settings.GEMINI_BATCH_MAX_REPOS = 10
+    return GeminiHandler(structured=False)
+
+
+def test_repos_share_one_call(handler):
+    handler.model = FakeModel(lambda prompt: [analysis_item(str(n)) for n in range(1, 5)])
+
+    results = handler.analyze_repositories({n: repo_data(n) for n in range(1, 5)})
+
+    assert handler.model.calls == ["batch"]
+    assert set(results) == {1, 2, 3, 4}
+    assert results[3]["batched"] is True
+    assert results[3]["analysis"]["summary"] == "Summary of 3"
+    assert results[3]["analysis"]["score"] == 70
+    assert "**4. Performance Score:** 70/100" in results[3]["analysis"]["full_text"]
+
+
+def test_malformed_and_missing_repos_are_retried_alone(handler):
+    handler.model = FakeModel(lambda prompt: [
+        analysis_item("1"),
+        analysis_item("2", score="high"),
+    ])
+
+    results = handler.analyze_repositories({n: repo_data(n) for n in range(1, 4)})
+
+    assert handler.model.calls == ["batch", "single", "single"]
+    assert results[1]["batched"] is True
+    assert results[2]["analysis"]["score"] == 55
+    assert results[3]["analysis"]["score"] == 55
+
+
+def test_token_budget_splits_batches(handler):
+    prompts = []
+
+    def answer(prompt):
+        prompts.append(prompt)
+        return [analysis_item(str(n)) for n in range(1, 7) if f"=== Repository {n} ===" in prompt]
+
+    handler.model = FakeModel(answer)
+    base = count_tokens(handler._create_batch_prompt({}))
+    entry = count_tokens(handler._describe_batch_entry(1, repo_data(1)))
+
+    results = handler.analyze_repositories(
+        {n: repo_data(n) for n in range(1, 7)}, token_budget=base + 3 * entry + 5)
+
+    assert handler.model.calls == ["batch", "batch"]
+    assert all(result["batched"] for result in results.values())
+    assert len(results) == 6
+
+
+def test_batch_answers_are_not_reused_for_single_analyses(handler):
+    handler.use_cache = True
+    handler.model = FakeModel(lambda prompt: [analysis_item(str(n)) for n in range(1, 3)])
+    repos = {n: repo_data(n) for n in range(1, 3)}
+    handler.analyze_repositories(repos)
+
+    again = handler.analyze_repositories(repos)
+    single = handler.analyze_repository(repo_data(1))
+
+    assert all(result["cached"] for result in again.values())
+    assert handler.model.calls == ["batch", "single"]
+    assert single["analysis"]["score"] == 55
+    assert "cached" not in single
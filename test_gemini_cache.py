@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test that identical Gemini prompts are answered from the analysis cache
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from edutrack.api import gemini_cache
+from edutrack.api.gemini_handler import GeminiHandler
+from edutrack.models import GeminiAnalysisCache
+
+pytestmark = pytest.mark.django_db
+
+REPO_DATA = {
+    "commit_count": 12,
+    "languages": {"Python": 900, "HTML": 100},
+    "readme_content": "# Todo app",
+    "last_commit": {"message": "Add tests", "date": "2025-01-04T12:00:00Z"},
+}
+
+RESPONSE = """**1. Summary (50-75 words):** A todo app.
+**4. Performance Score (0-100):** 82/100
+"""
+
+
+class FakeModel:
+    """Records prompts and answers every one with RESPONSE"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": RESPONSE})()
+
+
+@pytest.fixture
+def handler(settings):
+    settings.GEMINI_API_KEY = "test-key"
+    settings.GEMINI_CACHE_ENABLED = True
+    handler = GeminiHandler(structured=False)
+    handler.model = FakeModel()
+    return handler
+
+
+def test_same_prompt_calls_the_model_once(handler):
+    first = handler.analyze_repository(REPO_DATA)
+    second = handler.analyze_repository(REPO_DATA)
+
+    assert len(handler.model.prompts) == 1
+    assert second["cached"] is True
+    assert second["analysis"] == first["analysis"]
+    assert second["raw_response"] == RESPONSE
+    assert GeminiAnalysisCache.objects.get().hits == 1
+
+
+def test_changed_repo_or_model_misses(handler):
+    handler.analyze_repository(REPO_DATA)
+    handler.analyze_repository(dict(REPO_DATA, commit_count=13))
+    handler.model_name = "gemini-2.5-flash"
+    handler.analyze_repository(REPO_DATA)
+
+    assert len(handler.model.prompts) == 3
+
+
+def test_expired_entries_are_not_served(handler, settings):
+    settings.GEMINI_CACHE_MAX_AGE_DAYS = 7
+    handler.analyze_repository(REPO_DATA)
+    GeminiAnalysisCache.objects.update(created_at=timezone.now() - timedelta(days=8))
+
+    assert "cached" not in handler.analyze_repository(REPO_DATA)
+    assert GeminiAnalysisCache.objects.count() == 1
+
+
+def test_least_recently_used_entries_are_evicted(settings):
+    settings.GEMINI_CACHE_MAX_ENTRIES = 2
+    for n in range(3):
+        gemini_cache.store_analysis("gemini-2.5-pro", f"prompt {n}", {"score": n}, "")
+    gemini_cache.get_cached_analysis("gemini-2.5-pro", "prompt 1")
+    gemini_cache.store_analysis("gemini-2.5-pro", "prompt 3", {"score": 3}, "")
+
+    assert gemini_cache.get_cached_analysis("gemini-2.5-pro", "prompt 1") is not None
+    assert gemini_cache.get_cached_analysis("gemini-2.5-pro", "prompt 2") is None
+    assert GeminiAnalysisCache.objects.count() == 2
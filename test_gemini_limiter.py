@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test that Gemini calls adapt their concurrency, trip a circuit breaker and requeue deferred repos
+"""
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from google.api_core import exceptions as google_exceptions
+
+from edutrack import jobs
+from edutrack.api import gemini_handler, gemini_limiter
+from edutrack.api.gemini_handler import GeminiHandler
+from edutrack.api.gemini_limiter import GeminiUnavailable, get_gemini_limiter
+from edutrack.models import AnalysisJob, Assignment, StudentRepo
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+pytestmark = pytest.mark.django_db
+
+ANSWER = "**4. Performance Score (0-100):** 80/100"
+
+
+class FakeModel:
+    """Answers every prompt, or raises error when one is set"""
+
+    def __init__(self):
+        self.error = None
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return type("Response", (), {"text": ANSWER})()
+
+
+@pytest.fixture
+def limiter(settings, monkeypatch):
+    settings.ANALYSIS_GEMINI_CONCURRENCY = 8
+    settings.GEMINI_LATENCY_TARGET_MS = 30000
+    settings.GEMINI_BACKOFF_FACTOR = 0.5
+    settings.GEMINI_CIRCUIT_FAILURES = 3
+    settings.GEMINI_CIRCUIT_COOLDOWN = 60
+    settings.GEMINI_LIMITER_MAX_WAIT = 0
+    monkeypatch.setattr(gemini_limiter, "_limiter", None)
+    return get_gemini_limiter()
+
+
+@pytest.fixture
+def model(settings, monkeypatch, limiter):
+    settings.GEMINI_API_KEY = "test-key"
+    settings.GEMINI_CACHE_ENABLED = False
+    settings.GEMINI_STRUCTURED_OUTPUT = False
+    settings.GEMINI_ROUTING_ENABLED = False
+    fake = FakeModel()
+    monkeypatch.setattr(gemini_handler, "get_model", lambda name: fake)
+    return fake
+
+
+def overload(limiter):
+    limiter.acquire()
+    limiter.release("overload")
+
+
+def test_limit_halves_on_overload_and_grows_back(limiter):
+    overload(limiter)
+    overload(limiter)
+    assert limiter.status()["limit"] == 2.0
+
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release("ok", latency_ms=100)
+    assert 6 < limiter.status()["limit"] <= 8
+
+
+def test_slow_answers_shrink_the_limit(limiter):
+    limiter.acquire()
+    limiter.release("ok", latency_ms=60000)
+
+    assert limiter.status()["limit"] == 7.2
+
+
+def test_slots_are_bounded_by_the_limit(limiter):
+    overload(limiter)
+    overload(limiter)
+    overload(limiter)  # opens the circuit; close it again by hand
+    limiter.state, limiter.open_until = "closed", None
+
+    limiter.acquire()
+    with pytest.raises(GeminiUnavailable):
+        limiter.acquire()
+
+
+def test_circuit_opens_fails_fast_and_recovers_through_a_probe(limiter):
+    for _ in range(3):
+        overload(limiter)
+    status = limiter.status()
+    assert status["state"] == "open"
+    with pytest.raises(GeminiUnavailable):
+        limiter.acquire()
+
+    # Cooldown over: one probe goes through, everyone else waits on it
+    limiter.open_until = timezone.now() - timedelta(seconds=1)
+    limiter.acquire()
+    assert limiter.status()["state"] == "probing"
+    with pytest.raises(GeminiUnavailable):
+        limiter.acquire()
+
+    limiter.release("ok", latency_ms=100)
+    assert limiter.status()["state"] == "closed"
+
+
+def test_failed_probe_reopens_for_longer(limiter):
+    for _ in range(3):
+        overload(limiter)
+    limiter.open_until = timezone.now() - timedelta(seconds=1)
+
+    overload(limiter)
+
+    assert limiter.status()["state"] == "open"
+    assert limiter.open_until > timezone.now() + timedelta(seconds=100)
+
+
+def test_quota_error_defers_instead_of_failing(model, limiter):
+    model.error = google_exceptions.ResourceExhausted("quota exceeded")
+
+    result = GeminiHandler().analyze_repository({"commit_count": 3})
+
+    assert result["success"] is False
+    assert result["deferred"] is True
+    assert result["retry_at"]
+    assert limiter.status()["failures"] == 1
+
+
+def test_open_circuit_skips_the_model(model, limiter):
+    for _ in range(3):
+        overload(limiter)
+
+    result = GeminiHandler().analyze_repository({"commit_count": 3})
+
+    assert result["deferred"] is True
+    assert result["retry_at"] == limiter.open_until.isoformat()
+    assert model.calls == 0
+
+
+def test_batch_is_deferred_as_a_whole(model, settings):
+    model.error = google_exceptions.ServiceUnavailable("overloaded")
+
+    results = GeminiHandler().analyze_repositories({1: {"commit_count": 1}, 2: {"commit_count": 2}})
+
+    assert model.calls == 1
+    assert all(result["deferred"] for result in results.values())
+
+
+def test_deferred_job_is_requeued(model, limiter, settings):
+    for _ in range(3):
+        overload(limiter)
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    repo = StudentRepo.objects.create(
+        assignment=assignment,
+        student_name="Student",
+        repo_url="https://github.com/student/project",
+    )
+    job = jobs.enqueue_analysis(repo)
+
+    with GitHubStandInServer({"student/project": make_repo("student/project")}) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = ""
+        settings.GITHUB_CONCURRENT_FETCH = False
+        jobs.run_job(job.id)
+
+    job = AnalysisJob.objects.select_related("log").get(id=job.id)
+    assert job.status == "queued"
+    assert job.run_after == limiter.open_until
+    assert job.log.status == "pending"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test that Gemini models are configured and built once per process
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import call_command
+
+from edutrack.api.gemini_handler import GeminiHandler, get_model, get_model_stats
+
+
+def test_handlers_share_one_model(settings):
+    settings.GEMINI_API_KEY = "test-key-shared"
+    before = get_model_stats()
+
+    handlers = [GeminiHandler() for _ in range(5)]
+
+    after = get_model_stats()
+    assert len({id(handler.model) for handler in handlers}) == 1
+    assert after["models_built"] - before["models_built"] == 1
+    assert after["configure_calls"] - before["configure_calls"] == 1
+    assert after["reused"] - before["reused"] == 4
+
+
+def test_models_are_per_name_and_per_key(settings):
+    settings.GEMINI_API_KEY = "test-key-a"
+    pro = get_model("gemini-2.5-pro")
+    flash = get_model("gemini-2.5-flash")
+    settings.GEMINI_API_KEY = "test-key-b"
+
+    assert flash is not pro
+    assert get_model("gemini-2.5-pro") is not pro
+
+
+def test_threads_get_the_same_model(settings):
+    settings.GEMINI_API_KEY = "test-key-threads"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        models = list(executor.map(lambda _: get_model("gemini-2.5-pro"), range(32)))
+
+    assert len({id(model) for model in models}) == 1
+
+
+def test_setup_benchmark_reports_savings(capsys):
+    call_command("benchmark_gemini_setup", iterations=5, json=True)
+
+    assert '"models_built"' in capsys.readouterr().out
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test that analyses go to the fast Gemini model first and escalate to pro on demand
+"""
+import pytest
+from django.contrib.auth.models import User
+
+from edutrack import analysis
+from edutrack.api import gemini_handler
+from edutrack.api.gemini_router import TieredGeminiRouter
+from edutrack.models import AnalysisLog, Assignment, StudentRepo
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+pytestmark = pytest.mark.django_db
+
+FAST = "fast-model"
+PRO = "pro-model"
+
+
+def answer(score):
+    return f"""**1. Summary (50-75 words):** A small project.
+**4. Performance Score (0-100):** {score}/100
+"""
+
+
+class FakeModel:
+    """Answers every prompt with the same text, or raises it when it is an exception"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return type("Response", (), {"text": self.reply})()
+
+
+@pytest.fixture
+def models(settings, monkeypatch):
+    settings.GEMINI_API_KEY = "test-key"
+    settings.GEMINI_CACHE_ENABLED = False
+    settings.GEMINI_STRUCTURED_OUTPUT = False
+    settings.GEMINI_ROUTING_ENABLED = True
+    settings.GEMINI_FAST_MODEL = FAST
+    settings.GEMINI_PRO_MODEL = PRO
+    settings.GEMINI_BORDERLINE_SCORE_MIN = 55
+    settings.GEMINI_BORDERLINE_SCORE_MAX = 65
+    settings.GEMINI_LARGE_REPO_COMMITS = 200
+    settings.GEMINI_LARGE_REPO_BYTES = 1000000
+    fakes = {FAST: FakeModel(answer(85)), PRO: FakeModel(answer(90))}
+    monkeypatch.setattr(gemini_handler, "get_model", lambda name: fakes[name])
+    return fakes
+
+
+def repo_data(commits=10, code_bytes=5000):
+    return {
+        "commit_count": commits,
+        "languages": {"Python": code_bytes},
+        "readme_content": "# Project",
+        "last_commit": {"message": "Add tests", "date": "2025-01-04T12:00:00Z"},
+    }
+
+
+def test_clear_result_stays_on_fast_model(models):
+    result = TieredGeminiRouter().analyze_repository(repo_data())
+
+    assert result["analysis"]["score"] == 85
+    assert (result["tier"], result["model_name"], result["escalation_reason"]) == ("fast", FAST, "")
+    assert models[PRO].calls == 0
+
+
+@pytest.mark.parametrize("fast_reply, reason", [
+    (answer(60), "borderline score"),
+    ("No score in this answer.", "no score"),
+    (RuntimeError("quota exceeded"), "fast model failed"),
+])
+def test_escalates_to_pro(models, fast_reply, reason):
+    models[FAST].reply = fast_reply
+
+    result = TieredGeminiRouter().analyze_repository(repo_data())
+
+    assert result["analysis"]["score"] == 90
+    assert (result["tier"], result["model_name"], result["escalation_reason"]) == ("pro", PRO, reason)
+
+
+@pytest.mark.parametrize("data, reason", [
+    (repo_data(commits=250), "large repository (commits)"),
+    (repo_data(code_bytes=2000000), "large repository (code size)"),
+])
+def test_large_repos_skip_fast_model(models, data, reason):
+    result = TieredGeminiRouter().analyze_repository(data)
+
+    assert (result["tier"], result["escalation_reason"]) == ("pro", reason)
+    assert models[FAST].calls == 0
+
+
+def test_batch_escalates_only_flagged_repos(models):
+    results = TieredGeminiRouter().analyze_repositories({
+        1: repo_data(),
+        2: repo_data(commits=300),
+    })
+
+    assert results[1]["tier"] == "fast"
+    assert results[2]["tier"] == "pro"
+    assert results[2]["escalation_reason"] == "large repository (commits)"
+
+
+def test_tier_is_recorded_on_analysis_log(models, settings):
+    models[FAST].reply = answer(58)
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    repo = StudentRepo.objects.create(
+        assignment=assignment,
+        student_name="Student",
+        repo_url="https://github.com/student/project",
+    )
+
+    with GitHubStandInServer({"student/project": make_repo("student/project")}) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = ""
+        settings.GITHUB_CONCURRENT_FETCH = False
+        result = analysis.analyze_student_repo(repo)
+
+    assert result["success"] is True
+    log = AnalysisLog.objects.get(id=result["log_id"])
+    assert (log.model_tier, log.model_name, log.escalation_reason) == ("pro", PRO, "borderline score")
+    assert dict(repo.language_rows.values_list("language", "bytes")) == {"Python": 1200, "HTML": 300}
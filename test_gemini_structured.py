@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the schema-constrained JSON analysis mode and its fallback to the text parser
+"""
+import json
+import logging
+
+import pytest
+
+from edutrack.api import gemini_handler
+from edutrack.api.gemini_handler import ANALYSIS_SCHEMA, GeminiHandler
+
+REPO_DATA = {"commit_count": 12, "languages": {"Python": 900}, "readme_content": "# Todo app"}
+
+TEXT_RESPONSE = """**1. Summary (50-75 words):** A todo app.
+**4. Performance Score (0-100):** 64/100
+"""
+
+STRUCTURED = {
+    "summary": "A todo app with tests.",
+    "strengths": ["Small focused commits", "Readable README"],
+    "improvements": ["Add CI"],
+    "score": 88,
+    "recommendations": ["Deploy it"],
+}
+
+
+class FakeModel:
+    """Answers structured requests with structured_text and plain ones with TEXT_RESPONSE"""
+
+    def __init__(self, structured_text):
+        self.structured_text = structured_text
+        self.configs = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.configs.append(generation_config)
+        text = self.structured_text if generation_config else TEXT_RESPONSE
+        return type("Response", (), {"text": text})()
+
+
+@pytest.fixture
+def handler(settings):
+    settings.GEMINI_API_KEY = "test-key"
+    return GeminiHandler(use_cache=False, structured=True)
+
+
+def test_schema_answer_is_used_directly(handler):
+    handler.model = FakeModel(json.dumps(STRUCTURED))
+
+    result = handler.analyze_repository(REPO_DATA)
+
+    assert handler.model.configs == [{
+        "response_mime_type": "application/json",
+        "response_schema": ANALYSIS_SCHEMA,
+    }]
+    analysis = result["analysis"]
+    assert analysis["score"] == 88
+    assert analysis["strengths"] == STRUCTURED["strengths"]
+    assert "**4. Performance Score:** 88/100" in analysis["full_text"]
+
+
+@pytest.mark.parametrize("answer", [
+    "not json",
+    json.dumps(dict(STRUCTURED, score=140)),
+    json.dumps({key: value for key, value in STRUCTURED.items() if key != "summary"}),
+])
+def test_invalid_answers_fall_back_to_text(handler, answer):
+    handler.model = FakeModel(answer)
+
+    result = handler.analyze_repository(REPO_DATA)
+
+    assert handler.model.configs[1] is None
+    assert result["analysis"]["score"] == 64
+
+
+class OldClientModel(FakeModel):
+    """generate_content of a google-generativeai release without JSON mode"""
+
+    def generate_content(self, prompt, generation_config=None):
+        if generation_config:
+            raise ValueError("Unknown field for GenerationConfig: response_mime_type")
+        return super().generate_content(prompt)
+
+
+def test_unsupported_json_mode_warns_once(handler, monkeypatch, caplog):
+    monkeypatch.setattr(gemini_handler, "_structured_fallback_logged",
+                        gemini_handler.threading.Event())
+    handler.model = OldClientModel("")
+
+    with caplog.at_level(logging.DEBUG, logger="edutrack.api.gemini_handler"):
+        results = [handler.analyze_repository(REPO_DATA) for _ in range(3)]
+
+    assert [result["analysis"]["score"] for result in results] == [64, 64, 64]
+    warnings = [record for record in caplog.records if record.levelno == logging.WARNING
+                and "Structured Gemini request failed" in record.getMessage()]
+    assert len(warnings) == 1
+    assert "response_mime_type" in warnings[0].getMessage()
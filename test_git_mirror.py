@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the git mirror ingestion backend against file:// remotes
+"""
+import subprocess
+
+import pytest
+
+from edutrack.api import git_mirror_handler
+from edutrack.api.git_mirror_handler import GitMirrorHandler
+
+
+def git(path, *args):
+    subprocess.run(["git", "-c", "user.name=Student", "-c", "user.email=student@example.com",
+                    *args], cwd=path, check=True, capture_output=True)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    path = tmp_path / "project"
+    path.mkdir()
+    git(path, "init", "-q", "-b", "main")
+    (path / "README.md").write_text("# Project\n\nA student project.\n")
+    (path / "app.py").write_text("print('hello')\n" * 10)
+    (path / "index.html").write_text("<p>hi</p>\n")
+    (path / "node_modules").mkdir()
+    (path / "node_modules" / "lib.js").write_text("x" * 1000)
+    git(path, "add", ".")
+    git(path, "commit", "-q", "-m", "Initial commit")
+    git(path, "commit", "-q", "--allow-empty", "-m", "Second commit")
+    return path
+
+
+@pytest.fixture
+def handler(tmp_path, settings):
+    settings.GITHUB_TOKEN = ""
+    return GitMirrorHandler(mirror_root=tmp_path / "mirrors")
+
+
+def test_fetch_from_file_remote(remote, handler):
+    data = handler.fetch_repo_data(f"file://{remote}")
+
+    assert data["success"] is True
+    assert data["repo_name"] == "project"
+    assert data["commit_count"] == 2
+    assert data["last_commit"]["message"] == "Second commit"
+    assert data["languages"] == {"Python": 150, "HTML": 10}
+    assert data["readme_content"].startswith("# Project")
+    assert data["contributors"] == [{"login": "Student", "contributions": 2}]
+    assert data["repo_info"]["default_branch"] == "main"
+
+
+def test_refresh_fetches_new_commits_into_existing_mirror(remote, handler):
+    url = f"file://{remote}"
+    handler.fetch_repo_data(url)
+    git(remote, "commit", "-q", "--allow-empty", "-m", "Third commit")
+
+    data = handler.fetch_repo_data(url)
+
+    assert data["commit_count"] == 3
+    assert handler.probe_freshness(url)["head_sha"] == data["last_commit"]["sha"]
+
+
+def test_missing_remote_reports_error(tmp_path, handler):
+    data = handler.fetch_repo_data(f"file://{tmp_path}/missing")
+
+    assert data["success"] is False
+
+
+def test_token_stays_out_of_mirror_config_and_argv(tmp_path, remote, settings, monkeypatch):
+    # Serve https://github.com/student/project.git from the local remote
+    remotes = tmp_path / "remotes" / "student"
+    remotes.mkdir(parents=True)
+    remote.rename(remotes / "project.git")
+    gitconfig = tmp_path / "gitconfig"
+    gitconfig.write_text(f'[url "file://{tmp_path}/remotes/"]\n\tinsteadOf = https://github.com/\n')
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", str(gitconfig))
+
+    calls = []
+    run = subprocess.run
+
+    def recording_run(args, **kwargs):
+        calls.append((args, kwargs["env"]))
+        return run(args, **kwargs)
+
+    monkeypatch.setattr(git_mirror_handler.subprocess, "run", recording_run)
+    settings.GITHUB_TOKEN = "secret-token"
+    handler = GitMirrorHandler(mirror_root=tmp_path / "mirrors")
+    url = "https://github.com/student/project"
+
+    assert handler.fetch_repo_data(url)["success"] is True
+    assert handler.fetch_repo_data(url)["success"] is True  # refresh: remote set-url + fetch
+    assert handler.probe_freshness(url)["success"] is True
+
+    config = (handler.mirror_path(url) / "config").read_text()
+    assert "github.com/student/project.git" in config
+    assert "secret-token" not in config
+    assert not any("secret-token" in " ".join(args) for args, _ in calls)
+    assert all(env["GIT_CONFIG_VALUE_0"].startswith("Authorization: Basic ") for _, env in calls)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test batched GraphQL fetching against the local GitHub stand-in server
+"""
+import pytest
+
+from edutrack.api.github_handler import GitHubHandler
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+
+@pytest.fixture
+def stand_in(settings):
+    repos = {f"student{i}/project": make_repo(f"student{i}/project", commit_count=i + 1)
+             for i in range(5)}
+    with GitHubStandInServer(repos) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = "test-token"
+        settings.GITHUB_RATE_LIMIT_ENABLED = False
+        yield server
+
+
+def test_fetch_many_uses_one_request_per_batch(stand_in):
+    """Five repos with a batch size of two should cost three GraphQL requests"""
+    handler = GitHubHandler(conditional=False)
+    urls = [f"https://github.com/student{i}/project" for i in range(5)]
+
+    results = handler.fetch_many(urls, batch_size=2)
+
+    assert stand_in.requests == [("POST", "/graphql")] * 3
+    assert all(results[url]["success"] for url in urls)
+    assert results[urls[4]]["commit_count"] == 5
+
+
+def test_fetch_many_matches_rest_shape(stand_in):
+    """GraphQL results carry the same data as the per-repo REST fetch"""
+    handler = GitHubHandler(conditional=False)
+    url = "https://github.com/student3/project"
+
+    batched = handler.fetch_many([url])[url]
+    single = handler.fetch_repo_data(url)
+
+    for key in ("repo_name", "commit_count", "last_commit", "languages", "readme_content",
+                "contributors", "repo_info"):
+        assert batched[key] == single[key], key
+
+
+def test_fetch_many_reports_missing_and_invalid_repos(stand_in):
+    handler = GitHubHandler(conditional=False)
+
+    results = handler.fetch_many(["https://github.com/nobody/missing", "not-a-url"])
+
+    assert results["https://github.com/nobody/missing"]["success"] is False
+    assert results["not-a-url"] == {"error": "Invalid GitHub URL"}
+
+
+def test_commit_count_is_exact_beyond_one_page(stand_in):
+    """A 250-commit history is counted from a single one-item page"""
+    stand_in.repos["busy/project"] = make_repo("busy/project", commit_count=250)
+    handler = GitHubHandler(conditional=False)
+
+    data = handler.fetch_repo_data("https://github.com/busy/project")
+
+    assert data["commit_count"] == 250
+    assert len(data["commits"]) == 10
+    assert data["last_commit"]["message"] == "Commit 250"
+
+
+def test_long_readme_is_fetched_whole(stand_in):
+    """Both fetch paths keep the full README; ContextBuilder applies the budget"""
+    readme = "# Project\n\nIntro.\n\n## Usage\n\n" + "Run it. " * 500 + "\n\n## Tests\n\nLast."
+    stand_in.repos["long/project"] = make_repo("long/project", readme=readme)
+    handler = GitHubHandler(conditional=False)
+    url = "https://github.com/long/project"
+
+    assert handler.fetch_repo_data(url)["readme_content"] == readme
+    assert handler.fetch_many([url])[url]["readme_content"] == readme
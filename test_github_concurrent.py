@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent repo fetch against the GitHub stand-in server
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+
+from edutrack.api import github_handler
+from edutrack.api.github_handler import GitHubHandler
+from edutrack.models import GitHubResponseCache
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+
+REPOS = {
+    "a/one": make_repo("a/one", commit_count=4, languages={"Python": 900, "HTML": 100}),
+    "a/two": make_repo("a/two", commit_count=12, readme="",
+                       contributors=[{"login": "x", "contributions": 8},
+                                     {"login": "y", "contributions": 4}]),
+}
+
+
+@pytest.fixture
+def github_settings(settings):
+    settings.GITHUB_TOKEN = ""
+    settings.GITHUB_RATE_LIMIT_ENABLED = False
+    settings.GITHUB_MAX_RETRIES = 0
+    return settings
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    """A one-thread shared pool, so the parts of a fetch queue behind each other"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="github-fetch")
+    monkeypatch.setattr(github_handler, "_executor", executor)
+    yield executor
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch(handler, name):
+    result = handler.fetch_repo_data(f"https://github.com/{name}")
+    result.pop("fetched_at", None)
+    return result
+
+
+def test_concurrent_fetch_matches_sequential_fetch(github_settings):
+    with GitHubStandInServer(REPOS, latency=(0, 0.02), seed=1) as server:
+        github_settings.GITHUB_API_URL = server.url
+        concurrent = GitHubHandler(concurrent=True, conditional=False)
+        sequential = GitHubHandler(concurrent=False, conditional=False)
+
+        for name in REPOS:
+            # Parts finishing out of order still land under their own key
+            assert fetch(concurrent, name) == fetch(sequential, name)
+
+
+def test_failed_part_fails_the_fetch(github_settings):
+    # The budget runs out partway through the six calls of one fetch
+    with GitHubStandInServer(REPOS, rate_limit=3) as server:
+        github_settings.GITHUB_API_URL = server.url
+        result = GitHubHandler(concurrent=True, conditional=False).fetch_repo_data(
+            "https://github.com/a/one")
+
+    assert result["success"] is False
+    assert result["deferred"] is True
+
+
+def test_slow_part_times_out(github_settings):
+    github_settings.GITHUB_FETCH_TIMEOUT = 0.2
+    with GitHubStandInServer(REPOS, latency=0.6) as server:
+        github_settings.GITHUB_API_URL = server.url
+        result = GitHubHandler(concurrent=True, conditional=False).fetch_repo_data(
+            "https://github.com/a/one")
+
+    assert result["success"] is False
+    assert result["error"].startswith("Timed out fetching")
+
+
+def test_time_queued_on_the_shared_pool_does_not_count(github_settings, small_pool):
+    # Each call takes half the timeout, the six of them queued one after another three times it
+    github_settings.GITHUB_FETCH_TIMEOUT = 0.3
+    with GitHubStandInServer(REPOS, latency=0.15) as server:
+        github_settings.GITHUB_API_URL = server.url
+        result = GitHubHandler(concurrent=True, conditional=False).fetch_repo_data(
+            "https://github.com/a/one")
+
+    assert result["success"] is True, result.get("error")
+    assert result["commit_count"] == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_production_defaults_survive_parallel_repo_fetches(github_settings):
+    # The ETag cache and the shared rate-limit budget are written from every thread
+    github_settings.GITHUB_RATE_LIMIT_ENABLED = True
+    github_settings.GITHUB_RATE_LIMIT_BURST = 200  # no pacing waits, only lock contention
+    repos = {f"student{n}/project": make_repo(f"student{n}/project") for n in range(24)}
+    with GitHubStandInServer(repos, rate_limit=5000) as server:
+        github_settings.GITHUB_API_URL = server.url
+        handler = GitHubHandler(concurrent=True, conditional=True, rate_limited=True)
+
+        def fetch_one(name):
+            try:
+                return fetch(handler, name)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(fetch_one, repos))
+
+    assert [result.get("error") for result in results if not result["success"]] == []
+    assert GitHubResponseCache.objects.count() == 24 * 6
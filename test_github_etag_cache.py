@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test the ETag response cache against the GitHub stand-in server
+"""
+import pytest
+
+from edutrack.api.github_handler import GitHubHandler
+from edutrack.models import GitHubResponseCache
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stand_in(settings):
+    settings.GITHUB_TOKEN = ""
+    settings.GITHUB_RATE_LIMIT_ENABLED = False
+    with GitHubStandInServer({"a/b": make_repo("a/b", commit_count=25)}) as server:
+        settings.GITHUB_API_URL = server.url
+        yield server
+
+
+def cached(handler, path, params=None):
+    return GitHubResponseCache.objects.get(url=handler._url(path, params))
+
+
+def test_first_response_is_stored_and_revalidated(stand_in):
+    handler = GitHubHandler(conditional=True)
+
+    response = handler._get("/repos/a/b")
+
+    entry = cached(handler, "/repos/a/b")
+    assert response.status_code == 200
+    assert entry.etag == response.headers["ETag"]
+    assert entry.body == response.data
+    headers, entry = handler._conditional_headers(entry.url)
+    assert headers["If-None-Match"] == entry.etag
+
+
+def test_not_modified_is_answered_from_the_cache(stand_in):
+    handler = GitHubHandler(conditional=True)
+    handler._get("/repos/a/b")
+    # Only a 304 leaves this body alone: a 200 would store GitHub's
+    GitHubResponseCache.objects.filter(url=handler._url("/repos/a/b")).update(
+        body={"full_name": "from the cache"})
+
+    response = handler._get("/repos/a/b")
+
+    assert len(stand_in.requests) == 2
+    assert response.status_code == 200
+    assert response.data == {"full_name": "from the cache"}
+
+
+def test_not_modified_replays_the_stored_link_header(stand_in):
+    handler = GitHubHandler(conditional=True)
+    params = {"per_page": 1}
+    first = handler._get("/repos/a/b/commits", params)
+
+    second = handler._get("/repos/a/b/commits", params)
+
+    assert second.headers["Link"] == first.headers["Link"] == cached(
+        handler, "/repos/a/b/commits", params).link
+    assert handler._parse_commit_count(second) == 25
+
+
+def test_changed_response_replaces_the_etag(stand_in):
+    handler = GitHubHandler(conditional=True)
+    first = handler._get("/repos/a/b")
+    stand_in.repos["a/b"]["info"]["description"] = "Rewritten"
+
+    second = handler._get("/repos/a/b")
+
+    entry = cached(handler, "/repos/a/b")
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert entry.etag == second.headers["ETag"]
+    assert entry.body["description"] == "Rewritten"
+    assert GitHubResponseCache.objects.count() == 1
+
+
+def test_unconditional_handler_neither_sends_nor_stores_validators(stand_in):
+    GitHubHandler(conditional=True)._get("/repos/a/b")
+    handler = GitHubHandler(conditional=False)
+
+    headers, entry = handler._conditional_headers(handler._url("/repos/a/b"))
+    handler._get("/repos/a/b/languages")
+
+    assert "If-None-Match" not in headers and entry is None
+    assert not GitHubResponseCache.objects.filter(url__endswith="/languages").exists()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the shared GitHub session: connection reuse and retries, against the stand-in server
+"""
+import pytest
+
+from edutrack.api import github_handler
+from edutrack.api.github_handler import GitHubHandler, get_pool_stats, get_session
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+
+REPOS = {"a/b": make_repo("a/b")}
+
+
+@pytest.fixture
+def github_settings(settings, monkeypatch):
+    settings.GITHUB_TOKEN = ""
+    settings.GITHUB_RATE_LIMIT_ENABLED = False
+    settings.GITHUB_MAX_RETRIES = 2
+    settings.GITHUB_RETRY_BACKOFF = 0
+    # Every test starts with a fresh process-wide session built from these settings
+    monkeypatch.setattr(github_handler, "_session", None)
+    yield settings
+    if github_handler._session is not None:
+        github_handler._session.close()
+
+
+def test_handlers_share_one_keep_alive_session(github_settings):
+    with GitHubStandInServer(REPOS) as server:
+        github_settings.GITHUB_API_URL = server.url
+        first = GitHubHandler(concurrent=False, conditional=False)
+        second = GitHubHandler(concurrent=False, conditional=False)
+
+        assert first.session is second.session is get_session()
+        assert first.fetch_repo_data("https://github.com/a/b")["success"]
+        assert second.fetch_repo_data("https://github.com/a/b")["success"]
+
+    stats = get_pool_stats()
+    assert stats["requests_sent"] == len(server.requests) == 12
+    # Sequential calls from both handlers go over the one connection
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 11
+
+
+@pytest.mark.parametrize("status", [502, 503])
+def test_server_errors_are_retried(github_settings, status):
+    with GitHubStandInServer(REPOS, error_rate=1.0, error_status=status) as server:
+        github_settings.GITHUB_API_URL = server.url
+        response = GitHubHandler(conditional=False)._get("/repos/a/b")
+
+    assert response.status_code == status
+    assert len(server.requests) == 1 + github_settings.GITHUB_MAX_RETRIES
+
+
+@pytest.mark.parametrize("status", [400, 404, 422])
+def test_client_errors_are_not_retried(github_settings, status):
+    with GitHubStandInServer(REPOS, error_rate=1.0, error_status=status) as server:
+        github_settings.GITHUB_API_URL = server.url
+        response = GitHubHandler(conditional=False)._get("/repos/a/b")
+
+    assert response.status_code == status
+    assert len(server.requests) == 1
+
+
+def test_retried_error_can_succeed(github_settings):
+    # With this seed the first call fails and its retry succeeds
+    with GitHubStandInServer(REPOS, error_rate=0.5, seed=3) as server:
+        github_settings.GITHUB_API_URL = server.url
+        response = GitHubHandler(conditional=False)._get("/repos/a/b")
+
+    assert response.status_code == 200
+    assert response.data["full_name"] == "a/b"
+    assert len(server.requests) == 2
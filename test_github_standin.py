@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the GitHub stand-in server features and the ingestion benchmark command
+"""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from edutrack.api import github_handler
+from edutrack.api.github_handler import GitHubHandler
+from edutrack.api.rate_limiter import GitHubRateLimiter
+from edutrack.models import GitHubRateLimit, GitHubResponseCache
+from edutrack.testing.github_server import (
+    GitHubStandInServer, load_fixtures, make_repo, scale_fixtures,
+)
+
+
+@pytest.fixture
+def github_settings(settings):
+    settings.GITHUB_TOKEN = ""
+    settings.GITHUB_RATE_LIMIT_ENABLED = False
+    return settings
+
+
+def test_recorded_fixtures_replay_through_handler(github_settings):
+    repos = scale_fixtures(load_fixtures(), 4)
+    with GitHubStandInServer(repos) as server:
+        github_settings.GITHUB_API_URL = server.url
+        handler = GitHubHandler(conditional=False)
+
+        results = [handler.fetch_repo_data(f"https://github.com/{name}") for name in repos]
+
+    assert all(result["success"] for result in results)
+    assert sorted(result["commit_count"] for result in results) == [3, 12, 47, 132]
+
+
+def test_exhausted_budget_defers_fetch(github_settings):
+    with GitHubStandInServer({"a/b": make_repo("a/b")}, rate_limit=6) as server:
+        github_settings.GITHUB_API_URL = server.url
+        handler = GitHubHandler(conditional=False, concurrent=False)
+
+        first = handler.fetch_repo_data("https://github.com/a/b")
+        second = handler.fetch_repo_data("https://github.com/a/b")
+
+    assert first["success"] is True
+    assert second["deferred"] is True
+    assert "retry_at" in second
+
+
+@pytest.mark.django_db(transaction=True)
+def test_unchanged_responses_are_free_304s(github_settings):
+    with GitHubStandInServer({"a/b": make_repo("a/b")}, rate_limit=12) as server:
+        github_settings.GITHUB_API_URL = server.url
+        handler = GitHubHandler(conditional=True)
+
+        first = handler.fetch_repo_data("https://github.com/a/b")
+        # Only 6 requests left: every one of these must be a 304
+        second = handler.fetch_repo_data("https://github.com/a/b")
+        third = handler.fetch_repo_data("https://github.com/a/b")
+
+    assert second["success"] and third["success"]
+    for key in ("commit_count", "commits", "languages", "readme_content", "contributors"):
+        assert third[key] == first[key]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_command_reports_each_configuration(monkeypatch):
+    """Each configuration fetches cold through the ETag cache and the rate-limit scheduler"""
+    acquired = []
+    monkeypatch.setattr(GitHubRateLimiter, "acquire", lambda self: acquired.append(self.resource))
+    GitHubRateLimit.objects.create(resource="core", limit=5000, remaining=4321)
+    out = StringIO()
+
+    call_command("benchmark_github", repos=[4], concurrency=[1, 2], latency=0.0,
+                 json=True, stdout=out)
+
+    rows = json.loads(out.getvalue())
+    assert [(row["repos"], row["concurrency"]) for row in rows] == [(4, 1), (4, 2)]
+    assert all(row["errors"] == 0 and row["http_requests"] == 24 for row in rows)
+    assert acquired == ["core"] * 48
+    # The stand-in's cache entries are dropped and the real budget put back
+    assert not GitHubResponseCache.objects.exists()
+    assert GitHubRateLimit.objects.get().remaining == 4321
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_command_can_turn_off_cache_and_scheduler(monkeypatch):
+    # Any use of either would fail the fetch
+    monkeypatch.setattr(github_handler, "GitHubResponseCache", None)
+    monkeypatch.setattr(github_handler, "get_rate_limiter", None)
+    out = StringIO()
+
+    call_command("benchmark_github", repos=[2], concurrency=[1], latency=0.0,
+                 conditional=False, rate_limited=False, json=True, stdout=out)
+
+    assert json.loads(out.getvalue())[0]["errors"] == 0
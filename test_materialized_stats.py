@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Test that AssignmentStats follow every repo change and that pages read them in constant queries
+"""
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from edutrack.models import Assignment, AssignmentStats, StudentRepo
+from edutrack.stats import assignment_stats, compute_stats, verify_stats
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def assignment():
+    teacher = User.objects.create_user("teacher")
+    return Assignment.objects.create(teacher=teacher, title="Project")
+
+
+def add_repo(assignment, n, commits=5, languages=None, score=None):
+    return StudentRepo.objects.create(
+        assignment=assignment,
+        student_name=f"Student {n}",
+        repo_url=f"https://github.com/student/project{n}",
+        commit_count=commits,
+        languages=languages if languages is not None else {"Python": 100 * (n + 1)},
+        is_analyzed=score is not None,
+        performance_score=score,
+    )
+
+
+def stored(assignment):
+    return AssignmentStats.objects.get(assignment=assignment)
+
+
+def test_stats_follow_add_analyze_and_delete(assignment):
+    first = add_repo(assignment, 0, commits=4)
+    add_repo(assignment, 1, commits=6, languages={"Python": 50, "HTML": 50}, score=92)
+    assert verify_stats(assignment.id) == []
+    assert stored(assignment).total_repos == 2
+
+    # Analyzed the way the pipeline does it: load, change, save
+    repo = StudentRepo.objects.get(id=first.id)
+    repo.commit_count = 9
+    repo.is_analyzed = True
+    repo.performance_score = 58
+    repo.languages = {"Go": 400}
+    repo.save()
+
+    stats = assignment_stats(assignment)
+    assert verify_stats(assignment.id) == []
+    assert (stats["total_commits"], stats["analyzed_repos"]) == (15, 2)
+    assert (stats["min_score"], stats["max_score"], stats["avg_score"]) == (58, 92, 75.0)
+    assert (stats["excellent"], stats["needs_improvement"]) == (1, 1)
+    assert stats["languages"][0] == {"language": "Go", "percentage": 80.0, "bytes": 400}
+
+    StudentRepo.objects.get(id=first.id).delete()
+    assert verify_stats(assignment.id) == []
+    assert (stored(assignment).min_score, stored(assignment).max_score) == (92, 92)
+    assert stored(assignment).language_bytes == {"Python": 50, "HTML": 50}
+
+
+def test_extremes_are_rescanned_when_their_repo_changes(assignment):
+    low = add_repo(assignment, 0, score=40)
+    add_repo(assignment, 1, score=70)
+    add_repo(assignment, 2, score=95)
+
+    repo = StudentRepo.objects.get(id=low.id)
+    repo.performance_score = 80
+    repo.save()
+
+    assert (stored(assignment).min_score, stored(assignment).max_score) == (70, 95)
+    assert verify_stats(assignment.id) == []
+
+
+def test_bulk_delete_moves_and_deferred_loads(assignment):
+    other = Assignment.objects.create(teacher=assignment.teacher, title="Other")
+    for n in range(4):
+        add_repo(assignment, n, score=60 + n)
+
+    moved = StudentRepo.objects.get(student_name="Student 0")
+    moved.assignment = other
+    moved.save()
+    partial = StudentRepo.objects.only("id", "commit_count").get(student_name="Student 1")
+    partial.commit_count = 50
+    partial.save()
+    StudentRepo.objects.filter(student_name="Student 2").delete()
+
+    assert verify_stats(assignment.id) == []
+    assert verify_stats(other.id) == []
+    assert stored(other).total_repos == 1
+
+
+def test_stale_instances_are_diffed_against_the_stored_row(assignment):
+    repo = add_repo(assignment, 0, commits=4)
+    add_repo(assignment, 1, score=70)
+    # A worker and a stream view both hold the repo across their GitHub and Gemini calls
+    worker = StudentRepo.objects.get(id=repo.id)
+    stream = StudentRepo.objects.get(id=repo.id)
+
+    worker.is_analyzed, worker.performance_score, worker.commit_count = True, 95, 12
+    worker.save()
+    stream.commit_count = 20
+    stream.languages = {"Rust": 300}
+    stream.save()
+
+    assert verify_stats(assignment.id) == []
+    assert stored(assignment).total_commits == 25
+    assert stored(assignment).language_bytes == {"Rust": 300, "Python": 200}
+
+
+def test_update_fields_keep_the_stored_values_of_other_fields(assignment):
+    repo = add_repo(assignment, 0, commits=4, score=50)
+    stale = StudentRepo.objects.get(id=repo.id)
+    StudentRepo.objects.get(id=repo.id).save()  # no-op save by someone else
+    fresh = StudentRepo.objects.get(id=repo.id)
+    fresh.performance_score = 90
+    fresh.save()
+
+    stale.commit_count = 30
+    stale.save(update_fields=["commit_count"])
+
+    assert verify_stats(assignment.id) == []
+    assert (stored(assignment).total_commits, stored(assignment).max_score) == (30, 90)
+
+
+def test_queryset_update_and_bulk_update_rebuild_stats(assignment):
+    other = Assignment.objects.create(teacher=assignment.teacher, title="Other")
+    for n in range(3):
+        add_repo(assignment, n)
+
+    StudentRepo.objects.filter(student_name="Student 0").update(
+        is_analyzed=True, performance_score=88, languages={"Go": 10})
+    repos = list(StudentRepo.objects.filter(student_name__in=["Student 1", "Student 2"]))
+    for repo in repos:
+        repo.commit_count = 40
+    repos[0].assignment = other
+    StudentRepo.objects.bulk_update(repos, ["commit_count", "assignment"])
+
+    assert verify_stats(assignment.id) == []
+    assert verify_stats(other.id) == []
+    assert stored(assignment).language_bytes["Go"] == 10
+    assert (stored(other).total_repos, stored(other).total_commits) == (1, 40)
+
+
+def test_deleting_an_assignment_removes_its_stats(assignment):
+    add_repo(assignment, 0, score=80)
+
+    assignment.delete()
+
+    assert not AssignmentStats.objects.exists()
+
+
+def test_rebuild_command_verifies_and_repairs(assignment):
+    add_repo(assignment, 0, score=80)
+    AssignmentStats.objects.filter(assignment=assignment).update(total_repos=7, score_sum=1)
+
+    with pytest.raises(CommandError):
+        call_command("rebuild_assignment_stats", "--verify")
+    call_command("rebuild_assignment_stats")
+
+    call_command("rebuild_assignment_stats", "--verify")
+    assert stored(assignment).total_repos == 1
+    assert compute_stats(assignment.id)["score_sum"] == 80
+
+
+def page_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize("page", ["", "analytics/", "report/"])
+def test_page_queries_do_not_grow_with_class_size(client, assignment, page):
+    client.force_login(assignment.teacher)
+    url = f"/assignments/{assignment.id}/{page}"
+    add_repo(assignment, 0, score=70)
+    small = page_queries(client, url)
+
+    for n in range(1, 40):
+        add_repo(assignment, n, score=50 + n)
+
+    assert page_queries(client, url) == small
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_saves_from_worker_threads(assignment):
+    repos = [add_repo(assignment, n, commits=1) for n in range(16)]
+    errors = []
+    start = threading.Barrier(8)
+
+    def analyze(chunk):
+        start.wait()
+        try:
+            for repo in chunk:
+                # The pipeline's write: load, change, save
+                repo = StudentRepo.objects.get(id=repo.id)
+                repo.commit_count = 10
+                repo.is_analyzed = True
+                repo.performance_score = 50 + repo.id % 50
+                repo.languages = {"Python": 1000, "Go": repo.id}
+                repo.save()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=analyze, args=(repos[n::8],)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert verify_stats(assignment.id) == []
+    assert stored(assignment).analyzed_repos == 16
+    assert stored(assignment).total_commits == 160
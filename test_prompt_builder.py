@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that analysis prompts fill a token budget by priority and record token counts
+"""
+import pytest
+
+from edutrack.api.gemini_handler import GeminiHandler
+from edutrack.api.prompt_builder import ContextBuilder, count_tokens, split_readme
+
+pytestmark = pytest.mark.django_db
+
+README = "\n".join([
+    "Intro paragraph about the project.",
+    "# Todo App",
+    "A small todo list.",
+    "## Installation",
+    *["Run the installer step by step." for _ in range(300)],
+    "## Usage",
+    "Open the app in a browser.",
+])
+
+
+def repo_data():
+    return {
+        "commit_count": 12,
+        "languages": {"Python": 9000, "HTML": 1000},
+        "readme_content": README,
+        "commits": [{"message": f"Commit number {n}\n\nDetails", "date": "2025-01-04"} for n in range(10)],
+        "last_commit": {"message": "Commit number 0", "date": "2025-01-04"},
+    }
+
+
+def test_readme_is_split_on_headings():
+    sections = split_readme(README)
+
+    assert [(level, heading) for level, heading, _ in sections] == [
+        (0, None), (1, "Todo App"), (2, "Installation"), (2, "Usage")]
+    assert sections[0][2] == "Intro paragraph about the project."
+
+
+@pytest.mark.parametrize("budget", [250, 400, 800])
+def test_context_stays_within_budget(budget):
+    assert count_tokens(ContextBuilder(repo_data(), budget).build()) <= budget
+
+
+def test_small_budget_keeps_priorities():
+    context = ContextBuilder(repo_data(), 300).build()
+
+    # The outline, the first section, recent commits and languages all fit
+    assert "  - Usage" in context
+    assert "Intro paragraph about the project." in context
+    assert "- Commit number 4 (2025-01-04)" in context
+    assert "- Python: 90.0%" in context
+    # The long Installation section is clipped and older commits left out
+    assert context.endswith(" ...")
+    assert "Commit number 9" not in context
+    assert "Open the app in a browser." not in context
+
+
+def test_large_budget_includes_everything():
+    context = ContextBuilder(repo_data(), 10000).build()
+
+    assert "Open the app in a browser." in context
+    assert "- Commit number 9 (2025-01-04)" in context
+    assert " ..." not in context
+
+
+class FakeModel:
+    def generate_content(self, prompt, generation_config=None):
+        return type("Response", (), {"text": "**4. Performance Score (0-100):** 80/100"})()
+
+
+def test_token_counts_are_recorded(settings):
+    settings.GEMINI_API_KEY = "test-key"
+    settings.GEMINI_CONTEXT_TOKEN_BUDGET = 300
+    handler = GeminiHandler(use_cache=False, structured=False)
+    handler.model = FakeModel()
+
+    result = handler.analyze_repository(repo_data())
+
+    prompt = handler._create_analysis_prompt(repo_data())
+    assert result["prompt_tokens"] == count_tokens(prompt)
+    assert result["response_tokens"] == count_tokens("**4. Performance Score (0-100):** 80/100")
+    assert result["latency_ms"] >= 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the shared GitHub rate-limit scheduler
+"""
+import time
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from edutrack.api.rate_limiter import GitHubRateLimiter, RateLimitDeferred
+from edutrack.models import GitHubRateLimit
+
+pytestmark = pytest.mark.django_db
+
+
+def headers(remaining, limit=5000, reset_in=3600):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+    }
+
+
+def test_headers_update_shared_budget():
+    limiter = GitHubRateLimiter("core")
+    limiter.update_from_headers(headers(1234))
+
+    state = GitHubRateLimit.objects.get(resource="core")
+    assert (state.limit, state.remaining) == (5000, 1234)
+    assert limiter.status()["remaining"] == 1234
+
+
+def test_burst_then_defer_when_budget_spent():
+    limiter = GitHubRateLimiter("core", max_wait=0)
+    limiter.update_from_headers(headers(2))
+
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(RateLimitDeferred) as exc_info:
+        limiter.acquire()
+
+    assert exc_info.value.retry_at > timezone.now() + timedelta(minutes=59)
+
+
+def test_new_window_restores_budget():
+    limiter = GitHubRateLimiter("core", max_wait=0)
+    limiter.update_from_headers(headers(0, reset_in=-1))
+
+    limiter.acquire()
+
+    assert GitHubRateLimit.objects.get(resource="core").remaining == 4999
+
+
+def test_projected_completion_waits_for_reset_beyond_budget():
+    limiter = GitHubRateLimiter("core")
+    limiter.update_from_headers(headers(10, reset_in=600))
+
+    within_budget = limiter.projected_completion(5)
+    beyond_budget = limiter.projected_completion(50)
+
+    assert within_budget <= timezone.now() + timedelta(seconds=1)
+    assert beyond_budget >= timezone.now() + timedelta(seconds=590)
+
+
+def test_pace_spreads_the_remaining_budget_until_the_reset(settings):
+    settings.GITHUB_RATE_LIMIT_BURST = 1
+    limiter = GitHubRateLimiter("core")
+    # 4,990 calls left for the last 10 minutes: about 8 a second, not 5000/hour
+    limiter.update_from_headers(headers(4990, reset_in=600))
+
+    done_at = limiter.projected_completion(100)
+
+    assert done_at <= timezone.now() + timedelta(seconds=15)
+    assert done_at >= timezone.now() + timedelta(seconds=10)
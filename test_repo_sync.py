@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test that unchanged repositories are skipped after a single probe request
+"""
+import pytest
+from django.contrib.auth.models import User
+
+from edutrack.analysis import analyze_student_repo, parse_github_date
+from edutrack.models import AnalysisLog, Assignment, StudentRepo
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stand_in(settings):
+    with GitHubStandInServer({"student/project": make_repo("student/project")}) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = ""
+        settings.GEMINI_API_KEY = ""
+        settings.GITHUB_CONCURRENT_FETCH = False
+        yield server
+
+
+@pytest.fixture
+def repo():
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    return StudentRepo.objects.create(
+        assignment=assignment,
+        student_name="Student",
+        repo_url="https://github.com/student/project",
+        is_analyzed=True,
+        pushed_at=parse_github_date("2025-01-02T00:00:00Z"),
+    )
+
+
+def test_unchanged_repo_is_skipped_after_one_request(stand_in, repo):
+    AnalysisLog.objects.create(repo=repo, status="success")
+
+    result = analyze_student_repo(repo)
+
+    assert result["skipped"] is True
+    assert stand_in.requests == [("GET", "/repos/student/project")]
+    assert repo.analysis_logs.count() == 1
+
+
+def test_pushed_repo_is_fetched_again(stand_in, repo):
+    AnalysisLog.objects.create(repo=repo, status="success")
+    stand_in.repos["student/project"]["info"]["pushed_at"] = "2025-02-01T00:00:00Z"
+
+    result = analyze_student_repo(repo)
+
+    assert "skipped" not in result
+    repo.refresh_from_db()
+    assert repo.pushed_at == parse_github_date("2025-02-01T00:00:00Z")
+    assert repo.head_sha == f"{3:040x}"
+
+
+def test_force_skips_the_probe(stand_in, repo):
+    AnalysisLog.objects.create(repo=repo, status="success")
+
+    result = analyze_student_repo(repo, force=True)
+
+    assert "skipped" not in result
+    assert repo.analysis_logs.count() == 2
+
+
+@pytest.mark.parametrize("analyzed", [False, True])
+def test_repo_without_a_successful_analysis_is_not_probed(stand_in, repo, analyzed):
+    # Never analyzed, or analyzed once but every logged run failed
+    StudentRepo.objects.filter(id=repo.id).update(is_analyzed=analyzed)
+    repo.refresh_from_db()
+    AnalysisLog.objects.create(repo=repo, status="failed")
+
+    analyze_student_repo(repo)
+
+    # Exactly the six calls of the full fetch, no probe ahead of them
+    assert len(stand_in.requests) == 6
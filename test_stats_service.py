@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test that assignment and language statistics come from SQL aggregates and feed all three views
+"""
+import importlib
+
+import pytest
+from django.apps import apps
+from django.contrib.auth.models import User
+
+from edutrack.models import Assignment, RepoLanguage, StudentRepo
+from edutrack.stats import language_summary, repo_stats
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def assignment():
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    rows = [
+        # (commits, languages, analyzed, score)
+        (10, {"Python": 800, "HTML": 200}, True, 95),
+        (4, {"Python": 500}, True, 75),
+        (7, {"JavaScript": 500}, True, 59.5),
+        (3, {}, True, None),
+        (0, {}, False, None),
+    ]
+    for n, (commits, languages, analyzed, score) in enumerate(rows):
+        StudentRepo.objects.create(
+            assignment=assignment,
+            student_name=f"Student {n}",
+            repo_url=f"https://github.com/student/project{n}",
+            commit_count=commits,
+            languages=languages,
+            is_analyzed=analyzed,
+            performance_score=score,
+        )
+    return assignment
+
+
+def test_stats_in_one_query(assignment, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        stats = repo_stats(StudentRepo.objects.filter(assignment=assignment))
+
+    assert stats["total_repos"] == 5
+    assert stats["analyzed_repos"] == 4
+    assert stats["pending_repos"] == 1
+    assert stats["completion_percentage"] == 80.0
+    assert stats["total_commits"] == 24
+    assert stats["avg_commits"] == 4.8
+    assert stats["scored_repos"] == 3
+    assert stats["avg_score"] == 76.5
+    assert (stats["min_score"], stats["max_score"]) == (59.5, 95)
+    assert [stats[name] for name in ("excellent", "good", "average", "needs_improvement")] == [1, 1, 0, 1]
+
+
+def test_empty_assignment(django_assert_num_queries):
+    with django_assert_num_queries(1):
+        stats = repo_stats(StudentRepo.objects.filter(id=-1))
+
+    assert stats["total_repos"] == 0
+    assert stats["total_commits"] == 0
+    assert stats["avg_commits"] == 0
+    assert stats["avg_score"] is None
+    assert stats["excellent"] == 0
+
+
+def test_language_summary_is_grouped_in_sql(assignment, django_assert_num_queries):
+    repos = StudentRepo.objects.filter(assignment=assignment)
+
+    with django_assert_num_queries(2):
+        summary = language_summary(repos, 2)
+
+    assert summary["total_languages"] == 3
+    assert summary["total_bytes"] == 2000
+    assert summary["languages"] == [
+        {"language": "Python", "percentage": 65.0, "bytes": 1300},
+        {"language": "JavaScript", "percentage": 25.0, "bytes": 500},
+    ]
+
+
+def test_saving_a_repo_replaces_its_language_rows(assignment):
+    repo = StudentRepo.objects.get(assignment=assignment, student_name="Student 0")
+    repo.languages = {"Go": 700}
+    repo.save()
+
+    assert list(repo.language_rows.values_list("language", "bytes")) == [("Go", 700)]
+
+
+def test_backfill_migration(assignment):
+    RepoLanguage.objects.all().delete()
+    migration = importlib.import_module("edutrack.migrations.0012_backfill_repolanguage")
+
+    migration.backfill_languages(apps, None)
+
+    assert RepoLanguage.objects.count() == 4
+    assert language_summary(StudentRepo.objects.all())["total_bytes"] == 2000
+
+
+def test_views_share_the_stats(client, assignment):
+    client.force_login(assignment.teacher)
+
+    detail = client.get(f"/assignments/{assignment.id}/")
+    analytics = client.get(f"/assignments/{assignment.id}/analytics/")
+    report = client.get(f"/assignments/{assignment.id}/report/")
+
+    assert detail.context["avg_score"] == analytics.context["avg_score"] == 76.5
+    assert detail.context["total_languages"] == analytics.context["total_languages"] == 3
+    assert analytics.context["needs_improvement"] == 1
+    assert "**Average Performance Score:** 76.5" in report.json()["report"]
+    assert "- **Python:** 65.0%" in report.json()["report"]
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test that streamed analyses are queued by POST as jobs whose SSE stream forwards Gemini chunks
+"""
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
+
+from edutrack import jobs
+from edutrack.api import gemini_handler
+from edutrack.models import AnalysisJob, AnalysisLog, Assignment, StudentRepo
+from edutrack.testing.github_server import GitHubStandInServer, make_repo
+
+pytestmark = pytest.mark.django_db
+
+CHUNKS = ["**1. Summary (50-75 words):** A todo app.\n", "**4. Performance Score (0-100):** 77/100\n"]
+
+
+class StreamingModel:
+    """Streams CHUNKS the way generate_content(stream=True) does"""
+
+    def generate_content(self, prompt, stream=False):
+        assert stream
+        return [type("Chunk", (), {"text": text})() for text in CHUNKS]
+
+
+@pytest.fixture
+def stand_in(settings, monkeypatch):
+    with GitHubStandInServer({"student/project": make_repo("student/project")}) as server:
+        settings.GITHUB_API_URL = server.url
+        settings.GITHUB_TOKEN = ""
+        settings.GITHUB_CONDITIONAL_REQUESTS = False
+        settings.GITHUB_RATE_LIMIT_ENABLED = False
+        settings.GEMINI_API_KEY = "test-key"
+        settings.GEMINI_CACHE_ENABLED = False
+        monkeypatch.setattr(gemini_handler, "get_model", lambda model_name: StreamingModel())
+        yield server
+
+
+@pytest.fixture
+def repo():
+    teacher = User.objects.create_user("teacher")
+    assignment = Assignment.objects.create(teacher=teacher, title="Project")
+    return StudentRepo.objects.create(
+        assignment=assignment,
+        student_name="Student",
+        repo_url="https://github.com/student/project",
+    )
+
+
+def stream(client, url):
+    """GET url and return (response, [(event, data), ...])"""
+    async def fetch():
+        response = await client.get(url)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        return response, body.decode()
+
+    response, body = async_to_sync(fetch)()
+    return response, parse_events(body)
+
+
+def parse_events(body):
+    """[(event, data), ...] from an SSE body"""
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def start(repo):
+    """POST the stream endpoint as the teacher and return the job's JSON"""
+    client = Client()
+    client.force_login(repo.assignment.teacher)
+    response = client.post(f"/repo/{repo.id}/analyze/stream/")
+    assert response.status_code == 202
+    return response.json()
+
+
+def test_chunks_are_streamed_then_saved(stand_in, repo):
+    job = start(repo)
+    client = AsyncClient()
+    client.force_login(repo.assignment.teacher)
+
+    response, events = stream(client, job["stream_url"])
+
+    assert job["stream_url"] == f"/jobs/{job['job_id']}/stream/"
+    assert response["Content-Type"] == "text/event-stream"
+    assert events[:2] == [("status", "fetching"), ("status", "analyzing")]
+    assert [data["text"] for event, data in events if event == "chunk"] == CHUNKS
+    assert events[-1][0] == "done" and events[-1][1]["score"] == 77
+    repo.refresh_from_db()
+    assert repo.is_analyzed and repo.performance_score == 77
+    assert repo.commit_count == 3
+    assert repo.analysis_logs.get().status == "success"
+    assert AnalysisJob.objects.get(id=job["job_id"]).status == "success"
+
+
+def test_get_does_not_start_an_analysis(repo):
+    client = Client()
+    client.force_login(repo.assignment.teacher)
+
+    assert client.get(f"/repo/{repo.id}/analyze/stream/").status_code == 405
+    assert not AnalysisJob.objects.exists()
+    assert not AnalysisLog.objects.exists()
+
+
+def test_start_requires_csrf_token(repo):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(repo.assignment.teacher)
+
+    assert client.post(f"/repo/{repo.id}/analyze/stream/").status_code == 403
+    assert not AnalysisJob.objects.exists()
+
+
+def test_active_job_is_reused(repo):
+    queued = jobs.enqueue_analysis(repo)
+
+    assert start(repo)["job_id"] == queued.id
+    assert AnalysisJob.objects.count() == 1
+
+
+def test_stream_follows_a_job_run_elsewhere(stand_in, repo):
+    job = jobs.enqueue_analysis(repo)
+    AnalysisJob.objects.filter(id=job.id).update(
+        status="success", stage="done", result={"success": True, "score": 64})
+    client = AsyncClient()
+    client.force_login(repo.assignment.teacher)
+
+    _, events = stream(client, f"/jobs/{job.id}/stream/")
+
+    assert events == [("done", {"success": True, "score": 64})]
+    assert stand_in.requests == []
+    assert not AnalysisLog.objects.exists()
+
+
+def test_stream_requires_login(repo):
+    job = jobs.enqueue_analysis(repo, stream=True)
+
+    async def fetch():
+        return await AsyncClient().get(f"/jobs/{job.id}/stream/")
+
+    response = async_to_sync(fetch)()
+
+    assert response.status_code == 302
+    assert response["Location"].startswith("/login/")
+
+
+class GatedModel:
+    """Streams the first chunk, then waits for gate before the rest"""
+
+    def __init__(self, gate):
+        self.gate = gate
+
+    def generate_content(self, prompt, stream=False):
+        assert stream
+        yield type("Chunk", (), {"text": CHUNKS[0]})()
+        assert self.gate.wait(10)
+        for text in CHUNKS[1:]:
+            yield type("Chunk", (), {"text": text})()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_chunks_are_sent_as_they_come_over_wsgi(stand_in, repo, monkeypatch):
+    """runserver gets a sync iterator, so events leave before the analysis ends"""
+    gate = threading.Event()
+    monkeypatch.setattr(gemini_handler, "get_model", lambda model_name: GatedModel(gate))
+    job = start(repo)
+    client = Client()
+    client.force_login(repo.assignment.teacher)
+
+    response = client.get(job["stream_url"])
+    content = iter(response.streaming_content)
+    early = parse_events(b"".join(next(content) for _ in range(3)).decode())
+    assert AnalysisJob.objects.get(id=job["job_id"]).status == "running"
+    gate.set()
+    events = early + parse_events(b"".join(content).decode())
+
+    assert not response.is_async
+    assert early == [("status", "fetching"), ("status", "analyzing"), ("chunk", {"text": CHUNKS[0]})]
+    assert [data["text"] for event, data in events if event == "chunk"] == CHUNKS
+    assert events[-1][0] == "done" and events[-1][1]["score"] == 77
+    assert AnalysisJob.objects.get(id=job["job_id"]).status == "success"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_closing_the_wsgi_stream_interrupts_the_job(stand_in, repo, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(gemini_handler, "get_model", lambda model_name: GatedModel(gate))
+    job = start(repo)
+    client = Client()
+    client.force_login(repo.assignment.teacher)
+
+    response = client.get(job["stream_url"])
+    next(iter(response.streaming_content))
+    response.close()  # what the WSGI server does when the client disconnects
+    gate.set()
+
+    job = AnalysisJob.objects.get(id=job["job_id"])
+    assert job.status == "failed"
+    assert job.error_message == "Analysis stream was interrupted"
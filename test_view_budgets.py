@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test that every page and endpoint stays within its query and wall-time budget on seeded classrooms
+
+Query counts are pinned exactly and must not change with the class size: a
+new per-repo or per-assignment query fails here. Wall time may grow with
+the repos an assignment shows, by at most per_repo_ms each; as it depends
+on the machine, the time budgets are only checked with VIEW_BUDGET_TIMING=1.
+
+Not covered: bulk_add_repos POST does one insert per pasted line by design,
+and stream_analysis_job calls GitHub and Gemini.
+"""
+import os
+import time
+import uuid
+from dataclasses import dataclass
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from edutrack import jobs
+from edutrack.models import AnalysisJob, AnalysisLog, Assignment, RepoLanguage, StudentRepo
+from edutrack.stats import verify_stats
+from edutrack.testing.seed import seed_classrooms
+
+pytestmark = pytest.mark.django_db
+
+timing = pytest.mark.skipif(os.getenv("VIEW_BUDGET_TIMING") != "1",
+                            reason="wall-time budgets are opt-in: set VIEW_BUDGET_TIMING=1")
+
+# (teachers, assignments per teacher, repos per assignment)
+SIZES = [
+    pytest.param((1, 2, 5), id="small"),
+    pytest.param((2, 4, 40), id="medium"),
+    pytest.param((2, 6, 250), id="large"),
+]
+
+
+@dataclass
+class Budget:
+    url: str
+    queries: int
+    base_ms: float = 100
+    per_repo_ms: float = 0
+    method: str = "get"
+    bulk_insert: bool = False  # back-to-back INSERTs count once (SQLite splits bulk_create)
+
+
+def budgets(ids):
+    """The budget of every view, for the ids of the seeded objects it is called on"""
+    a, r = ids["assignment"], ids["repo"]
+    return {
+        # Session and user are the first two queries of every logged-in request
+        "home": Budget("/", 2),
+        "login": Budget("/login/", 2),
+        "register": Budget("/register/", 2),
+        "dashboard": Budget("/dashboard/", 4),
+        "assignment_list": Budget("/assignments/", 3),
+        "assignment_create": Budget("/assignments/create/", 2),
+        "assignment_detail": Budget(f"/assignments/{a}/", 7, per_repo_ms=1),
+        "assignment_analytics": Budget(f"/assignments/{a}/analytics/", 8, per_repo_ms=1),
+        "generate_report": Budget(f"/assignments/{a}/report/", 7, per_repo_ms=2),
+        "add_student_repo": Budget(f"/assignments/{a}/add-repo/", 3),
+        "bulk_add_repos": Budget(f"/assignments/{a}/bulk-add/", 3),
+        "analysis_batch_status": Budget(f"/assignments/{a}/analyze/{ids['batch']}/", 5,
+                                        per_repo_ms=0.5),
+        "repo_detail": Budget(f"/repo/{r}/", 4),
+        "analysis_job_status": Budget(f"/jobs/{ids['job']}/", 3),
+        # Writes last, as they change what the pages above show. Savepoints count too:
+        # a repo save updates RepoLanguage and AssignmentStats in the same transaction
+        "add_student_repo_post": Budget(f"/assignments/{a}/add-repo/", 14, method="post"),
+        "analyze_repo": Budget(f"/repo/{r}/analyze/", 7, method="post"),
+        # Reuses the job analyze_repo queued, marking it forced
+        "stream_repo_analysis": Budget(f"/repo/{r}/analyze/stream/", 7, method="post"),
+        "analyze_assignment": Budget(f"/assignments/{a}/analyze/", 9, per_repo_ms=0.5,
+                                     method="post", bulk_insert=True),
+    }
+
+
+def seeded_ids(teacher):
+    """Objects of the teacher's first assignment for the view URLs, with a queued batch"""
+    assignment = Assignment.objects.filter(teacher=teacher).order_by("id").first()
+    repo = assignment.repos.filter(is_analyzed=True).order_by("id").first()
+    batch, queued = jobs.enqueue_assignment(assignment, pending_only=True)
+    return {
+        "assignment": assignment.id,
+        "repo": repo.id,
+        "batch": batch,
+        "job": queued[0].id,
+        "repos": assignment.repos.count(),
+    }
+
+
+def count_queries(queries, bulk_insert):
+    if not bulk_insert:
+        return len(queries)
+    statements = [query["sql"].split(" (", 1)[0] for query in queries]
+    return sum(1 for n, statement in enumerate(statements)
+               if not (n and statement.startswith("INSERT") and statement == statements[n - 1]))
+
+
+def measure(client, budget):
+    """(queries, best wall time in ms) of a request; reads are warmed up and timed 3 times"""
+    if budget.method == "post":
+        data = {"student_name": "New Student", "repo_url": f"https://github.com/new/{uuid.uuid4()}"}
+        runs, send = 1, lambda: client.post(budget.url, data)
+    else:
+        runs, send = 3, lambda: client.get(budget.url)
+        send()
+
+    best = None
+    for _ in range(runs):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = send()
+            elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code < 400, f"{budget.url}: {response.status_code}"
+        best = elapsed if best is None else min(best, elapsed)
+    return count_queries(queries, budget.bulk_insert), best
+
+
+def measure_all(client, size):
+    """{view name: (budget, queries, ms)} for every view on a freshly seeded classroom"""
+    teachers = seed_classrooms(*size)
+    client.force_login(teachers[0])
+    ids = seeded_ids(teachers[0])
+    return ids, {name: (budget, *measure(client, budget)) for name, budget in budgets(ids).items()}
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_views_stay_within_query_budget(client, size):
+    _, measured = measure_all(client, size)
+
+    over = [f"{name}: {queries} queries, budget {budget.queries}"
+            for name, (budget, queries, _) in measured.items() if queries != budget.queries]
+    assert not over, "Views over budget (update budgets() if intended):\n" + "\n".join(over)
+
+
+@timing
+@pytest.mark.parametrize("size", SIZES)
+def test_views_stay_within_time_budget(client, size):
+    ids, measured = measure_all(client, size)
+
+    over = []
+    for name, (budget, _, elapsed) in measured.items():
+        time_budget = budget.base_ms + budget.per_repo_ms * ids["repos"]
+        if elapsed > time_budget:
+            over.append(f"{name}: {elapsed:.0f} ms, budget {time_budget:.0f} ms")
+    assert not over, "Views over budget (update budgets() if intended):\n" + "\n".join(over)
+
+
+def test_anonymous_pages_redirect_without_queries_beyond_the_session(client):
+    seed_classrooms(1, 1, 3)
+    ids = seeded_ids(User.objects.get())
+
+    for name, budget in budgets(ids).items():
+        if budget.method == "get" and name not in ("home", "login", "register"):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(budget.url)
+            assert response.status_code == 302, name
+            assert len(queries) <= 1, name
+
+
+def test_seed_is_deterministic_and_consistent():
+    seed_classrooms(teachers=2, assignments=3, repos=10, seed=7)
+    first = list(StudentRepo.objects.order_by("id").values_list(
+        "student_name", "commit_count", "languages", "performance_score"))
+    User.objects.all().delete()
+
+    seed_classrooms(teachers=2, assignments=3, repos=10, seed=7)
+    second = list(StudentRepo.objects.order_by("id").values_list(
+        "student_name", "commit_count", "languages", "performance_score"))
+
+    assert first == second
+    assert len(second) == 60
+    assert Assignment.objects.filter(teacher__username="seed7-teacher1").count() == 3
+    assert RepoLanguage.objects.count() == sum(len(row[2]) for row in second)
+    assert AnalysisLog.objects.filter(repo__is_analyzed=True).exclude(status="success").exists()
+    for assignment_id in Assignment.objects.values_list("id", flat=True):
+        assert verify_stats(assignment_id) == []
+    analyzed = StudentRepo.objects.filter(is_analyzed=True)
+    assert analyzed.exists() and not analyzed.filter(ai_summary__isnull=True).exists()
+    assert not AnalysisJob.objects.exists()